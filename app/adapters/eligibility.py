@@ -0,0 +1,147 @@
+"""
+Coverage eligibility: is a coverage in force on the date of service?
+
+EligibilityAdapter is the seam. PayerEligibilityAdapter sends a FHIR
+CoverageEligibilityRequest through the payer gateway, so it gets the same
+per-payer pooling, retries and circuit breaker as PA submission.
+MockEligibilityAdapter answers locally, for development and tests; the mock
+payer serves the same answers over HTTP.
+"""
+import asyncio
+import time
+from dataclasses import dataclass
+from datetime import date
+from typing import Collection, Optional, Protocol
+
+from app.adapters.payer_gateway import PayerGateway
+from app.core.config import settings
+
+# Member IDs the mocks report as not in force
+MOCK_INACTIVE_MEMBERS = frozenset({"INACTIVE"})
+
+
+@dataclass(frozen=True)
+class Eligibility:
+    active: bool
+    benefit_start: Optional[date] = None
+    benefit_end: Optional[date] = None
+    disposition: str = ""
+
+
+class EligibilityAdapter(Protocol):
+    async def check(self, *, payer: str, member_id: str, plan: str, service_date: date) -> Eligibility: ...
+
+    async def aclose(self) -> None: ...
+
+
+# -----------------------
+# Payload
+# -----------------------
+
+def build_eligibility_request(*, payer: str, member_id: str, plan: str, service_date: date) -> dict:
+    """
+    Minimal CoverageEligibilityRequest (purpose=validation) with the
+    coverage contained.
+    """
+    return {
+        "resourceType": "CoverageEligibilityRequest",
+        "status": "active",
+        "purpose": ["validation"],
+        "servicedDate": service_date.isoformat(),
+        "created": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "insurer": {"display": payer},
+        "contained": [
+            {
+                "resourceType": "Coverage",
+                "id": "coverage",
+                "status": "active",
+                "subscriberId": member_id,
+                "payor": [{"display": payer}],
+                "class": [{"type": {"text": "plan"}, "value": plan}],
+            }
+        ],
+        "insurance": [{"focal": True, "coverage": {"reference": "#coverage"}}],
+    }
+
+
+def _date(value: Optional[str]) -> Optional[date]:
+    try:
+        return date.fromisoformat(value[:10]) if value else None
+    except ValueError:
+        return None
+
+
+def parse_eligibility_response(body: dict) -> Eligibility:
+    """
+    Reads `inforce` and the benefit period from the first insurance entry of
+    a CoverageEligibilityResponse; a response without one is not in force.
+    """
+    insurance = (body.get("insurance") or [{}])[0]
+    period = insurance.get("benefitPeriod") or {}
+    return Eligibility(
+        active=bool(insurance.get("inforce")) and body.get("outcome") != "error",
+        benefit_start=_date(period.get("start")),
+        benefit_end=_date(period.get("end")),
+        disposition=body.get("disposition") or "",
+    )
+
+
+def mock_eligibility_response(member_id: str, service_date: date, inactive_members: Collection[str]) -> dict:
+    """
+    What the mocks answer: in force for the calendar year of the date of
+    service, unless the member is in `inactive_members`.
+    """
+    inforce = member_id not in inactive_members
+    return {
+        "resourceType": "CoverageEligibilityResponse",
+        "status": "active",
+        "purpose": ["validation"],
+        "outcome": "complete",
+        "servicedDate": service_date.isoformat(),
+        "disposition": "Coverage in force" if inforce else "Coverage terminated",
+        "insurance": [
+            {
+                "inforce": inforce,
+                "benefitPeriod": {"start": f"{service_date.year}-01-01", "end": f"{service_date.year}-12-31"},
+            }
+        ],
+    }
+
+
+# -----------------------
+# Adapters
+# -----------------------
+
+class PayerEligibilityAdapter:
+    def __init__(self, gateway: Optional[PayerGateway] = None):
+        self.gateway = gateway or PayerGateway()
+
+    async def check(self, *, payer: str, member_id: str, plan: str, service_date: date) -> Eligibility:
+        client = self.gateway.client_for(payer)
+        request = build_eligibility_request(payer=payer, member_id=member_id, plan=plan, service_date=service_date)
+        return parse_eligibility_response(await client.check_eligibility(request))
+
+    async def aclose(self) -> None:
+        await self.gateway.aclose()
+
+
+class MockEligibilityAdapter:
+    def __init__(self, *, inactive_members: Collection[str] = MOCK_INACTIVE_MEMBERS, latency: float = 0.0):
+        self.inactive_members = inactive_members
+        self.latency = latency      # to stand in for a slow payer
+        self.calls = 0
+
+    async def check(self, *, payer: str, member_id: str, plan: str, service_date: date) -> Eligibility:
+        self.calls += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return parse_eligibility_response(mock_eligibility_response(member_id, service_date, self.inactive_members))
+
+    async def aclose(self) -> None:
+        pass
+
+
+def build_adapter() -> EligibilityAdapter:
+    if settings.eligibility_adapter == "mock":
+        return MockEligibilityAdapter()
+    return PayerEligibilityAdapter()
@@ -0,0 +1,124 @@
+"""
+Local stand-in for a payer's PAS endpoint, for offline development and tests:
+
+    uvicorn app.adapters.mock_payer:app --port 9000
+    PAYER_DEFAULT_URL=http://localhost:9000/fhir python -m app.workers.payer_worker
+
+Claims come back pended (A4) and are decided after `polls_before_decision`
+polls: denied when the service code is in `deny_codes`, approved otherwise.
+`fail_next` makes the next N requests answer 503, to exercise retries and
+the circuit breaker; `lose_next` processes the next N requests but answers
+503 anyway, as when a response is lost. A re-sent Claim (same identifier)
+is matched to the claim already on file instead of creating another. Eligibility checks are in force for the calendar year,
+except for members in `inactive_members`.
+"""
+import uuid
+from dataclasses import dataclass, field
+from datetime import date
+
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import JSONResponse
+
+from app.adapters.eligibility import MOCK_INACTIVE_MEMBERS, mock_eligibility_response
+from app.adapters.payer_gateway import CLAIM_IDENTIFIER_SYSTEM, REVIEW_ACTION_URL
+
+
+@dataclass
+class MockPayerState:
+    deny_codes: set[str] = field(default_factory=lambda: {"70553"})
+    polls_before_decision: int = 1
+    fail_next: int = 0
+    lose_next: int = 0
+    inactive_members: set[str] = field(default_factory=lambda: set(MOCK_INACTIVE_MEMBERS))
+    eligibility_checks: int = 0
+    claims: dict[str, dict] = field(default_factory=dict)
+    # claim identifier (PA id) -> claim id
+    identifiers: dict[str, str] = field(default_factory=dict)
+
+
+def _claim_response(claim_id: str, action: str, disposition: str) -> dict:
+    return {
+        "resourceType": "ClaimResponse",
+        "id": claim_id,
+        "status": "active",
+        "use": "preauthorization",
+        "outcome": "queued" if action == "A4" else "complete",
+        "disposition": disposition,
+        "item": [
+            {
+                "itemSequence": 1,
+                "extension": [
+                    {"url": REVIEW_ACTION_URL, "valueCodeableConcept": {"coding": [{"code": action}]}}
+                ],
+            }
+        ],
+    }
+
+
+def create_mock_payer(state: MockPayerState | None = None) -> FastAPI:
+    state = state or MockPayerState()
+    app = FastAPI(title="Mock payer (PAS)")
+    app.state.payer = state
+
+    @app.middleware("http")
+    async def inject_failures(request: Request, call_next):
+        if state.fail_next > 0:
+            state.fail_next -= 1
+            return JSONResponse({"resourceType": "OperationOutcome"}, status_code=503, headers={"Retry-After": "0"})
+        response = await call_next(request)
+        if state.lose_next > 0:
+            state.lose_next -= 1
+            return JSONResponse({"resourceType": "OperationOutcome"}, status_code=503)
+        return response
+
+    @app.post("/fhir/Claim/$submit")
+    async def submit(request: Request):
+        bundle = await request.json()
+        claim = next(
+            (e["resource"] for e in bundle.get("entry", []) if e.get("resource", {}).get("resourceType") == "Claim"),
+            None,
+        )
+        if claim is None:
+            raise HTTPException(status_code=400, detail="Bundle has no Claim")
+        code = claim["item"][0]["productOrService"]["coding"][0]["code"]
+        identifier = next(
+            (i["value"] for i in claim.get("identifier", []) if i.get("system") == CLAIM_IDENTIFIER_SYSTEM), None
+        )
+        if identifier in state.identifiers:
+            # A re-send of a claim we already have
+            return _claim_response(state.identifiers[identifier], "A4", "Pended for clinical review")
+        claim_id = uuid.uuid4().hex
+        state.claims[claim_id] = {"code": code, "polls": 0}
+        if identifier:
+            state.identifiers[identifier] = claim_id
+        return _claim_response(claim_id, "A4", "Pended for clinical review")
+
+    @app.get("/fhir/ClaimResponse/{claim_id}")
+    async def inquire(claim_id: str):
+        claim = state.claims.get(claim_id)
+        if claim is None:
+            raise HTTPException(status_code=404, detail="Unknown claim")
+        claim["polls"] += 1
+        if claim["polls"] < state.polls_before_decision:
+            return _claim_response(claim_id, "A4", "Pended for clinical review")
+        if claim["code"] in state.deny_codes:
+            return _claim_response(claim_id, "A3", "Not medically necessary")
+        return _claim_response(claim_id, "A1", "Certified in total")
+
+    @app.post("/fhir/CoverageEligibilityRequest/$submit")
+    async def eligibility(request: Request):
+        body = await request.json()
+        coverage = next((r for r in body.get("contained", []) if r.get("resourceType") == "Coverage"), None)
+        try:
+            service_date = date.fromisoformat(body["servicedDate"])
+        except (KeyError, TypeError, ValueError):
+            raise HTTPException(status_code=400, detail="servicedDate is required")
+        if coverage is None or not coverage.get("subscriberId"):
+            raise HTTPException(status_code=400, detail="Request has no contained Coverage with a subscriberId")
+        state.eligibility_checks += 1
+        return mock_eligibility_response(coverage["subscriberId"], service_date, state.inactive_members)
+
+    return app
+
+
+app = create_mock_payer()
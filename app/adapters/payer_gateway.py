@@ -0,0 +1,315 @@
+"""
+Async client for payer prior-auth endpoints (FHIR Da Vinci PAS).
+
+One PayerClient per payer: its own connection pool, in-flight cap, retry
+policy and circuit breaker, so a slow or failing payer can't starve the
+others. Submissions and polls run in background workers; the only call
+made in the request path is the (cached) eligibility check, with fewer retries.
+"""
+import asyncio
+import logging
+import random
+import time
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+import httpx
+
+from app.core.config import settings
+
+log = logging.getLogger(__name__)
+
+FHIR_JSON = "application/fhir+json"
+# Claim and Bundle identifier system; the value is the PA id, stable across re-sends
+CLAIM_IDENTIFIER_SYSTEM = "urn:pa-copilot:prior-auth"
+REVIEW_ACTION_URL = "http://hl7.org/fhir/us/davinci-pas/StructureDefinition/extension-reviewAction"
+# X12 278 review action codes carried by PAS ClaimResponses
+_REVIEW_ACTIONS = {"A1": "approved", "A2": "approved", "A3": "denied", "A4": "pending"}
+_RETRYABLE_STATUS = {408, 429, 500, 502, 503, 504}
+# Failures that guarantee the request never reached the payer
+_NOT_SENT = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)
+
+
+class PayerError(Exception):
+    def __init__(self, message: str, *, retryable: bool):
+        super().__init__(message)
+        self.retryable = retryable
+
+
+class CircuitOpenError(PayerError):
+    def __init__(self, payer: str):
+        super().__init__(f"circuit open for payer {payer}", retryable=True)
+
+
+@dataclass(frozen=True)
+class Decision:
+    tracking_id: str
+    status: str                 # pending | approved | denied
+    disposition: str = ""
+
+
+class CircuitBreaker:
+    """
+    Opens after `failure_threshold` consecutive failures. Once `reset_seconds`
+    have passed, one probe request is let through (half-open). A success
+    closes the circuit; a failure opens it again.
+    """
+
+    def __init__(self, failure_threshold: int, reset_seconds: float, clock: Callable[[], float] = time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self._clock = clock
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._probing = False
+
+    @property
+    def state(self) -> str:
+        if self._opened_at is None:
+            return "closed"
+        if self._clock() - self._opened_at >= self.reset_seconds:
+            return "half_open"
+        return "open"
+
+    def allow(self) -> bool:
+        state = self.state
+        if state == "closed":
+            return True
+        if state == "half_open" and not self._probing:
+            self._probing = True
+            return True
+        return False
+
+    def record_success(self) -> None:
+        self._failures = 0
+        self._opened_at = None
+        self._probing = False
+
+    def record_failure(self) -> None:
+        self._failures += 1
+        if self._probing or self._failures >= self.failure_threshold:
+            self._opened_at = self._clock()
+        self._probing = False
+
+
+def backoff_delay(attempt: int) -> float:
+    # Full jitter: uniform in [0, min(cap, base * 2^attempt)]
+    return random.uniform(0, min(settings.payer_backoff_max_seconds, settings.payer_backoff_base_seconds * 2 ** attempt))
+
+
+def _retry_after(resp: httpx.Response) -> Optional[float]:
+    value = resp.headers.get("retry-after")
+    try:
+        return min(float(value), settings.payer_backoff_max_seconds) if value else None
+    except ValueError:
+        return None
+
+
+def parse_claim_response(body: dict) -> Decision:
+    """
+    Reads the review action from a PAS ClaimResponse (on the resource or its
+    first item); a response without one is still pending.
+    """
+    exts = list(body.get("extension", []))
+    for item in body.get("item", []):
+        exts.extend(item.get("extension", []))
+    code = None
+    for ext in exts:
+        if ext.get("url") == REVIEW_ACTION_URL:
+            codings = (ext.get("valueCodeableConcept") or {}).get("coding") or []
+            code = codings[0].get("code") if codings else None
+            break
+    if code is None and body.get("outcome") in ("queued", "partial"):
+        code = "A4"
+    status = _REVIEW_ACTIONS.get(code or "A4", "pending")
+    return Decision(tracking_id=str(body.get("id", "")), status=status, disposition=body.get("disposition") or "")
+
+
+class PayerClient:
+    def __init__(self, payer: str, base_url: str, *, transport: Optional[httpx.AsyncBaseTransport] = None):
+        self.payer = payer
+        self._client = httpx.AsyncClient(
+            base_url=base_url,
+            transport=transport,
+            timeout=httpx.Timeout(settings.payer_timeout_seconds, connect=settings.payer_connect_timeout_seconds),
+            limits=httpx.Limits(
+                max_connections=settings.payer_max_connections,
+                max_keepalive_connections=settings.payer_max_connections,
+            ),
+            headers={"Accept": FHIR_JSON},
+        )
+        self._inflight = asyncio.Semaphore(settings.payer_max_concurrency)
+        self.breaker = CircuitBreaker(settings.payer_breaker_failure_threshold, settings.payer_breaker_reset_seconds)
+
+    async def _request(
+        self, method: str, url: str, *, retries: Optional[int] = None, idempotent: bool = True, **kwargs
+    ) -> httpx.Response:
+        """
+        Sends with retries. A non-idempotent request is only retried when it
+        certainly never reached the payer (connect failures, 429); after any
+        other failure it may have been processed, so the error goes back to
+        the caller, whose re-send must be recognisable as the same request.
+        """
+        retries = settings.payer_max_retries if retries is None else retries
+        error = "no attempt made"
+        for attempt in range(retries + 1):
+            if not self.breaker.allow():
+                raise CircuitOpenError(self.payer)
+            delay = None
+            try:
+                async with self._inflight:
+                    resp = await self._client.request(method, url, **kwargs)
+            except httpx.TransportError as e:  # includes timeouts
+                self.breaker.record_failure()
+                error = f"{type(e).__name__}: {e}"
+                if not idempotent and not isinstance(e, _NOT_SENT):
+                    break
+            else:
+                if resp.status_code in _RETRYABLE_STATUS:
+                    self.breaker.record_failure()
+                    error = f"HTTP {resp.status_code}"
+                    delay = _retry_after(resp)
+                    if not idempotent and resp.status_code != 429:
+                        break
+                elif resp.status_code >= 400:
+                    # The payer answered; the request itself is wrong
+                    self.breaker.record_success()
+                    raise PayerError(f"HTTP {resp.status_code}: {resp.text[:200]}", retryable=False)
+                else:
+                    self.breaker.record_success()
+                    return resp
+            if attempt < retries:
+                await asyncio.sleep(delay if delay is not None else backoff_delay(attempt))
+        log.warning("payer %s %s %s failed: %s", self.payer, method, url, error)
+        raise PayerError(error, retryable=True)
+
+    async def submit(self, bundle: dict) -> Decision:
+        # Not idempotent: an ambiguous failure is re-sent later by the worker,
+        # and the Claim identifier (the PA id) lets the payer match it up
+        resp = await self._request(
+            "POST", "Claim/$submit", json=bundle, headers={"Content-Type": FHIR_JSON}, idempotent=False
+        )
+        return parse_claim_response(resp.json())
+
+    async def poll(self, tracking_id: str) -> Decision:
+        resp = await self._request("GET", f"ClaimResponse/{tracking_id}")
+        return parse_claim_response(resp.json())
+
+    async def check_eligibility(self, request: dict) -> dict:
+        resp = await self._request(
+            "POST",
+            "CoverageEligibilityRequest/$submit",
+            json=request,
+            headers={"Content-Type": FHIR_JSON},
+            retries=settings.eligibility_max_retries,
+        )
+        return resp.json()
+
+    async def aclose(self) -> None:
+        await self._client.aclose()
+
+
+class PayerGateway:
+    """
+    Lazily builds one PayerClient per payer from settings.payer_endpoints,
+    falling back to payer_default_url.
+    """
+
+    def __init__(self, *, transport: Optional[httpx.AsyncBaseTransport] = None):
+        self._transport = transport
+        self._clients: dict[str, PayerClient] = {}
+
+    def client_for(self, payer: str) -> PayerClient:
+        client = self._clients.get(payer)
+        if client is None:
+            base_url = settings.payer_endpoints.get(payer) or settings.payer_default_url
+            if not base_url:
+                raise PayerError(f"no endpoint configured for payer {payer}", retryable=False)
+            client = self._clients[payer] = PayerClient(payer, base_url.rstrip("/") + "/", transport=self._transport)
+        return client
+
+    async def aclose(self) -> None:
+        await asyncio.gather(*(c.aclose() for c in self._clients.values()))
+        self._clients.clear()
+
+
+# -----------------------
+# Payload
+# -----------------------
+
+def build_pas_bundle(
+    *,
+    pa_id: str,
+    code: str,
+    diagnosis_codes: list[str],
+    patient: dict,
+    coverage: dict,
+    provider_npi: Optional[str],
+    provider_name: Optional[str],
+) -> dict:
+    """
+    Minimal Da Vinci PAS request Bundle: Claim (use=preauthorization) with
+    its Patient, Coverage and requesting Practitioner.
+    """
+    patient_ref, coverage_ref = f"urn:uuid:{patient['id']}", f"urn:uuid:{coverage['id']}"
+    entries = [
+        {
+            "fullUrl": patient_ref,
+            "resource": {
+                "resourceType": "Patient",
+                "identifier": [{"value": patient["external_id"]}],
+                "name": [{"family": patient["last_name"], "given": [patient["first_name"]]}],
+                "birthDate": patient["birth_date"],
+            },
+        },
+        {
+            "fullUrl": coverage_ref,
+            "resource": {
+                "resourceType": "Coverage",
+                "status": "active",
+                "subscriberId": coverage["member_id"],
+                "beneficiary": {"reference": patient_ref},
+                "payor": [{"display": coverage["payer"]}],
+                "class": [{"type": {"text": "plan"}, "value": coverage["plan"]}],
+            },
+        },
+    ]
+    claim = {
+        "resourceType": "Claim",
+        "identifier": [{"system": CLAIM_IDENTIFIER_SYSTEM, "value": pa_id}],
+        "status": "active",
+        "use": "preauthorization",
+        "type": {"coding": [{"system": "http://terminology.hl7.org/CodeSystem/claim-type", "code": "professional"}]},
+        "patient": {"reference": patient_ref},
+        "created": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "insurer": {"display": coverage["payer"]},
+        "priority": {"coding": [{"code": "normal"}]},
+        "insurance": [{"sequence": 1, "focal": True, "coverage": {"reference": coverage_ref}}],
+        "diagnosis": [
+            {
+                "sequence": i + 1,
+                "diagnosisCodeableConcept": {"coding": [{"system": "http://hl7.org/fhir/sid/icd-10-cm", "code": d}]},
+            }
+            for i, d in enumerate(diagnosis_codes)
+        ],
+        "item": [
+            {
+                "sequence": 1,
+                "productOrService": {"coding": [{"system": "http://www.ama-assn.org/go/cpt", "code": code}]},
+            }
+        ],
+    }
+    if provider_npi or provider_name:
+        practitioner_ref = f"urn:uuid:practitioner-{provider_npi or pa_id}"
+        practitioner = {"resourceType": "Practitioner", "name": [{"text": provider_name or ""}]}
+        if provider_npi:
+            practitioner["identifier"] = [{"system": "http://hl7.org/fhir/sid/us-npi", "value": provider_npi}]
+        entries.append({"fullUrl": practitioner_ref, "resource": practitioner})
+        claim["provider"] = {"reference": practitioner_ref}
+    entries.insert(0, {"fullUrl": f"urn:uuid:{pa_id}", "resource": claim})
+    return {
+        "resourceType": "Bundle",
+        "identifier": {"system": CLAIM_IDENTIFIER_SYSTEM, "value": pa_id},
+        "type": "collection",
+        "entry": entries,
+    }
@@ -1,4 +1,4 @@
-import os, uuid
+import hashlib, os, shutil, uuid
 from pathlib import Path
 from typing import BinaryIO
 from app.core.config import settings
@@ -25,9 +25,67 @@ def save_file(stream: BinaryIO, content_type: str, original_name: str) -> tuple[
             f.write(chunk)
     return storage_key, size
 
+# -----------------------
+# Resumable uploads: chunks live under a per-session directory until assembled
+# -----------------------
+
+def _chunk_dir(session_key: str) -> Path:
+    return BASE / ".chunks" / session_key
+
+def save_chunk(session_key: str, index: int, data: bytes) -> None:
+    """
+    Writes one chunk atomically, so a retried or concurrent PUT of the
+    same index never leaves a torn file behind.
+    """
+    d = _chunk_dir(session_key)
+    d.mkdir(parents=True, exist_ok=True)
+    tmp = d / f"{index}.{uuid.uuid4().hex}.part"
+    tmp.write_bytes(data)
+    os.replace(tmp, d / str(index))
+
+def assemble_chunks(session_key: str, chunk_count: int) -> tuple[str, int, str]:
+    """
+    Concatenates chunks 0..n-1 into a new stored file.
+    Returns (storage_key, size_bytes, sha256 hex).
+    """
+    ensure_dir()
+    storage_key = f"{uuid.uuid4().hex}"
+    h = hashlib.sha256()
+    size = 0
+    d = _chunk_dir(session_key)
+    with open(BASE / storage_key, "wb") as out:
+        for i in range(chunk_count):
+            with open(d / str(i), "rb") as f:
+                while True:
+                    block = f.read(1024 * 1024)
+                    if not block:
+                        break
+                    h.update(block)
+                    size += len(block)
+                    out.write(block)
+    return storage_key, size, h.hexdigest()
+
+def discard_chunks(session_key: str) -> None:
+    shutil.rmtree(_chunk_dir(session_key), ignore_errors=True)
+
+def delete_file(storage_key: str) -> None:
+    (BASE / storage_key).unlink(missing_ok=True)
+
+def path_for(storage_key: str) -> Path:
+    return BASE / storage_key
+
 def open_file(storage_key: str) -> BinaryIO:
     path = BASE / storage_key
     return open(path, "rb")
 
 def exists(storage_key: str) -> bool:
     return (BASE / storage_key).exists()
+
+def check_writable() -> None:
+    """
+    Verifies the storage directory exists and accepts writes; raises OSError otherwise.
+    """
+    ensure_dir()
+    probe = BASE / f".probe-{uuid.uuid4().hex}"
+    probe.write_bytes(b"ok")
+    probe.unlink()
@@ -0,0 +1,72 @@
+"""
+Async HTTP sender for outbound webhooks.
+
+One pooled httpx client for every endpoint (keep-alive connections are
+reused across batches), with a per-endpoint in-flight cap so one slow
+receiver can't take the whole pool.
+"""
+import asyncio
+import json
+import time
+from collections import defaultdict
+from typing import Optional
+from urllib.parse import urlsplit
+
+import httpx
+
+from app.core.config import settings
+from app.services.webhooks import sign
+
+_RETRYABLE_STATUS = {408, 425, 429, 500, 502, 503, 504}
+
+
+class DeliveryError(Exception):
+    def __init__(self, message: str, *, retryable: bool):
+        super().__init__(message)
+        self.retryable = retryable
+
+
+def _origin(url: str) -> str:
+    parts = urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc}"
+
+
+class WebhookSender:
+    def __init__(self, *, transport: Optional[httpx.AsyncBaseTransport] = None):
+        self._client = httpx.AsyncClient(
+            transport=transport,
+            timeout=httpx.Timeout(settings.webhook_timeout_seconds, connect=settings.webhook_connect_timeout_seconds),
+            limits=httpx.Limits(
+                max_connections=settings.webhook_max_connections,
+                max_keepalive_connections=settings.webhook_max_connections,
+            ),
+            follow_redirects=False,
+        )
+        self._inflight: dict[str, asyncio.Semaphore] = defaultdict(
+            lambda: asyncio.Semaphore(settings.webhook_max_concurrency)
+        )
+
+    async def send(self, url: str, secret: str, events: list[dict]) -> None:
+        """
+        POSTs {"events": [...]} to the endpoint. Any 2xx acknowledges every
+        event in the batch; receivers de-duplicate on event id.
+        """
+        body = json.dumps({"events": events}, separators=(",", ":")).encode()
+        timestamp = int(time.time())
+        headers = {
+            "Content-Type": "application/json",
+            "X-Webhook-Timestamp": str(timestamp),
+            "X-Webhook-Signature": sign(secret, timestamp, body),
+        }
+        try:
+            async with self._inflight[_origin(url)]:
+                resp = await self._client.post(url, content=body, headers=headers)
+        except httpx.TransportError as e:  # includes timeouts
+            raise DeliveryError(f"{type(e).__name__}: {e}", retryable=True)
+        if resp.status_code >= 300:
+            # Anything but a retryable status means the receiver rejects these
+            # events as sent; retrying won't change its mind
+            raise DeliveryError(f"HTTP {resp.status_code}", retryable=resp.status_code in _RETRYABLE_STATUS)
+
+    async def aclose(self) -> None:
+        await self._client.aclose()
@@ -1,5 +1,5 @@
 from fastapi import APIRouter
-from .routes import requirements, db_check, auth, prior_auth, attachments, patients, coverages
+from .routes import requirements, db_check, auth, prior_auth, attachments, patients, coverages, codes, providers, uploads, fhir, profiles, webhooks
 
 api_router = APIRouter()
 
@@ -7,6 +7,13 @@ api_router.include_router(requirements.router, prefix="/requirements", tags=["re
 api_router.include_router(db_check.router,    prefix="/db-check",    tags=["ops"])
 api_router.include_router(auth.router,        prefix="/auth",        tags=["auth"])
 api_router.include_router(prior_auth.router,  prefix="/prior-auth",  tags=["prior-auth"])
+# Before attachments, so /attachments/uploads/... never matches /attachments/{doc_id}/...
+api_router.include_router(uploads.router,     prefix="/attachments/uploads", tags=["attachments"])
 api_router.include_router(attachments.router, prefix="/attachments", tags=["attachments"])
 api_router.include_router(patients.router, prefix="", tags=["patients"])
-api_router.include_router(coverages.router, prefix="", tags=["coverages"])
\ No newline at end of file
+api_router.include_router(coverages.router, prefix="", tags=["coverages"])
+api_router.include_router(codes.router,       prefix="/codes",       tags=["codes"])
+api_router.include_router(providers.router,   prefix="/providers",   tags=["providers"])
+api_router.include_router(fhir.router,        prefix="/fhir",        tags=["fhir"])
+api_router.include_router(profiles.router,    prefix="/profiles",    tags=["ops"])
+api_router.include_router(webhooks.router,    prefix="/webhooks",    tags=["webhooks"])
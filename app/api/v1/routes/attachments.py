@@ -1,32 +1,99 @@
-from fastapi import APIRouter, UploadFile, File, Depends, HTTPException, Response
+import uuid
+from typing import Optional
+from fastapi import APIRouter, UploadFile, File, Form, Depends, Header, HTTPException, Response
 from sqlalchemy.orm import Session
 from app.db import get_db
 from app.domain.schemas import DocumentRefOut
 from app.domain.models import DocumentReference
+from app.services import audit
 from app.services.files import store_document
+from app.services.idempotency import run_idempotent, fingerprint_stream
 from app.adapters import storage_local
 
 router = APIRouter()
 
-@router.post("", response_model=DocumentRefOut, status_code=201)
-async def upload_attachment(file: UploadFile = File(...), db: Session = Depends(get_db)):
-    # Save the file and DB record
-    doc = store_document(db, filename=file.filename, content_type=file.content_type or "", file_stream=file.file)
-    # Local dev URL for download
-    url = f"/v1/attachments/{doc.id}"
+def document_to_out(doc: DocumentReference) -> dict:
     return {
         "id": str(doc.id),
         "filename": doc.filename,
         "content_type": doc.content_type,
         "size_bytes": doc.size_bytes,
-        "url": url,
+        # Local dev URL for download
+        "url": f"/v1/attachments/{doc.id}",
+        "pa_request_id": str(doc.pa_request_id) if doc.pa_request_id else None,
+        "doc_type": doc.doc_type,
+        "processing_status": doc.processing_status,
     }
 
-@router.get("/{doc_id}")
-def download_attachment(doc_id: str, db: Session = Depends(get_db)):
-    doc = db.get(DocumentReference, doc_id)
+@router.post("", response_model=DocumentRefOut, status_code=201)
+def upload_attachment(
+    file: UploadFile = File(...),
+    pa_request_id: Optional[str] = Form(None),
+    doc_type: Optional[str] = Form(None, description="Required document this satisfies, e.g. 'Clinical notes'"),
+    db: Session = Depends(get_db),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
+):
+    def handler():
+        # Save the file and DB record
+        doc = store_document(
+            db,
+            filename=file.filename,
+            content_type=file.content_type or "",
+            file_stream=file.file,
+            pa_request_id=pa_request_id,
+            doc_type=doc_type,
+        )
+        return document_to_out(doc)
+
+    fingerprint = None
+    if idempotency_key:
+        fingerprint = fingerprint_stream(
+            file.file, file.filename or "", file.content_type or "", pa_request_id or "", doc_type or ""
+        )
+    return run_idempotent(
+        db,
+        key=idempotency_key,
+        scope="attachments.create",
+        fingerprint=fingerprint,
+        status_code=201,
+        handler=handler,
+    )
+
+def _get_doc_or_404(db: Session, doc_id: str) -> DocumentReference:
+    try:
+        doc = db.get(DocumentReference, uuid.UUID(doc_id))
+    except ValueError:
+        doc = None
     if not doc:
         raise HTTPException(status_code=404, detail="Not found")
+    audit.record("read", "document", doc.id, patient_id=doc.patient_id)
+    return doc
+
+@router.get("/{doc_id}/status")
+def get_attachment_status(doc_id: str, db: Session = Depends(get_db)):
+    doc = _get_doc_or_404(db, doc_id)
+    return {
+        "id": str(doc.id),
+        "processing_status": doc.processing_status,
+        "processing_error": doc.processing_error,
+        "detected_content_type": doc.detected_content_type,
+        "page_count": doc.page_count,
+        "has_text": doc.extracted_text is not None,
+        "thumbnail_url": f"/v1/attachments/{doc.id}/thumbnail" if doc.thumbnail_key else None,
+        "processed_at": doc.processed_at,
+    }
+
+@router.get("/{doc_id}/thumbnail")
+def get_attachment_thumbnail(doc_id: str, db: Session = Depends(get_db)):
+    doc = _get_doc_or_404(db, doc_id)
+    if not doc.thumbnail_key or not storage_local.exists(doc.thumbnail_key):
+        raise HTTPException(status_code=404, detail="No thumbnail")
+    with storage_local.open_file(doc.thumbnail_key) as f:
+        return Response(content=f.read(), media_type="image/png")
+
+@router.get("/{doc_id}")
+def download_attachment(doc_id: str, db: Session = Depends(get_db)):
+    doc = _get_doc_or_404(db, doc_id)
     if not storage_local.exists(doc.storage_key):
         raise HTTPException(status_code=410, detail="File missing")
     f = storage_local.open_file(doc.storage_key)
@@ -2,7 +2,7 @@ from fastapi import APIRouter, Depends, HTTPException, Request, status
 from sqlalchemy.orm import Session
 from typing import List
 
-from app.db import get_db
+from app.db import dialect_insert, get_db
 from app.domain.models import User
 from app.domain.schemas import UserCreateIn, UserOut, UserLoginIn, TokenOut
 from app.core.security import hash_password, verify_password, create_access_token
@@ -28,37 +28,37 @@ def _roles_string_to_list(roles_str: str) -> List[str]:
 async def register(user_data: UserCreateIn, db: Session = Depends(get_db)):
     """Register a new user with email, password, and roles."""
     
-    # Check if user already exists
-    existing_user = db.query(User).filter(User.email == user_data.email).first()
-    if existing_user:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Email already registered"
-        )
-    
     # Hash password
     hashed_password = hash_password(user_data.password)
     
     # Store roles as-is (already a string from frontend)
     roles_str = user_data.roles if user_data.roles else 'clinician'
     
-    # Create new user
-    new_user = User(
-        email=user_data.email,
-        hashed_password=hashed_password,
-        roles=roles_str
+    # Create new user; the unique index on email rejects duplicates, even
+    # between concurrent registrations
+    stmt = (
+        dialect_insert(db, User)
+        .values(email=user_data.email, hashed_password=hashed_password, roles=roles_str)
+        .on_conflict_do_nothing(index_elements=["email"])
+        .returning(User.id)
     )
-    
     try:
-        db.add(new_user)
+        user_id = db.scalar(stmt)
+        if user_id is None:
+            db.rollback()
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="Email already registered"
+            )
         db.commit()
-        db.refresh(new_user)
         
         return UserOut(
-            id=str(new_user.id),
-            email=new_user.email,
+            id=str(user_id),
+            email=user_data.email,
             roles=user_data.roles  # Return as string, not list
         )
+    except HTTPException:
+        raise
     except Exception as e:
         db.rollback()
         raise HTTPException(
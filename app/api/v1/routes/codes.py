@@ -0,0 +1,21 @@
+from typing import Literal, Optional
+from fastapi import APIRouter, Query
+
+from app.services.codes import get_catalog
+
+router = APIRouter()
+
+@router.get("/search")
+def search_codes(
+    prefix: str = Query(..., min_length=1, max_length=32),
+    system: Optional[Literal["CPT", "HCPCS", "ICD10"]] = None,
+    limit: int = Query(20, ge=1, le=100),
+):
+    """
+    Autocomplete over the in-memory code catalog: matches on code prefix
+    (dots ignored) or on the start of a description word.
+    """
+    items = get_catalog().search(prefix, system=system, limit=limit)
+    return {
+        "items": [{"system": e.system, "code": e.code, "description": e.description} for e in items],
+    }
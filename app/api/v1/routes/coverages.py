@@ -1,12 +1,17 @@
+from datetime import date, datetime, timezone
 from typing import Optional
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, status
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
-from sqlalchemy import select
+from sqlalchemy import DateTime, String, literal, select
 import uuid
 
-from app.db import get_db
+from app.core.ids import uuid7
+from app.db import commit_keep_loaded, dialect_insert, get_db
 from app.domain.models import Patient, Coverage
 from app.domain.schemas import CoverageCreateIn
+from app.services import audit, eligibility, records
+from app.services.idempotency import run_idempotent, fingerprint_of
 
 router = APIRouter()
 
@@ -24,44 +29,94 @@ def _coverage_to_out(c: Coverage):
 def create_coverage(
     payload: CoverageCreateIn,
     db: Session = Depends(get_db),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
 ):
-    # Check if patient exists
-    try:
-        patient_uuid = uuid.UUID(payload.patient_id)
-        patient = db.get(Patient, patient_uuid)
-    except Exception:
-        patient = db.query(Patient).filter(Patient.external_id == payload.patient_id).first()
-    
-    if not patient:
-        raise HTTPException(status_code=404, detail="Patient not found")
+    def handler():
+        # INSERT ... SELECT resolves the patient (UUID or external_id) in the
+        # same statement; the unique index on external_id decides conflicts
+        try:
+            patient_match = Patient.id == uuid.UUID(payload.patient_id)
+        except ValueError:
+            patient_match = Patient.external_id == payload.patient_id
+        now = datetime.now(timezone.utc)
+        source = select(
+            literal(uuid7(), Coverage.id.type),
+            literal(payload.external_id, String),
+            literal(payload.member_id, String),
+            literal(payload.plan, String),
+            literal(payload.payer, String),
+            Patient.id,
+            literal(now, DateTime(timezone=True)),
+            literal(now, DateTime(timezone=True)),
+        ).where(patient_match)
+        stmt = (
+            dialect_insert(db, Coverage)
+            .from_select(
+                ["id", "external_id", "member_id", "plan", "payer", "patient_id", "created_at", "updated_at"],
+                source,
+            )
+            .on_conflict_do_nothing(index_elements=["external_id"])
+            .returning(Coverage)
+        )
+        c = db.scalars(stmt).first()
+        if c is None:
+            db.rollback()
+            # Nothing inserted: only now find out which of the two it was
+            if db.scalar(select(Patient.id).where(patient_match)) is None:
+                raise HTTPException(status_code=404, detail="Patient not found")
+            raise HTTPException(status_code=409, detail="external_id already exists")
+        commit_keep_loaded(db)
+        audit.record("create", "coverage", c.id, patient_id=c.patient_id)
+        return _coverage_to_out(c)
 
-    # Check if external_id already exists
-    existing = db.query(Coverage).filter(Coverage.external_id == payload.external_id).first()
-    if existing:
-        raise HTTPException(status_code=409, detail="external_id already exists")
-
-    c = Coverage(
-        external_id=payload.external_id,
-        member_id=payload.member_id,
-        plan=payload.plan,
-        payer=payload.payer,
-        patient_id=patient.id,
+    return run_idempotent(
+        db,
+        key=idempotency_key,
+        scope="coverages.create",
+        fingerprint=fingerprint_of(payload.model_dump()),
+        status_code=201,
+        handler=handler,
     )
-    db.add(c)
-    db.commit()
-    db.refresh(c)
-    return _coverage_to_out(c)
 
 @router.get("/coverages/{ident}")
 def get_coverage(ident: str, db: Session = Depends(get_db)):
     # accept UUID or external_id
-    try:
-        key = uuid.UUID(str(ident))
-        row = db.get(Coverage, key)
-    except Exception:
-        row = db.query(Coverage).filter(Coverage.external_id == ident).first()
-
+    row = records.get_coverage(db, ident)
     if not row:
         raise HTTPException(status_code=404, detail="Coverage not found")
 
+    audit.record("read", "coverage", row.id, patient_id=row.patient_id)
     return _coverage_to_out(row)
+
+@router.get("/coverages/{ident}/eligibility")
+async def check_eligibility(
+    ident: str,
+    service_date: Optional[date] = Query(None, alias="date", description="Date of service; defaults to today"),
+    db: Session = Depends(get_db),
+):
+    """
+    Whether the coverage is in force on the date of service, as reported by
+    the payer (or the mock adapter). Cached per coverage and date.
+    """
+    row = await run_in_threadpool(records.get_coverage, db, ident)
+    if not row:
+        raise HTTPException(status_code=404, detail="Coverage not found")
+    service_date = service_date or date.today()
+    check, cached = await eligibility.check_coverage(row, service_date)
+
+    audit.record("read", "coverage", row.id, patient_id=row.patient_id)
+    result = check.result
+    return {
+        "coverage_id": str(row.id),
+        "payer": row.payer,
+        "plan": row.plan,
+        "service_date": service_date.isoformat(),
+        "active": result.active,
+        "benefit_period": {
+            "start": result.benefit_start.isoformat() if result.benefit_start else None,
+            "end": result.benefit_end.isoformat() if result.benefit_end else None,
+        },
+        "disposition": result.disposition,
+        "checked_at": check.checked_at.isoformat(),
+        "cached": cached,
+    }
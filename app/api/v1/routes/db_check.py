@@ -19,11 +19,6 @@ def seed_patient(db: Session = Depends(get_db)):
     db.refresh(p)
     return {"id": str(p.id)}
 
-@router.get("/patients")
-def list_patients(db: Session = Depends(get_db)):
-    rows = db.query(Patient).all()
-    return [{"id": str(r.id), "first_name": r.first_name, "last_name": r.last_name} for r in rows]
-
 @router.post("/seed-patient-coverage")
 def seed_pc(db: Session = Depends(get_db)):
     p = Patient(first_name="Jane", last_name="Doe", birth_date="1981-04-12")
@@ -0,0 +1,29 @@
+from fastapi import APIRouter, Depends, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse
+from sqlalchemy.orm import Session
+
+from app.db import get_db
+from app.api.v1.deps import require_role
+from app.adapters.payer_gateway import FHIR_JSON
+from app.services import fhir_bundle
+
+router = APIRouter()
+
+@router.post("/Bundle")
+async def post_bundle(
+    request: Request,
+    db: Session = Depends(get_db),
+    _: None = Depends(require_role("clinician")),
+):
+    """
+    Ingests a FHIR transaction Bundle (Patient, Coverage, Practitioner,
+    Claim/ServiceRequest) atomically and answers with a transaction-response
+    Bundle, one entry per request entry, in order.
+    """
+    parser = fhir_bundle.BundleParser()
+    async for chunk in request.stream():
+        parser.feed(chunk)
+    records = parser.close()
+    result = await run_in_threadpool(fhir_bundle.ingest, db, records)
+    return JSONResponse(result, media_type=FHIR_JSON)
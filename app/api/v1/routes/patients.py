@@ -1,12 +1,15 @@
 from typing import Optional
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, status
 from sqlalchemy.orm import Session
 from sqlalchemy import select
 import uuid
 
-from app.db import get_db
-from app.domain.models import Patient
+from app.api.v1.deps import require_role
+from app.db import commit_keep_loaded, dialect_insert, get_db
+from app.domain.models import Coverage, Patient
 from app.domain.schemas import PatientCreateIn
+from app.services import audit, patients, records
+from app.services.idempotency import run_idempotent, fingerprint_of
 
 router = APIRouter()
 
@@ -22,37 +25,89 @@ def _row_to_out(p: Patient):
         "dob": p.birth_date,
     }
 
+def _coverage_summary(c: Coverage):
+    return {
+        "id": str(c.id),
+        "external_id": c.external_id,
+        "member_id": c.member_id,
+        "plan": c.plan,
+        "payer": c.payer,
+    }
+
+@router.get("/patients")
+def list_patients(
+    payer: Optional[str] = Query(None, max_length=100),
+    plan: Optional[str] = Query(None, max_length=100),
+    last_name: Optional[str] = Query(None, min_length=1, max_length=100, description="Case-insensitive prefix"),
+    include: Optional[str] = Query(None, pattern="^coverages$", description="coverages: embed coverage summaries"),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    limit: int = Query(50, ge=1, le=200),
+    db: Session = Depends(get_db),
+    _: None = Depends(require_role("clinician")),
+):
+    rows, next_cursor = patients.list_patients(
+        db, payer=payer, plan=plan, last_name_prefix=last_name, cursor=cursor, limit=limit
+    )
+    items = [_row_to_out(p) for p in rows]
+    if include == "coverages":
+        grouped = patients.coverages_by_patient(db, [p.id for p in rows])
+        for item, p in zip(items, rows):
+            item["coverages"] = [_coverage_summary(c) for c in grouped[p.id]]
+    audit.record_many("read", "patient", ((p.id, p.id) for p in rows))
+    return {"items": items, "next_cursor": next_cursor}
+
 @router.post("/patients", status_code=201)
 def create_patient(
     payload: PatientCreateIn,
     db: Session = Depends(get_db),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
 ):
-    # enforce uniqueness on external_id (schema already has unique index)
-    existing = db.query(Patient).filter(Patient.external_id == payload.external_id).first()
-    if existing:
-        raise HTTPException(status_code=409, detail="external_id already exists")
-
-    p = Patient(
-        external_id=payload.external_id,
-        first_name=payload.first_name,
-        last_name=payload.last_name,
-        birth_date=payload.birth_date,
+    def handler():
+        # One statement: the unique index on external_id decides conflicts,
+        # so concurrent creates can't both pass a pre-check
+        stmt = (
+            dialect_insert(db, Patient)
+            .values(
+                external_id=payload.external_id,
+                first_name=payload.first_name,
+                last_name=payload.last_name,
+                birth_date=payload.birth_date,
+            )
+            .on_conflict_do_nothing(index_elements=["external_id"])
+            .returning(Patient)
+        )
+        p = db.scalars(stmt).first()
+        if p is None:
+            db.rollback()
+            raise HTTPException(status_code=409, detail="external_id already exists")
+        commit_keep_loaded(db)
+        audit.record("create", "patient", p.id, patient_id=p.id)
+        return _row_to_out(p)
+
+    return run_idempotent(
+        db,
+        key=idempotency_key,
+        scope="patients.create",
+        fingerprint=fingerprint_of(payload.model_dump()),
+        status_code=201,
+        handler=handler,
     )
-    db.add(p)
-    db.commit()
-    db.refresh(p)
-    return _row_to_out(p)
 
 @router.get("/patients/{ident}")
 def get_patient(ident: str, db: Session = Depends(get_db)):
-    # accept UUID or external_id
-    try:
-        key = uuid.UUID(str(ident))
-        row = db.get(Patient, key)
-    except Exception:
-        row = db.query(Patient).filter(Patient.external_id == ident).first()
-
+    row = records.get_patient(db, ident)
     if not row:
         raise HTTPException(status_code=404, detail="Patient not found")
 
+    audit.record("read", "patient", row.id, patient_id=row.id)
     return _row_to_out(row)
+
+@router.get("/patients/{ident}/coverages")
+def list_patient_coverages(ident: str, db: Session = Depends(get_db)):
+    row = records.get_patient(db, ident)
+    if not row:
+        raise HTTPException(status_code=404, detail="Patient not found")
+
+    coverages = patients.coverages_by_patient(db, [row.id])[row.id]
+    audit.record_many("read", "coverage", ((c.id, row.id) for c in coverages))
+    return {"items": [_coverage_summary(c) for c in coverages]}
@@ -1,34 +1,41 @@
+from dataclasses import dataclass
 from uuid import UUID
+from datetime import date, datetime
 from typing import Any, Dict, List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session, noload
 from sqlalchemy import select
 
+from app.core.config import settings
 from app.db import get_db
-from app.domain.schemas import PriorAuthCreateIn
-from app.domain.models import PriorAuthRequest, Patient
-from app.services.pa import create_pa
+from app.api.v1.deps import require_role
+from app.domain.enums import PriorAuthStatus
+from app.domain.schemas import PriorAuthCreateIn, PriorAuthStatusUpdateIn, AttachmentLinkIn
+from app.domain.models import PriorAuthRequest, Patient, Coverage, DocumentReference
+from app.services.pa import create_pa, update_pa_status, delete_pa, has_diagnosis
+from app.services import aggregates, audit, providers, records
+from app.services.providers import ProviderInfo
+from app.services.idempotency import run_idempotent, fingerprint_of
+from app.services.files import documents_for, document_types_for, missing_docs, link_document
+from app.services.requirements import check_requirements
+from app.api.v1.routes.attachments import document_to_out
+from app.services.export import build_export_query, iter_export_rows, iter_ndjson, iter_csv
 
 router = APIRouter()
 
 
-def _to_list_from_csv(val: Optional[str]) -> List[str]:
-    if not val:
-        return []
-    return [p.strip() for p in str(val).split(",") if p.strip()]
-
-
 def _serialize_par(
     db: Session,
     par: PriorAuthRequest,
     *,
+    provider: Optional[ProviderInfo] = None,
+    attachments: Optional[List[DocumentReference]] = None,
     requires_auth: Optional[bool] = None,
     required_docs: Optional[List[str]] = None,
 ) -> Dict[str, Any]:
     """Stable, enriched shape for the UI."""
-    from app.services.requirements import check_requirements
-
     if requires_auth is None or required_docs is None:
         req, docs = check_requirements(getattr(par, "code", None))
     else:
@@ -59,11 +66,16 @@ def _serialize_par(
             member_name = " ".join([p for p in [first, last] if p])
         member_dob = getattr(patient, "birth_date", None)
 
-    diagnosis_list = _to_list_from_csv(getattr(par, "diagnosis_codes", None))
+    diagnosis_list = par.diagnosis_codes
+
+    if attachments is None:
+        attachments = documents_for(db, [par.id])[par.id]
 
-    # Get provider information from the database record
-    provider_name = getattr(par, "provider_name", None)
+    # Registered providers resolve through the in-process NPI cache
     provider_npi = getattr(par, "provider_npi", None)
+    if provider is None and provider_npi:
+        provider = providers.lookup(db, provider_npi)
+    provider_name = provider.name if provider is not None else getattr(par, "provider_name", None)
 
     return {
         "id": str(getattr(par, "id")),
@@ -71,6 +83,7 @@ def _serialize_par(
         "disposition": getattr(par, "disposition", None),
         "requiresAuth": bool(req),
         "requiredDocs": docs,
+        "missingDocs": missing_docs(docs, attachments),
         # core ids / codes
         "patient_id": getattr(par, "patient_id", None),
         "coverage_id": getattr(par, "coverage_id", None),
@@ -86,74 +99,319 @@ def _serialize_par(
         "providerName": provider_name,
         # conveniences
         "codes": [getattr(par, "code")] if getattr(par, "code", None) else [],
-        "attachments": [],
+        "attachments": [document_to_out(d) for d in attachments],
     }
 
 
+# -----------------------
+# Compact representation
+# -----------------------
+
+# Each field appears once; related records only when asked for with include=
+_COLUMN_FIELDS = {
+    "status": lambda par: par.status,
+    "disposition": lambda par: par.disposition,
+    "code": lambda par: par.code,
+    "diagnosisCodes": lambda par: par.diagnosis_codes,
+    "patientId": lambda par: str(par.patient_id),
+    "coverageId": lambda par: str(par.coverage_id),
+    "providerNpi": lambda par: par.provider_npi,
+    "createdAt": lambda par: par.created_at,
+    "updatedAt": lambda par: par.updated_at,
+}
+_REQUIREMENT_FIELDS = ("requiresAuth", "requiredDocs", "missingDocs")
+PA_FIELDS = ("id", *_COLUMN_FIELDS, *_REQUIREMENT_FIELDS)
+PA_INCLUDES = ("patient", "coverage", "provider", "attachments")
+
+
+@dataclass(frozen=True)
+class PaView:
+    legacy: bool
+    fields: frozenset[str] = frozenset(PA_FIELDS)
+    include: frozenset[str] = frozenset()
+
+
+def _names(value: Optional[str], allowed: tuple[str, ...], param: str) -> Optional[frozenset[str]]:
+    if value is None:
+        return None
+    names = {n.strip() for n in value.split(",") if n.strip()}
+    unknown = sorted(names - set(allowed))
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"Unknown {param}: {', '.join(unknown)}",
+        )
+    return frozenset(names)
+
+
+def pa_view(
+    fields: Optional[str] = Query(None, description="Comma-separated: " + ", ".join(PA_FIELDS)),
+    include: Optional[str] = Query(None, description="Comma-separated: " + ", ".join(PA_INCLUDES)),
+    profile: Optional[str] = Query(None, pattern="^(compact|legacy)$"),
+) -> PaView:
+    """
+    fields= / include= select a sparse compact response. Without them the
+    profile (or settings.pa_response_profile) picks compact or legacy.
+    """
+    selected = _names(fields, PA_FIELDS, "fields")
+    included = _names(include, PA_INCLUDES, "include")
+    if selected is None and included is None:
+        if (profile or settings.pa_response_profile) == "legacy":
+            return PaView(legacy=True)
+    elif profile == "legacy":
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="fields and include apply to the compact profile only",
+        )
+    return PaView(
+        legacy=False,
+        fields=selected if selected is not None else frozenset(PA_FIELDS),
+        include=included or frozenset(),
+    )
+
+
+def _load_options(view: PaView) -> list:
+    # Diagnoses are selectin-loaded by default; skip that query when unused
+    if view.legacy or "diagnosisCodes" in view.fields:
+        return []
+    return [noload(PriorAuthRequest.diagnoses)]
+
+
+def _load_related(db: Session, rows: List[PriorAuthRequest], view: PaView) -> Dict[str, dict]:
+    """
+    One query per requested relation for the whole page.
+    """
+    related: Dict[str, dict] = {}
+    pa_ids = [r.id for r in rows]
+    if "patient" in view.include:
+        ids = {r.patient_id for r in rows}
+        related["patient"] = {p.id: p for p in db.scalars(select(Patient).where(Patient.id.in_(ids)))}
+    if "coverage" in view.include:
+        ids = {r.coverage_id for r in rows}
+        related["coverage"] = {c.id: c for c in db.scalars(select(Coverage).where(Coverage.id.in_(ids)))}
+    if "provider" in view.include:
+        related["provider"] = providers.lookup_many(db, [r.provider_npi for r in rows])
+    if "attachments" in view.include:
+        related["attachments"] = documents_for(db, pa_ids)
+    elif "missingDocs" in view.fields:
+        related["doc_types"] = document_types_for(db, pa_ids)
+    return related
+
+
+def _serialize_compact(par: PriorAuthRequest, view: PaView, related: Dict[str, dict]) -> Dict[str, Any]:
+    out: Dict[str, Any] = {"id": str(par.id)}
+    for name, get in _COLUMN_FIELDS.items():
+        if name in view.fields:
+            out[name] = get(par)
+
+    if view.fields.intersection(_REQUIREMENT_FIELDS):
+        req, docs = check_requirements(par.code)
+        if "requiresAuth" in view.fields:
+            out["requiresAuth"] = bool(req)
+        if "requiredDocs" in view.fields:
+            out["requiredDocs"] = docs
+        if "missingDocs" in view.fields:
+            have = related["attachments"][par.id] if "attachments" in related else related["doc_types"][par.id]
+            out["missingDocs"] = missing_docs(docs, have)
+
+    if "patient" in related:
+        p = related["patient"].get(par.patient_id)
+        out["patient"] = p and {
+            "id": str(p.id),
+            "externalId": p.external_id,
+            "name": f"{p.first_name} {p.last_name}".strip(),
+            "dob": p.birth_date,
+        }
+    if "coverage" in related:
+        c = related["coverage"].get(par.coverage_id)
+        out["coverage"] = c and {
+            "id": str(c.id),
+            "externalId": c.external_id,
+            "memberId": c.member_id,
+            "plan": c.plan,
+            "payer": c.payer,
+        }
+    if "provider" in related:
+        known = related["provider"].get(par.provider_npi)
+        name = known.name if known is not None else par.provider_name
+        out["provider"] = {"npi": par.provider_npi, "name": name} if (par.provider_npi or name) else None
+    if "attachments" in related:
+        out["attachments"] = [document_to_out(d) for d in related["attachments"][par.id]]
+    return out
+
+
+def _render(db: Session, rows: List[PriorAuthRequest], view: PaView) -> List[Dict[str, Any]]:
+    audit.record_many("read", "prior_auth", ((r.id, r.patient_id) for r in rows))
+    if view.legacy:
+        known = providers.lookup_many(db, [r.provider_npi for r in rows])
+        docs_by_pa = documents_for(db, [r.id for r in rows])
+        return [_serialize_par(db, r, provider=known.get(r.provider_npi), attachments=docs_by_pa[r.id]) for r in rows]
+    related = _load_related(db, rows, view)
+    return [_serialize_compact(r, view, related) for r in rows]
+
+
 @router.post("/requests", status_code=201)
-def submit_prior_auth(payload: PriorAuthCreateIn, db: Session = Depends(get_db)):
-    par = create_pa(
+def submit_prior_auth(
+    payload: PriorAuthCreateIn,
+    db: Session = Depends(get_db),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
+):
+    def handler():
+        par = create_pa(
+            db,
+            patient_id=payload.patient_id,
+            coverage_id=payload.coverage_id,
+            code=payload.code,
+            diagnosis_codes=payload.diagnosis_codes,
+            provider_name=payload.provider_name,
+            provider_npi=payload.provider_npi,
+        )
+        requires = getattr(par, "_requires", None)
+        required_docs = getattr(par, "_required_docs", None)
+        return _serialize_par(db, par, attachments=[], requires_auth=requires, required_docs=required_docs)
+
+    return run_idempotent(
         db,
-        patient_id=payload.patient_id,
-        coverage_id=payload.coverage_id,
-        code=payload.code,
-        diagnosis_codes=payload.diagnosis_codes,
-        provider_name=payload.provider_name,
-        provider_npi=payload.provider_npi,
+        key=idempotency_key,
+        scope="prior-auth.create",
+        fingerprint=fingerprint_of(payload.model_dump()),
+        status_code=201,
+        handler=handler,
     )
-    requires = getattr(par, "_requires", None)
-    required_docs = getattr(par, "_required_docs", None)
-    return _serialize_par(db, par, requires_auth=requires, required_docs=required_docs)
 
 
-@router.get("/requests/{pa_id}")
-def get_prior_auth(pa_id: str, db: Session = Depends(get_db)):
+def _get_par_or_404(db: Session, pa_id: str, options: Optional[list] = None) -> PriorAuthRequest:
     try:
         key = UUID(pa_id)
     except ValueError:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not found")
 
-    stmt = select(PriorAuthRequest).where(
-        (PriorAuthRequest.id == key) | (PriorAuthRequest.id == str(key))
-    )
-    par = db.execute(stmt).scalar_one_or_none()
+    par = db.get(PriorAuthRequest, key, options=options)
+    if not par:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not found")
+    return par
+
+
+@router.get("/requests/{pa_id}")
+def get_prior_auth(pa_id: str, view: PaView = Depends(pa_view), db: Session = Depends(get_db)):
+    try:
+        par = records.get_prior_auth(db, UUID(pa_id))
+    except ValueError:
+        par = None
     if not par:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not found")
+    return _render(db, [par], view)[0]
 
+
+@router.post("/requests/{pa_id}/attachments")
+def attach_document(pa_id: str, payload: AttachmentLinkIn, db: Session = Depends(get_db)):
+    par = _get_par_or_404(db, pa_id)
+    link_document(db, pa_request_id=par.id, document_id=payload.document_id, doc_type=payload.doc_type)
+    return _serialize_par(db, par)
+
+
+@router.patch("/requests/{pa_id}/status")
+def set_prior_auth_status(
+    pa_id: str,
+    payload: PriorAuthStatusUpdateIn,
+    db: Session = Depends(get_db),
+    _: None = Depends(require_role("admin")),
+):
+    par = _get_par_or_404(db, pa_id)
+    par = update_pa_status(db, par, new_status=payload.status, disposition=payload.disposition)
     return _serialize_par(db, par)
 
 
 @router.get("/requests")
 def list_prior_auths(
     status: Optional[str] = None,
+    code: Optional[str] = None,
+    diagnosis: Optional[str] = Query(None, description="ICD-10 code"),
     limit: int = 50,
     offset: int = 0,
+    view: PaView = Depends(pa_view),
     db: Session = Depends(get_db),
 ):
-    q = db.query(PriorAuthRequest)
+    q = db.query(PriorAuthRequest).options(*_load_options(view))
     if status:
         q = q.filter(PriorAuthRequest.status == status)
+    if code:
+        q = q.filter(PriorAuthRequest.code == code)
+    if diagnosis:
+        q = q.filter(has_diagnosis(diagnosis))
     total = q.count()
-    rows = q.order_by(PriorAuthRequest.id.desc()).offset(offset).limit(limit).all()
-    items = [_serialize_par(db, r) for r in rows]
-    return {"items": items, "total": total}
+    rows = q.order_by(PriorAuthRequest.created_at.desc(), PriorAuthRequest.id.desc()).offset(offset).limit(limit).all()
+    return {"items": _render(db, rows, view), "total": total}
 
 
-@router.delete("/requests/{pa_id}")
-def delete_prior_auth(pa_id: str, db: Session = Depends(get_db)):
-    try:
-        key = UUID(pa_id)
-    except ValueError:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not found")
+@router.get("/export")
+def export_prior_auths(
+    fmt: str = Query("ndjson", alias="format", pattern="^(ndjson|csv)$"),
+    status: Optional[List[PriorAuthStatus]] = Query(None),
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    payer: Optional[str] = None,
+    code: Optional[str] = None,
+    diagnosis: Optional[str] = Query(None, description="ICD-10 code"),
+    db: Session = Depends(get_db),
+):
+    stmt = build_export_query(
+        status=status, since=since, until=until, payer=payer, code=code, diagnosis=diagnosis
+    )
 
-    stmt = select(PriorAuthRequest).where(
-        (PriorAuthRequest.id == key) | (PriorAuthRequest.id == str(key))
+    def body():
+        # The generator outlives the endpoint, so it owns closing the session
+        # rather than relying on when the dependency teardown runs.
+        try:
+            rows = iter_export_rows(db, stmt)
+            yield from (iter_csv(rows) if fmt == "csv" else iter_ndjson(rows))
+        finally:
+            db.close()
+
+    media_type = "text/csv" if fmt == "csv" else "application/x-ndjson"
+    filename = f"prior-auth-export.{fmt}"
+    return StreamingResponse(
+        body(),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
     )
-    par = db.execute(stmt).scalar_one_or_none()
-    if not par:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not found")
 
-    db.delete(par)
-    db.commit()
-    
+
+@router.get("/aggregates")
+def get_prior_auth_aggregates(
+    group_by: str = Query("status", description="Comma-separated: day, status, payer, code"),
+    since: Optional[date] = None,
+    until: Optional[date] = None,
+    status_filter: Optional[List[PriorAuthStatus]] = Query(None, alias="status"),
+    payer: Optional[str] = None,
+    code: Optional[str] = None,
+    db: Session = Depends(get_db),
+):
+    dims = [g.strip() for g in group_by.split(",") if g.strip()]
+    unknown = [g for g in dims if g not in aggregates.GROUP_BY_FIELDS]
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"Unknown group_by field(s): {', '.join(unknown)}",
+        )
+    buckets = aggregates.query_aggregates(
+        db, group_by=dims, since=since, until=until, status=status_filter, payer=payer, code=code
+    )
+    return {"groupBy": dims, "buckets": buckets}
+
+
+@router.post("/aggregates/rebuild")
+def rebuild_prior_auth_aggregates(
+    db: Session = Depends(get_db),
+    _: None = Depends(require_role("admin")),
+):
+    count = aggregates.rebuild(db)
+    return {"buckets": count}
+
+
+@router.delete("/requests/{pa_id}")
+def delete_prior_auth(pa_id: str, db: Session = Depends(get_db)):
+    par = _get_par_or_404(db, pa_id)
+    delete_pa(db, par)
+
     return {"message": "Prior authorization request deleted successfully"}
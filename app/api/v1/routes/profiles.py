@@ -0,0 +1,24 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import PlainTextResponse, Response
+
+from app.api.v1.deps import require_role
+from app.core.profiling import load_profile
+
+router = APIRouter()
+
+@router.get("/{profile_id}")
+def get_profile(
+    profile_id: str,
+    fmt: str = Query("json", alias="format", pattern="^(json|folded)$"),
+    _: None = Depends(require_role("admin")),
+):
+    """
+    A stored request profile: summary with SQL timings (json), or collapsed
+    stacks for flamegraph.pl / speedscope (folded).
+    """
+    body = load_profile(profile_id, fmt)
+    if body is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    if fmt == "folded":
+        return PlainTextResponse(body)
+    return Response(content=body, media_type="application/json")
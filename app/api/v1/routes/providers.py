@@ -0,0 +1,41 @@
+from fastapi import APIRouter, Depends, File, HTTPException, Query, UploadFile
+from sqlalchemy.orm import Session
+
+from app.db import get_db
+from app.api.v1.deps import require_role
+from app.domain.models import Provider
+from app.services import providers
+
+router = APIRouter()
+
+def _provider_to_out(p: Provider):
+    return {
+        "npi": p.npi,
+        "name": p.name,
+        "entity_type": p.entity_type,
+        "taxonomy_code": p.taxonomy_code,
+        "state": p.state,
+    }
+
+@router.get("/search")
+def search_providers(
+    prefix: str = Query(..., min_length=2, max_length=64, description="NPI digits or last/organization name"),
+    limit: int = Query(20, ge=1, le=100),
+    db: Session = Depends(get_db),
+):
+    return {"items": [_provider_to_out(p) for p in providers.search(db, prefix, limit=limit)]}
+
+@router.post("/import")
+def import_providers(
+    file: UploadFile = File(..., description="NPPES npidata CSV"),
+    db: Session = Depends(get_db),
+    _: None = Depends(require_role("admin")),
+):
+    return providers.load_nppes(db, file.file)
+
+@router.get("/{npi}")
+def get_provider(npi: str, db: Session = Depends(get_db)):
+    p = db.get(Provider, npi) if providers.is_valid_npi(npi) else None
+    if not p:
+        raise HTTPException(status_code=404, detail="Provider not found")
+    return _provider_to_out(p)
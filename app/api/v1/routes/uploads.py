@@ -0,0 +1,62 @@
+from fastapi import APIRouter, Depends, Header, HTTPException, Request, status
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.orm import Session
+
+from app.db import get_db
+from app.domain.models import UploadSession
+from app.domain.schemas import UploadSessionCreateIn
+from app.services import uploads
+from app.api.v1.routes.attachments import document_to_out
+
+router = APIRouter()
+
+def _session_to_out(db: Session, s: UploadSession) -> dict:
+    received = [] if s.document_id else uploads.received_indexes(db, s)
+    return {
+        "id": str(s.id),
+        "filename": s.filename,
+        "size_bytes": s.size_bytes,
+        "chunk_size": s.chunk_size,
+        "chunk_count": s.chunk_count,
+        "received": received,
+        "missing": [] if s.document_id else [i for i in range(s.chunk_count) if i not in set(received)],
+        "document_id": str(s.document_id) if s.document_id else None,
+        "expires_at": s.expires_at,
+    }
+
+@router.post("", status_code=201)
+def create_upload(payload: UploadSessionCreateIn, db: Session = Depends(get_db)):
+    s = uploads.create_session(db, **payload.model_dump())
+    return _session_to_out(db, s)
+
+@router.get("/{upload_id}")
+def get_upload(upload_id: str, db: Session = Depends(get_db)):
+    """
+    Which chunks the server already has, so a client can resume after a drop.
+    """
+    return _session_to_out(db, uploads.get_session_or_404(db, upload_id))
+
+@router.put("/{upload_id}/chunks/{index}")
+async def put_upload_chunk(
+    upload_id: str,
+    index: int,
+    request: Request,
+    chunk_sha256: str = Header(..., alias="X-Chunk-SHA256"),
+    db: Session = Depends(get_db),
+):
+    # Raw body (not multipart), read straight off the socket and capped at
+    # the expected chunk size; DB and disk work happens off the event loop.
+    s = await run_in_threadpool(uploads.get_session_or_404, db, upload_id)
+    limit = s.chunk_size
+    data = bytearray()
+    async for part in request.stream():
+        data.extend(part)
+        if len(data) > limit:
+            raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail="Chunk too large")
+    chunk = await run_in_threadpool(uploads.put_chunk, db, s, index, bytes(data), chunk_sha256)
+    return {"index": chunk.index, "size_bytes": chunk.size_bytes, "sha256": chunk.sha256}
+
+@router.post("/{upload_id}/complete", status_code=201)
+def complete_upload(upload_id: str, db: Session = Depends(get_db)):
+    doc = uploads.complete(db, uploads.get_session_or_404(db, upload_id))
+    return document_to_out(doc)
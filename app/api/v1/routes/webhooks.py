@@ -0,0 +1,68 @@
+import uuid
+
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.api.v1.deps import require_role
+from app.db import get_db
+from app.domain.models import WebhookDelivery, WebhookSubscription
+from app.domain.schemas import WebhookCreateIn
+from app.services import webhooks
+
+router = APIRouter()
+
+def _subscription_to_out(s: WebhookSubscription, *, with_secret: bool = False):
+    out = {
+        "id": str(s.id),
+        "url": s.url,
+        "description": s.description,
+        "created_at": s.created_at,
+    }
+    if with_secret:
+        out["secret"] = s.secret
+    return out
+
+def _delivery_to_out(d: WebhookDelivery):
+    return {
+        "id": str(d.id),
+        "event_id": str(d.event_id),
+        "subscription_id": str(d.subscription_id),
+        "event_type": d.event_type,
+        "attempts": d.attempts,
+        "last_error": d.last_error,
+        "created_at": d.created_at,
+    }
+
+@router.post("", status_code=201)
+def create_webhook(
+    payload: WebhookCreateIn,
+    db: Session = Depends(get_db),
+    _: None = Depends(require_role("admin")),
+):
+    """
+    The signing secret is only returned here; store it on the receiver.
+    """
+    sub = webhooks.create_subscription(db, url=str(payload.url), secret=payload.secret, description=payload.description)
+    return _subscription_to_out(sub, with_secret=True)
+
+@router.get("")
+def list_webhooks(db: Session = Depends(get_db), _: None = Depends(require_role("admin"))):
+    rows = db.scalars(select(WebhookSubscription).order_by(WebhookSubscription.created_at))
+    return {"items": [_subscription_to_out(s) for s in rows]}
+
+@router.delete("/{subscription_id}", status_code=204)
+def delete_webhook(subscription_id: uuid.UUID, db: Session = Depends(get_db), _: None = Depends(require_role("admin"))):
+    webhooks.delete_subscription(db, subscription_id)
+
+@router.get("/dead-letters")
+def list_dead_letters(
+    limit: int = Query(100, ge=1, le=1000),
+    db: Session = Depends(get_db),
+    _: None = Depends(require_role("admin")),
+):
+    return {"items": [_delivery_to_out(d) for d in webhooks.dead_letters(db, limit=limit)]}
+
+@router.post("/dead-letters/{delivery_id}/retry")
+def retry_dead_letter(delivery_id: uuid.UUID, db: Session = Depends(get_db), _: None = Depends(require_role("admin"))):
+    return _delivery_to_out(webhooks.requeue(db, delivery_id))
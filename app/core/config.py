@@ -1,3 +1,5 @@
+from typing import Literal, Optional
+
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from pydantic import Field, AliasChoices
 
@@ -6,10 +8,156 @@ class Settings(BaseSettings):
     app_name: str = "PA Copilot API"
     env: str = Field(default="dev", alias="APP_ENV")
     database_url: str = "postgresql://localhost/pa_copilot"
+    # connections opened during startup warm-up
+    db_warm_connections: int = 2
+    # Single-box SQLite profile (DATABASE_URL=sqlite:///...): WAL, one writer
+    # connection that queues writes, read-only connections for everything else
+    sqlite_reader_connections: int = 8
+    sqlite_write_timeout_seconds: float = 30.0   # wait for the writer before failing
+    sqlite_busy_timeout_ms: int = 5000           # other processes (workers) holding the lock
+    sqlite_synchronous: Literal["OFF", "NORMAL", "FULL", "EXTRA"] = "NORMAL"  # NORMAL is safe in WAL; FULL fsyncs every commit
+    sqlite_mmap_size: int = 256 * 1024 * 1024
+    sqlite_cache_size_kib: int = 64 * 1024       # page cache per connection
 
     secret_key: str = "dummy_secret_key_df"
     jwt_alg: str = "HS256"
     access_token_expire_minutes: int = 60
     file_storage_dir: str = "./var/uploads"
 
+    # Resumable (chunked) uploads
+    upload_default_chunk_size: int = 8 * 1024 * 1024
+    upload_min_chunk_size: int = 64 * 1024      # except the last chunk
+    upload_max_chunk_size: int = 64 * 1024 * 1024
+    upload_max_size: int = 5 * 1024 * 1024 * 1024
+    upload_session_ttl_hours: int = 24
+    upload_prune_interval_seconds: float = 600.0
+
+    # Post-upload processing (MIME sniffing, page count, text, thumbnails).
+    # pool: process pool off the request path | inline: synchronous (tests) | off
+    doc_processing_mode: str = "pool"
+    doc_processing_workers: int = 2
+    doc_processing_max_pending: int = 200
+    doc_processing_timeout_seconds: float = 120.0
+    doc_text_max_chars: int = 200_000
+    doc_thumbnail_size: int = 256
+
+    log_level: str = "INFO"
+    log_format: str = "json"            # json | text
+    # Fraction of INFO/DEBUG records kept; per-logger overrides, e.g. {"app.access": 0.1}
+    log_info_sample_rate: float = 1.0
+    log_sample_rates: dict[str, float] = {}
+
+    # CPT/HCPCS/ICD-10 catalog (CSV: system,code,description); empty uses the bundled sample
+    code_catalog_path: str = ""
+    # reject PA submissions whose codes are not in the catalog. Unset: only when
+    # code_catalog_path is set; the bundled sample is far from the full code sets
+    code_validation_enabled: Optional[bool] = None
+
+    # Read-through cache of patient, coverage and PA records: in-process LRU,
+    # plus a shared store when record_cache_url is set (memory:// local
+    # stand-in | redis://...). Local copies may miss other machines' writes
+    # for up to record_cache_local_ttl_seconds.
+    record_cache_enabled: bool = True
+    record_cache_size: int = 10000
+    record_cache_local_ttl_seconds: float = 30.0
+    record_cache_ttl_seconds: float = 300.0
+    record_cache_url: str = ""
+
+    # providers kept in the in-process NPI lookup cache
+    provider_cache_size: int = 10000
+    # rows per upsert when bulk-loading an NPPES file
+    provider_load_batch_size: int = 1000
+
+    # Payer gateway (FHIR Da Vinci PAS). Endpoints by payer name; payers
+    # without one use payer_default_url (e.g. the mock payer in development).
+    payer_submission_enabled: bool = True
+    payer_endpoints: dict[str, str] = {}
+    payer_default_url: str = ""
+    payer_timeout_seconds: float = 10.0
+    payer_connect_timeout_seconds: float = 3.0
+    payer_max_connections: int = 20      # per payer
+    payer_max_concurrency: int = 10      # in-flight requests per payer
+    payer_max_retries: int = 3           # per call, with jittered exponential backoff
+    payer_backoff_base_seconds: float = 0.5
+    payer_backoff_max_seconds: float = 30.0
+    payer_breaker_failure_threshold: int = 5
+    payer_breaker_reset_seconds: float = 30.0
+    # Worker
+    payer_poll_interval_seconds: float = 60.0
+    payer_max_attempts: int = 8          # failed calls before a submission is marked failed
+    payer_worker_batch_size: int = 50
+    payer_worker_idle_seconds: float = 2.0
+    payer_lease_seconds: float = 300.0   # claimed work is hidden from other workers this long
+
+    # Coverage eligibility (GET /v1/coverages/{id}/eligibility).
+    # payer: CoverageEligibilityRequest via the payer gateway | mock: answered locally
+    eligibility_adapter: Literal["payer", "mock"] = "payer"
+    eligibility_cache_ttl_seconds: float = 3600.0    # per coverage and date of service
+    eligibility_cache_size: int = 10000
+    eligibility_max_retries: int = 1                 # the caller is waiting
+
+    # Outbound webhooks (PA status changes), drained by app.workers.webhook_worker
+    webhook_timeout_seconds: float = 10.0
+    webhook_connect_timeout_seconds: float = 3.0
+    webhook_max_connections: int = 100           # shared pool across endpoints
+    webhook_max_concurrency: int = 4             # in-flight requests per endpoint
+    webhook_max_events_per_request: int = 50     # events batched into one POST per endpoint
+    webhook_max_attempts: int = 10               # failed deliveries before an event is dead-lettered
+    webhook_backoff_base_seconds: float = 5.0
+    webhook_backoff_max_seconds: float = 3600.0
+    webhook_worker_batch_size: int = 500
+    webhook_worker_idle_seconds: float = 1.0
+    webhook_lease_seconds: float = 120.0
+
+    # Default PA response shape when a request names no fields/include/profile:
+    # legacy (every field, with the UI's mirrors) | compact
+    pa_response_profile: str = "legacy"
+
+    # PHI access audit log: buffered in memory, written in batches off the request path
+    audit_enabled: bool = True
+    audit_buffer_size: int = 10000
+    audit_batch_size: int = 500
+    audit_flush_interval_seconds: float = 1.0
+    audit_enqueue_timeout_seconds: float = 2.0   # producers wait this long for room before writing themselves
+    audit_shutdown_timeout_seconds: float = 10.0
+    audit_shutdown_retries: int = 3
+
+    # Admin-only per-request profiling (X-Profile header or ?__profile=1)
+    profiling_enabled: bool = True
+    profiling_dir: str = "./var/profiles"
+    profiling_sample_interval_ms: float = 2.0
+
+    # POST /v1/fhir/Bundle limits (the body is parsed incrementally)
+    fhir_bundle_max_bytes: int = 50 * 1024 * 1024
+    fhir_bundle_max_entry_bytes: int = 1024 * 1024
+    fhir_bundle_max_entries: int = 10000
+
+    # rows fetched per round trip when streaming exports
+    export_batch_size: int = 1000
+
+    # Idempotency-Key handling
+    idempotency_ttl_hours: int = 24
+    idempotency_wait_seconds: float = 10.0          # how long a duplicate waits for the first request
+    idempotency_lock_timeout_seconds: float = 120.0  # after this an unfinished claim may be taken over
+    idempotency_prune_interval_seconds: float = 300.0
+
+    # Rate limiting / admission control, by route class (auth, upload, list, default).
+    # Rates are "<requests>/<seconds>" per user (or client IP when anonymous).
+    rate_limit_enabled: bool = True
+    rate_limits: dict[str, str] = {
+        "auth": "10/60",
+        "upload": "30/60",
+        "list": "120/60",
+        "default": "600/60",
+    }
+    # Max in-flight requests per route class on this machine; 0 disables the cap
+    concurrency_limits: dict[str, int] = {"auth": 4, "upload": 8, "list": 16}
+    admission_queue_timeout_seconds: float = 0.25
+    # memory:// keeps buckets per process; redis://... shares them across machines
+    rate_limit_store_url: str = "memory://"
+    # Anonymous callers are keyed on Fly-Client-IP (set by Fly's proxy), else on
+    # the X-Forwarded-For hop appended by the last of this many trusted proxies
+    # in front of the app, else on the socket peer. Earlier hops are client-controlled.
+    rate_limit_proxy_hops: int = 0
+
 settings = Settings()
\ No newline at end of file
@@ -0,0 +1,265 @@
+"""
+Opt-in profiling of a single request, for admins chasing a slow endpoint in
+production:
+
+    curl -H "Authorization: Bearer $ADMIN_TOKEN" -H "X-Profile: 1" .../v1/prior-auth/requests
+    # or ?__profile=1
+
+The request runs under a sampling profiler (stacks of the app's busy
+threads every profiling_sample_interval_ms) with per-statement SQL timings.
+The profile is written to profiling_dir and its id returned in X-Profile-Id;
+GET /v1/profiles/{id}?format=folded gives collapsed stacks for
+flamegraph.pl or speedscope.
+
+Without the flag nothing is installed: no sampler thread, no SQL event
+listeners. The only cost is the flag check on the request headers.
+"""
+import json
+import logging
+import os
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Optional
+
+from fastapi import HTTPException
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.core.config import settings
+from app.core.logging import request_id_var
+
+log = logging.getLogger(__name__)
+
+_FLAG_HEADER = b"x-profile"
+_FLAG_QUERY = b"__profile="
+_CWD = os.getcwd().replace("\\", "/") + "/"
+# Leaf frames that mean a thread is parked, not working for anyone
+_IDLE = {
+    ("threading.py", "wait"),
+    ("selectors.py", "select"),
+    ("queue.py", "get"),
+    ("thread.py", "_worker"),
+    ("base_events.py", "_run_once"),
+}
+
+
+# -----------------------
+# Sampler
+# -----------------------
+
+def _label(frame) -> str:
+    code = frame.f_code
+    path = code.co_filename.replace("\\", "/")
+    if "/site-packages/" in path:
+        path = path.split("/site-packages/", 1)[1]
+    elif path.startswith(_CWD):
+        path = path[len(_CWD):]
+    return f"{code.co_qualname} ({path}:{code.co_firstlineno})"
+
+
+class StackSampler:
+    """
+    Samples every other thread's stack at a fixed interval and counts
+    identical stacks, which is exactly the folded format flame graphs use.
+    """
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        me = threading.get_ident()
+        names = {t.ident: t.name for t in threading.enumerate()}
+        while not self._stop.wait(self.interval):
+            self.samples += 1
+            for tid, frame in sys._current_frames().items():
+                if tid == me:
+                    continue
+                leaf = frame.f_code
+                if (leaf.co_filename.rsplit("/", 1)[-1], leaf.co_name) in _IDLE:
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(_label(frame))
+                    frame = frame.f_back
+                stack.append(names.get(tid) or str(tid))
+                self.stacks[";".join(reversed(stack))] += 1
+
+    def folded(self) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+
+# -----------------------
+# SQL timings
+# -----------------------
+
+_sql_sink: ContextVar[Optional[list]] = ContextVar("profile_sql", default=None)
+_listeners_lock = threading.Lock()
+_listeners_active = 0
+
+
+def _before(conn, cursor, statement, parameters, context, executemany):
+    if _sql_sink.get() is not None:
+        conn.info.setdefault("_profile_started", []).append(time.perf_counter())
+
+
+def _after(conn, cursor, statement, parameters, context, executemany):
+    sink = _sql_sink.get()
+    started = conn.info.get("_profile_started")
+    if sink is None or not started:
+        return
+    sink.append({
+        "ms": round((time.perf_counter() - started.pop()) * 1000, 3),
+        "rows": cursor.rowcount,
+        "executemany": executemany,
+        "statement": " ".join(statement.split())[:1000],
+    })
+
+
+def _attach_sql_listeners() -> None:
+    # Installed (on every engine) only while a profiled request is running
+    global _listeners_active
+    with _listeners_lock:
+        if _listeners_active == 0:
+            event.listen(Engine, "before_cursor_execute", _before)
+            event.listen(Engine, "after_cursor_execute", _after)
+        _listeners_active += 1
+
+
+def _detach_sql_listeners() -> None:
+    global _listeners_active
+    with _listeners_lock:
+        _listeners_active -= 1
+        if _listeners_active == 0:
+            event.remove(Engine, "before_cursor_execute", _before)
+            event.remove(Engine, "after_cursor_execute", _after)
+
+
+# -----------------------
+# Storage
+# -----------------------
+
+def _profile_path(profile_id: str, suffix: str) -> Path:
+    return Path(settings.profiling_dir) / f"{profile_id}.{suffix}"
+
+
+def save_profile(profile_id: str, summary: dict, folded: str) -> None:
+    root = Path(settings.profiling_dir)
+    root.mkdir(parents=True, exist_ok=True)
+    _profile_path(profile_id, "folded").write_text(folded)
+    _profile_path(profile_id, "json").write_text(json.dumps(summary, default=str))
+
+
+def load_profile(profile_id: str, fmt: str = "json") -> Optional[str]:
+    try:
+        uuid.UUID(profile_id)
+    except ValueError:
+        return None
+    path = _profile_path(profile_id, "folded" if fmt == "folded" else "json")
+    return path.read_text() if path.exists() else None
+
+
+# -----------------------
+# Middleware
+# -----------------------
+
+def _requested(scope) -> bool:
+    if _FLAG_QUERY in scope.get("query_string", b""):
+        return True
+    return any(k == _FLAG_HEADER for k, _ in scope.get("headers", []))
+
+
+def _is_admin(scope) -> bool:
+    # Same checks as the route dependencies: valid bearer token carrying admin
+    from app.api.v1.deps import get_current_user_roles, require_role
+
+    for k, v in scope.get("headers", []):
+        if k == b"authorization":
+            scheme, _, token = v.decode("latin-1").partition(" ")
+            if scheme.lower() != "bearer" or not token:
+                return False
+            try:
+                require_role("admin")(roles=get_current_user_roles(token))
+            except HTTPException:
+                return False
+            return True
+    return False
+
+
+async def _forbidden(send) -> None:
+    body = b'{"detail":"Profiling requires the admin role"}'
+    await send({
+        "type": "http.response.start",
+        "status": 403,
+        "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())],
+    })
+    await send({"type": "http.response.body", "body": body})
+
+
+class ProfilingMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not settings.profiling_enabled or not _requested(scope):
+            return await self.app(scope, receive, send)
+        if not _is_admin(scope):
+            return await _forbidden(send)
+
+        profile_id = str(uuid.uuid4())
+        sql: list[dict] = []
+        status_code = 500
+
+        async def send_with_id(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                message = {**message, "headers": [*message.get("headers", []), (b"x-profile-id", profile_id.encode())]}
+            await send(message)
+
+        _attach_sql_listeners()
+        sink_token = _sql_sink.set(sql)
+        sampler = StackSampler(settings.profiling_sample_interval_ms / 1000)
+        started = time.perf_counter()
+        sampler.start()
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            wall_ms = (time.perf_counter() - started) * 1000
+            sampler.stop()
+            _sql_sink.reset(sink_token)
+            _detach_sql_listeners()
+            summary = {
+                "id": profile_id,
+                "request_id": request_id_var.get(),
+                "method": scope["method"],
+                "path": scope["path"],
+                "query": scope.get("query_string", b"").decode("latin-1"),
+                "status": status_code,
+                "wall_ms": round(wall_ms, 3),
+                "samples": sampler.samples,
+                "sample_interval_ms": settings.profiling_sample_interval_ms,
+                "sql_count": len(sql),
+                "sql_ms": round(sum(q["ms"] for q in sql), 3),
+                "sql": sql,
+            }
+            try:
+                save_profile(profile_id, summary, sampler.folded())
+            except OSError:
+                log.exception("could not store profile %s", profile_id)
+            log.info("profiled %s %s in %.1f ms", scope["method"], scope["path"], wall_ms, extra={"profile_id": profile_id})
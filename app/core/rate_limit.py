@@ -0,0 +1,230 @@
+import asyncio
+import json
+import math
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Optional, Protocol
+
+from app.core.config import settings
+from app.core.security import decode_token
+
+# -----------------------
+# Route classes
+# -----------------------
+
+_LIST_PATHS = {
+    "/v1/prior-auth/requests",
+    "/v1/prior-auth/export",
+    "/v1/prior-auth/aggregates",
+}
+
+def classify(method: str, path: str) -> Optional[str]:
+    """
+    Maps a request onto a cost class. None means the route is never limited.
+    """
+    if path == "/health":
+        return None
+    if path.startswith("/v1/auth/token") or path.startswith("/v1/auth/register"):
+        return "auth"
+    if method in ("POST", "PUT") and (
+        path.startswith("/v1/attachments") or path in ("/v1/providers/import", "/v1/fhir/Bundle")
+    ):
+        return "upload"
+    if method == "GET" and path.rstrip("/") in _LIST_PATHS:
+        return "list"
+    return "default"
+
+@lru_cache(maxsize=64)
+def parse_rate(spec: str) -> tuple[float, int]:
+    """
+    "10/60" -> (refill tokens per second, bucket capacity).
+    """
+    count, _, seconds = spec.partition("/")
+    capacity = int(count)
+    period = float(seconds or 1)
+    if capacity <= 0 or period <= 0:
+        raise ValueError(f"Invalid rate limit: {spec!r}")
+    return capacity / period, capacity
+
+# -----------------------
+# Stores
+# -----------------------
+
+class RateLimitStore(Protocol):
+    async def take(self, key: str, rate: float, capacity: int) -> float:
+        """
+        Takes one token from the bucket. Returns 0 when allowed, otherwise
+        the seconds until a token is available.
+        """
+        ...
+
+class InMemoryStore:
+    """
+    Token buckets for a single process. Least recently used buckets are
+    evicted beyond max_keys.
+    """
+
+    def __init__(self, max_keys: int = 100_000):
+        self._buckets: OrderedDict[str, tuple[float, float]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._max_keys = max_keys
+
+    async def take(self, key: str, rate: float, capacity: int) -> float:
+        now = time.monotonic()
+        with self._lock:
+            tokens, last = self._buckets.pop(key, (float(capacity), now))
+            tokens = min(float(capacity), tokens + (now - last) * rate)
+            if tokens >= 1:
+                tokens -= 1
+                wait = 0.0
+            else:
+                wait = (1 - tokens) / rate
+            self._buckets[key] = (tokens, now)
+            while len(self._buckets) > self._max_keys:
+                self._buckets.popitem(last=False)
+        return wait
+
+_REDIS_TOKEN_BUCKET = """
+local rate = tonumber(ARGV[1])
+local capacity = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or capacity
+local ts = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + (now - ts) * rate)
+local wait = 0
+if tokens >= 1 then
+  tokens = tokens - 1
+else
+  wait = (1 - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate) + 1)
+return tostring(wait)
+"""
+
+class RedisStore:
+    """
+    Shared token buckets so limits hold across machines. The bucket update
+    runs as a single Lua script, so it is atomic on the server.
+    """
+
+    def __init__(self, url: str, prefix: str = "ratelimit:"):
+        try:
+            from redis import asyncio as aioredis
+        except ImportError as e:  # optional dependency
+            raise RuntimeError("rate_limit_store_url uses redis:// but the 'redis' package is not installed") from e
+        self._redis = aioredis.from_url(url)
+        self._script = self._redis.register_script(_REDIS_TOKEN_BUCKET)
+        self._prefix = prefix
+
+    async def take(self, key: str, rate: float, capacity: int) -> float:
+        wait = await self._script(keys=[self._prefix + key], args=[rate, capacity, time.time()])
+        return float(wait)
+
+def build_store(url: str) -> RateLimitStore:
+    if url.startswith("memory://"):
+        return InMemoryStore()
+    if url.startswith(("redis://", "rediss://")):
+        return RedisStore(url)
+    raise ValueError(f"Unsupported rate limit store: {url}")
+
+# -----------------------
+# Middleware
+# -----------------------
+
+def _client_identity(scope) -> str:
+    headers = {k.decode("latin-1"): v.decode("latin-1") for k, v in scope.get("headers", [])}
+    auth = headers.get("authorization", "")
+    if auth.lower().startswith("bearer "):
+        try:
+            sub = decode_token(auth[7:]).get("sub")
+            if sub:
+                return f"user:{sub}"
+        except Exception:
+            pass
+    ip = headers.get("fly-client-ip", "").strip()
+    hops = settings.rate_limit_proxy_hops
+    if not ip and hops > 0:
+        forwarded = [h.strip() for h in headers.get("x-forwarded-for", "").split(",") if h.strip()]
+        # Only the right-most `hops` entries were written by our proxies
+        if len(forwarded) >= hops:
+            ip = forwarded[-hops]
+    if not ip and scope.get("client"):
+        ip = scope["client"][0]
+    return f"ip:{ip or 'unknown'}"
+
+async def _reject(send, status: int, detail: str, retry_after: float) -> None:
+    body = json.dumps({"detail": detail}).encode()
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode()),
+            (b"retry-after", str(max(1, math.ceil(retry_after))).encode()),
+        ],
+    })
+    await send({"type": "http.response.body", "body": body})
+
+class RateLimitMiddleware:
+    """
+    Token-bucket limits per identity and route class, then a per-class cap on
+    in-flight requests. Requests over the cap queue briefly and are shed with
+    503 if no slot frees up; requests over their rate get 429. Both carry
+    Retry-After.
+    """
+
+    def __init__(self, app, store: Optional[RateLimitStore] = None):
+        self.app = app
+        self._store = store
+        # asyncio primitives belong to one event loop; keep a set per loop
+        self._semaphores: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, dict[str, asyncio.Semaphore]]" = (
+            weakref.WeakKeyDictionary()
+        )
+
+    @property
+    def store(self) -> RateLimitStore:
+        if self._store is None:
+            self._store = build_store(settings.rate_limit_store_url)
+        return self._store
+
+    def _semaphore(self, route_class: str) -> Optional[asyncio.Semaphore]:
+        limit = settings.concurrency_limits.get(route_class, 0)
+        if limit <= 0:
+            return None
+        per_loop = self._semaphores.setdefault(asyncio.get_running_loop(), {})
+        sem = per_loop.get(route_class)
+        if sem is None:
+            sem = per_loop[route_class] = asyncio.Semaphore(limit)
+        return sem
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not settings.rate_limit_enabled:
+            return await self.app(scope, receive, send)
+
+        route_class = classify(scope["method"], scope["path"])
+        if route_class is None:
+            return await self.app(scope, receive, send)
+
+        spec = settings.rate_limits.get(route_class) or settings.rate_limits.get("default")
+        if spec:
+            rate, capacity = parse_rate(spec)
+            wait = await self.store.take(f"{route_class}:{_client_identity(scope)}", rate, capacity)
+            if wait > 0:
+                return await _reject(send, 429, "Rate limit exceeded", wait)
+
+        sem = self._semaphore(route_class)
+        if sem is None:
+            return await self.app(scope, receive, send)
+        try:
+            await asyncio.wait_for(sem.acquire(), timeout=settings.admission_queue_timeout_seconds)
+        except asyncio.TimeoutError:
+            return await _reject(send, 503, "Server busy, retry shortly", 1)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            sem.release()
@@ -0,0 +1,74 @@
+import logging
+import time
+from typing import Callable
+
+from fastapi import FastAPI
+from sqlalchemy.orm import configure_mappers
+
+from app.core.config import settings
+
+log = logging.getLogger(__name__)
+
+
+def _db_pool() -> str:
+    from app.db import warm_pool
+
+    return f"{warm_pool(settings.db_warm_connections)} connections"
+
+
+def _mappers() -> str:
+    from app.domain import models  # noqa: F401  (registers every mapper)
+
+    configure_mappers()
+    return "configured"
+
+
+def _requirement_rules() -> str:
+    from app.services.requirements import compiled_rules
+
+    return f"{len(compiled_rules())} rules"
+
+
+def _code_catalog() -> str:
+    from app.services.codes import get_catalog, validation_enabled
+
+    if validation_enabled() and not settings.code_catalog_path:
+        log.warning("code validation is on against the bundled sample catalog; real codes will be rejected")
+    return f"{len(get_catalog())} codes"
+
+
+def _storage() -> str:
+    from app.adapters import storage_local
+
+    storage_local.check_writable()
+    return str(storage_local.BASE)
+
+
+def warm_up(app: FastAPI) -> dict[str, dict]:
+    """
+    Runs each warm-up step, timing it. A failing step is logged and skipped:
+    a cold dependency should slow the first request, not stop the machine
+    from starting.
+    """
+    steps: list[tuple[str, Callable[[], str]]] = [
+        ("db_pool", _db_pool),
+        ("mappers", _mappers),
+        ("requirement_rules", _requirement_rules),
+        ("code_catalog", _code_catalog),
+        # Builds every route's schema/serializer once instead of on first /docs hit
+        ("openapi", lambda: f"{len(app.openapi()['paths'])} paths"),
+        ("storage", _storage),
+    ]
+    report: dict[str, dict] = {}
+    started = time.perf_counter()
+    for name, step in steps:
+        t0 = time.perf_counter()
+        try:
+            detail, ok = step(), True
+        except Exception as e:
+            first_line = (str(e).splitlines() or [""])[0]
+            detail, ok = f"{type(e).__name__}: {first_line}", False
+            log.warning("warm-up step %s failed: %s", name, detail)
+        report[name] = {"ok": ok, "ms": round((time.perf_counter() - t0) * 1000, 2), "detail": detail}
+    log.info("warm-up finished in %.1f ms", (time.perf_counter() - started) * 1000)
+    return report
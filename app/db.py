@@ -1,14 +1,152 @@
-from sqlalchemy import create_engine, text
-from sqlalchemy.orm import sessionmaker, DeclarativeBase
+import threading
+import weakref
+
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import sessionmaker, DeclarativeBase, Session
+from sqlalchemy.pool import QueuePool
+from sqlalchemy.sql.elements import TextClause
 from app.core.config import settings
 
 class Base(DeclarativeBase):
     pass
 
-engine = create_engine(settings.database_url, pool_pre_ping=True)
-SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False)
+# -----------------------
+# SQLite profile
+# -----------------------
+
+# Writer engine -> its read-only companion, for sessions to route reads to
+_readers: "weakref.WeakKeyDictionary[Engine, Engine]" = weakref.WeakKeyDictionary()
+
+def _sqlite_pragmas(*, read_only: bool) -> list[str]:
+    pragmas = [
+        f"PRAGMA busy_timeout = {settings.sqlite_busy_timeout_ms}",
+        f"PRAGMA synchronous = {settings.sqlite_synchronous}",
+        f"PRAGMA mmap_size = {settings.sqlite_mmap_size}",
+        f"PRAGMA cache_size = -{settings.sqlite_cache_size_kib}",
+        "PRAGMA temp_store = MEMORY",
+        "PRAGMA foreign_keys = ON",
+    ]
+    if read_only:
+        pragmas.append("PRAGMA query_only = ON")
+    else:
+        # Persistent per database file; readers inherit it
+        pragmas.insert(0, "PRAGMA journal_mode = WAL")
+    return pragmas
+
+def _sqlite_engine(url: str, *, read_only: bool) -> Engine:
+    if read_only:
+        pool = {"pool_size": settings.sqlite_reader_connections, "max_overflow": 0}
+    else:
+        # One connection: checkouts queue up here (FIFO, pool_timeout) instead
+        # of spinning on SQLITE_BUSY, so writers are serialized in-process
+        pool = {"pool_size": 1, "max_overflow": 0, "pool_timeout": settings.sqlite_write_timeout_seconds}
+    engine = create_engine(url, poolclass=QueuePool, connect_args={"check_same_thread": False}, **pool)
+    pragmas = _sqlite_pragmas(read_only=read_only)
+
+    @event.listens_for(engine, "connect")
+    def _on_connect(dbapi_conn, _record):
+        # Driver-level autocommit: we issue BEGIN ourselves (pysqlite's
+        # implicit one is deferred, and only comes before DML)
+        dbapi_conn.isolation_level = None
+        cursor = dbapi_conn.cursor()
+        for pragma in pragmas:
+            cursor.execute(pragma)
+        cursor.close()
+
+    if not read_only:
+        @event.listens_for(engine, "begin")
+        def _on_begin(conn):
+            # Take the write lock up front: a deferred transaction that
+            # upgrades from read to write fails with "database is locked"
+            # straight away, busy_timeout or not
+            conn.exec_driver_sql("BEGIN IMMEDIATE")
+    # Readers stay in autocommit, so every statement sees the latest commit
+    # (like READ COMMITTED on Postgres) and no read snapshot is held open to
+    # stall WAL checkpoints
+
+    return engine
+
+def sqlite_engine(url: str) -> Engine:
+    """
+    Single-box SQLite profile: a WAL database with one serialized writer
+    connection and a pool of read-only connections. Returns the writer;
+    sessions bound to it send plain reads to the readers, which never wait
+    on the writer.
+    """
+    writer = _sqlite_engine(url, read_only=False)
+    with writer.connect():
+        pass  # switch the file to WAL before any reader opens it
+    _readers[writer] = _sqlite_engine(url, read_only=True)
+    return writer
+
+def reader_for(engine: Engine) -> Engine | None:
+    return _readers.get(engine)
+
+def _writes(clause) -> bool:
+    return (
+        getattr(clause, "is_dml", False)
+        or isinstance(clause, TextClause)
+        or getattr(clause, "_for_update_arg", None) is not None
+    )
+
+class RoutingSession(Session):
+    """
+    Session that reads from the SQLite reader pool until it first writes,
+    then stays on the writer for the rest of the transaction (so it reads its
+    own writes). Behaves like a plain Session on any other engine.
+    """
+
+    _on_writer = False
+
+    def get_bind(self, mapper=None, clause=None, **kw):
+        reader = _readers.get(self.bind) if self.bind is not None else None
+        if reader is None or self._on_writer:
+            return super().get_bind(mapper, clause=clause, **kw)
+        if self._flushing or _writes(clause):
+            self._on_writer = True
+            return super().get_bind(mapper, clause=clause, **kw)
+        return reader
+
+@event.listens_for(RoutingSession, "after_transaction_end")
+def _back_to_readers(session, transaction):
+    if transaction.parent is None:
+        session._on_writer = False
+
+# -----------------------
+# Engine and sessions
+# -----------------------
+
+# The engine is created on first use rather than at import time, so importing
+# the app (CLI tools, migrations, tests) never touches the database driver.
+_engine: Engine | None = None
+_engine_lock = threading.Lock()
+
+SessionLocal = sessionmaker(class_=RoutingSession, autoflush=False, autocommit=False)
+
+def get_engine() -> Engine:
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                url = settings.database_url
+                if url.startswith("sqlite") and ":memory:" not in url and url.rstrip("/") not in ("sqlite:", "sqlite+pysqlite:"):
+                    _engine = sqlite_engine(url)
+                else:
+                    _engine = create_engine(url, pool_pre_ping=True)
+                # Respect a bind configured elsewhere (e.g. the test suite)
+                if SessionLocal.kw.get("bind") is None:
+                    SessionLocal.configure(bind=_engine)
+    return _engine
+
+def __getattr__(name: str):
+    # Backwards compatible `from app.db import engine`
+    if name == "engine":
+        return get_engine()
+    raise AttributeError(name)
 
 def get_db():
+    get_engine()
     db = SessionLocal()
     try:
         yield db
@@ -16,6 +154,49 @@ def get_db():
         db.close()
 
 def ping_db() -> bool:
-    with engine.connect() as conn:
+    with get_engine().connect() as conn:
         conn.execute(text("SELECT 1"))
     return True
+
+def warm_pool(connections: int) -> int:
+    """
+    Opens up to `connections` pooled connections and returns them to the pool,
+    so the first requests don't pay for TCP/TLS/auth setup.
+    """
+    engine = get_engine()
+    held = []
+    try:
+        for _ in range(max(1, connections)):
+            conn = engine.connect()
+            conn.execute(text("SELECT 1"))
+            held.append(conn)
+    finally:
+        for conn in held:
+            conn.close()
+    return len(held)
+
+def dialect_insert(db: Session, model):
+    """
+    INSERT construct for the session's backend, exposing ON CONFLICT support
+    (Postgres in production, SQLite in tests).
+    """
+    name = db.get_bind().dialect.name
+    if name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    elif name == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        raise NotImplementedError(f"Upserts are not supported on {name}")
+    return insert(model)
+
+def commit_keep_loaded(db: Session) -> None:
+    """
+    Commits without expiring loaded objects, so a write path that already
+    holds everything its response needs skips the refresh SELECT.
+    """
+    expire = db.expire_on_commit
+    db.expire_on_commit = False
+    try:
+        db.commit()
+    finally:
+        db.expire_on_commit = expire
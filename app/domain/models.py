@@ -1,53 +1,145 @@
 from sqlalchemy.orm import Mapped, mapped_column, relationship
-from sqlalchemy import String, ForeignKey, Enum as SAEnum
+from sqlalchemy import BigInteger, String, Text, ForeignKey, Date, DateTime, Index, Enum as SAEnum, func, text
 from sqlalchemy.dialects.postgresql import UUID
+from datetime import date, datetime, timezone
 import uuid
 from app.db import Base
+from app.core.ids import uuid7
 from app.domain.enums import PriorAuthStatus
 
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
 class Patient(Base):
     __tablename__ = "patients"
-    id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid7)
     external_id: Mapped[str] = mapped_column(String(64), nullable=False, index=True, unique=True)
     first_name: Mapped[str] = mapped_column(String(100), nullable=False)
     last_name:  Mapped[str] = mapped_column(String(100), nullable=False)
     birth_date: Mapped[str] = mapped_column(String(10), nullable=False)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False, default=_utcnow, server_default=func.now(), index=True
+    )
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False, default=_utcnow, onupdate=_utcnow, server_default=func.now(), index=True
+    )
+    __table_args__ = (
+        # case-insensitive last-name prefix search in the patient directory
+        Index(
+            "ix_patients_last_name_lower",
+            func.lower(last_name).label("last_name_lower"),
+            postgresql_ops={"last_name_lower": "varchar_pattern_ops"},
+        ),
+    )
 
 class User(Base):
     __tablename__ = "users"
-    id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid7)
     email: Mapped[str] = mapped_column(String, unique=True, index=True, nullable=False)
     hashed_password: Mapped[str] = mapped_column(String, nullable=False)
     roles: Mapped[str] = mapped_column(String, nullable=False, default="")
 
 class Coverage(Base):
     __tablename__ = "coverages"
-    id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid7)
     external_id: Mapped[str] = mapped_column(String(64), nullable=False, index=True, unique=True)
     member_id: Mapped[str] = mapped_column(String(64), nullable=False)
     plan: Mapped[str] = mapped_column(String(100), nullable=False)
     payer: Mapped[str] = mapped_column(String(100), nullable=False)
     patient_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("patients.id"), nullable=False)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False, default=_utcnow, server_default=func.now(), index=True
+    )
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False, default=_utcnow, onupdate=_utcnow, server_default=func.now(), index=True
+    )
     patient = relationship("Patient")
+    __table_args__ = (
+        Index("ix_coverages_patient_id", "patient_id"),
+        # directory filters: payer, or payer + plan, then the matching patients
+        Index("ix_coverages_payer_plan_patient_id", "payer", "plan", "patient_id"),
+    )
 
 class PriorAuthRequest(Base):
     __tablename__ = "prior_auth_requests"
-    id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid7)
     patient_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("patients.id"), nullable=False)
     coverage_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("coverages.id"), nullable=False)
     code: Mapped[str] = mapped_column(String(20), nullable=False)            # CPT/HCPCS
-    diagnosis_codes: Mapped[str] = mapped_column(String(256), default="")    # comma-separated
     status: Mapped[PriorAuthStatus] = mapped_column(SAEnum(PriorAuthStatus), default=PriorAuthStatus.requested)
     disposition: Mapped[str] = mapped_column(String(255), default="")        # brief reason/note
-    # Provider fields - now properly added to database
+    # Registered providers are referenced by NPI; provider_name is only kept
+    # for free-text providers submitted without one.
     provider_name: Mapped[str | None] = mapped_column(String(255), nullable=True, default=None)
-    provider_npi: Mapped[str | None] = mapped_column(String(20), nullable=True, default=None)
+    provider_npi: Mapped[str | None] = mapped_column(
+        String(10), ForeignKey("providers.npi"), nullable=True, default=None, index=True
+    )
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False, default=_utcnow, server_default=func.now(), index=True
+    )
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False, default=_utcnow, onupdate=_utcnow, server_default=func.now(), index=True
+    )
     patient = relationship("Patient")
     coverage = relationship("Coverage")
+    # ICD-10 codes in submission order; loaded in one batched query per result set
+    diagnoses = relationship(
+        "PriorAuthDiagnosis",
+        order_by="PriorAuthDiagnosis.position",
+        cascade="all, delete-orphan",
+        lazy="selectin",
+    )
+
+    @property
+    def diagnosis_codes(self) -> list[str]:
+        return [d.code for d in self.diagnoses]
+
+    __table_args__ = (
+        # At most one open request per patient, coverage and service code;
+        # also what the duplicate check on create reads
+        Index(
+            "uq_prior_auth_requests_open",
+            "patient_id",
+            "coverage_id",
+            "code",
+            unique=True,
+            postgresql_where=text("status IN ('requested', 'pending')"),
+            sqlite_where=text("status IN ('requested', 'pending')"),
+        ),
+    )
+
+class PriorAuthDiagnosis(Base):
+    __tablename__ = "prior_auth_diagnoses"
+    pa_request_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True), ForeignKey("prior_auth_requests.id", ondelete="CASCADE"), primary_key=True
+    )
+    position: Mapped[int] = mapped_column(primary_key=True)
+    code: Mapped[str] = mapped_column(String(16), nullable=False)            # ICD-10, normalized
+    __table_args__ = (
+        # "all PAs with code X" is an index range scan; the PA id comes from the index
+        Index("ix_prior_auth_diagnoses_code_pa_request_id", "code", "pa_request_id"),
+    )
+
+class Provider(Base):
+    """
+    NPPES provider record keyed by NPI (10 digits, Luhn check digit).
+    """
+    __tablename__ = "providers"
+    npi: Mapped[str] = mapped_column(String(10), primary_key=True)
+    entity_type: Mapped[int | None] = mapped_column(nullable=True)           # 1 individual, 2 organization
+    name: Mapped[str] = mapped_column(String(255), nullable=False)
+    # lower-cased "last first" (or organization name) for prefix autocomplete
+    search_name: Mapped[str] = mapped_column(String(255), nullable=False)
+    taxonomy_code: Mapped[str | None] = mapped_column(String(16), nullable=True)
+    state: Mapped[str | None] = mapped_column(String(2), nullable=True)
+    __table_args__ = (
+        # pattern ops so LIKE 'prefix%' is an index range scan under any collation
+        Index("ix_providers_search_name", "search_name", postgresql_ops={"search_name": "varchar_pattern_ops"}),
+    )
 
 class DocumentReference(Base):
     __tablename__ = "document_references"
-    id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid7)
 
     filename: Mapped[str] = mapped_column(String(255), nullable=False)
     content_type: Mapped[str] = mapped_column(String(100), nullable=False)
@@ -56,4 +148,177 @@ class DocumentReference(Base):
     storage_key: Mapped[str] = mapped_column(String(64), nullable=False, unique=True)
 
     patient_id: Mapped[uuid.UUID | None] = mapped_column(UUID(as_uuid=True), ForeignKey("patients.id"), nullable=True)
+    pa_request_id: Mapped[uuid.UUID | None] = mapped_column(
+        UUID(as_uuid=True), ForeignKey("prior_auth_requests.id"), nullable=True, index=True
+    )
+    # Which requiredDocs entry this satisfies, e.g. "Clinical notes"
+    doc_type: Mapped[str | None] = mapped_column(String(100), nullable=True)
+
+    # Filled in by the background pipeline (app.services.doc_processing)
+    processing_status: Mapped[str] = mapped_column(String(16), nullable=False, default="pending", server_default="pending", index=True)
+    processing_error: Mapped[str | None] = mapped_column(String(255), nullable=True)
+    detected_content_type: Mapped[str | None] = mapped_column(String(100), nullable=True)
+    page_count: Mapped[int | None] = mapped_column(nullable=True)
+    extracted_text: Mapped[str | None] = mapped_column(Text, nullable=True, deferred=True)
+    thumbnail_key: Mapped[str | None] = mapped_column(String(80), nullable=True)
+    processed_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False, default=_utcnow, server_default=func.now(), index=True
+    )
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False, default=_utcnow, onupdate=_utcnow, server_default=func.now(), index=True
+    )
+
+class UploadSession(Base):
+    """
+    A resumable upload in progress. Chunks may arrive in any order; the
+    document is created when the session is completed.
+    """
+    __tablename__ = "upload_sessions"
+    id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid7)
+    filename: Mapped[str] = mapped_column(String(255), nullable=False)
+    content_type: Mapped[str] = mapped_column(String(100), nullable=False)
+    size_bytes: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    chunk_size: Mapped[int] = mapped_column(nullable=False)
+    sha256: Mapped[str | None] = mapped_column(String(64), nullable=True)   # expected digest of the whole file
     pa_request_id: Mapped[uuid.UUID | None] = mapped_column(UUID(as_uuid=True), ForeignKey("prior_auth_requests.id"), nullable=True)
+    doc_type: Mapped[str | None] = mapped_column(String(100), nullable=True)
+    document_id: Mapped[uuid.UUID | None] = mapped_column(UUID(as_uuid=True), ForeignKey("document_references.id"), nullable=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False, default=_utcnow)
+    expires_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False, index=True)
+    chunks = relationship("UploadChunk", cascade="all, delete-orphan", order_by="UploadChunk.index")
+
+    @property
+    def chunk_count(self) -> int:
+        return max(1, -(-self.size_bytes // self.chunk_size))
+
+class UploadChunk(Base):
+    __tablename__ = "upload_chunks"
+    session_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True), ForeignKey("upload_sessions.id", ondelete="CASCADE"), primary_key=True
+    )
+    index: Mapped[int] = mapped_column(primary_key=True)
+    size_bytes: Mapped[int] = mapped_column(nullable=False)
+    sha256: Mapped[str] = mapped_column(String(64), nullable=False)
+
+class PayerSubmission(Base):
+    """
+    Work queue for sending a PA to its payer and polling for the decision.
+    Written in the same transaction as the PA; drained by the payer worker.
+    """
+    __tablename__ = "payer_submissions"
+    pa_request_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True), ForeignKey("prior_auth_requests.id", ondelete="CASCADE"), primary_key=True
+    )
+    payer: Mapped[str] = mapped_column(String(100), nullable=False)
+    state: Mapped[str] = mapped_column(String(16), nullable=False, default="queued")  # queued | submitted | decided | failed
+    tracking_id: Mapped[str | None] = mapped_column(String(128), nullable=True)       # payer's ClaimResponse id
+    attempts: Mapped[int] = mapped_column(nullable=False, default=0)
+    next_attempt_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False, default=_utcnow)
+    last_error: Mapped[str | None] = mapped_column(String(255), nullable=True)
+    submitted_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    decided_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    __table_args__ = (
+        # the worker's "what is due" scan only looks at open work
+        Index(
+            "ix_payer_submissions_due",
+            "next_attempt_at",
+            postgresql_where=text("state IN ('queued', 'submitted')"),
+            sqlite_where=text("state IN ('queued', 'submitted')"),
+        ),
+    )
+
+class WebhookSubscription(Base):
+    """
+    An endpoint that receives PA status-change events, signed with its secret.
+    """
+    __tablename__ = "webhook_subscriptions"
+    id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid7)
+    url: Mapped[str] = mapped_column(String(2048), nullable=False)
+    secret: Mapped[str] = mapped_column(String(128), nullable=False)
+    description: Mapped[str] = mapped_column(String(255), nullable=False, default="")
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False, default=_utcnow, server_default=func.now()
+    )
+
+class WebhookDelivery(Base):
+    """
+    Outbox of webhook events, one row per (event, subscription). Written in
+    the same transaction as the change it reports; drained by the webhook
+    worker. Rows that run out of attempts stay behind as state "dead" (the
+    dead-letter list) until an admin requeues them.
+    """
+    __tablename__ = "webhook_deliveries"
+    id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid7)
+    event_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), nullable=False)   # same for every subscriber
+    subscription_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True), ForeignKey("webhook_subscriptions.id", ondelete="CASCADE"), nullable=False, index=True
+    )
+    event_type: Mapped[str] = mapped_column(String(64), nullable=False)
+    payload: Mapped[str] = mapped_column(Text, nullable=False)                        # JSON event body
+    state: Mapped[str] = mapped_column(String(16), nullable=False, default="pending")  # pending | delivered | dead
+    attempts: Mapped[int] = mapped_column(nullable=False, default=0)
+    next_attempt_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False, default=_utcnow)
+    last_error: Mapped[str | None] = mapped_column(String(255), nullable=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False, default=_utcnow)
+    delivered_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    __table_args__ = (
+        # the worker's "what is due" scan only looks at pending rows
+        Index(
+            "ix_webhook_deliveries_due",
+            "next_attempt_at",
+            postgresql_where=text("state = 'pending'"),
+            sqlite_where=text("state = 'pending'"),
+        ),
+    )
+
+class AuditEvent(Base):
+    """
+    Append-only record of who read or changed which patient-linked resource.
+    Written in batches by the audit writer, never in the request path.
+    """
+    __tablename__ = "audit_events"
+    id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid7)
+    occurred_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False, index=True)
+    actor: Mapped[str | None] = mapped_column(String(255), nullable=True)               # token subject
+    roles: Mapped[str] = mapped_column(String(255), nullable=False, default="")
+    action: Mapped[str] = mapped_column(String(16), nullable=False)                    # read | create | update | delete
+    resource_type: Mapped[str] = mapped_column(String(32), nullable=False)
+    resource_id: Mapped[str | None] = mapped_column(String(64), nullable=True)
+    patient_id: Mapped[uuid.UUID | None] = mapped_column(UUID(as_uuid=True), nullable=True)  # no FK: outlives deletes
+    request_id: Mapped[str | None] = mapped_column(String(128), nullable=True)
+    method: Mapped[str | None] = mapped_column(String(8), nullable=True)
+    path: Mapped[str | None] = mapped_column(String(255), nullable=True)
+    status_code: Mapped[int | None] = mapped_column(nullable=True)
+    client_ip: Mapped[str | None] = mapped_column(String(64), nullable=True)
+    __table_args__ = (
+        # "who accessed this patient's records" reports
+        Index("ix_audit_events_patient_id_occurred_at", "patient_id", "occurred_at"),
+    )
+
+class PriorAuthDailyRollup(Base):
+    """
+    Count of prior auth requests per creation day, status, payer and code.
+    Maintained incrementally by the PA service; rebuildable from the base table.
+    """
+    __tablename__ = "pa_daily_rollups"
+    day: Mapped[date] = mapped_column(Date, primary_key=True)
+    status: Mapped[PriorAuthStatus] = mapped_column(SAEnum(PriorAuthStatus), primary_key=True)
+    payer: Mapped[str] = mapped_column(String(100), primary_key=True)
+    code: Mapped[str] = mapped_column(String(20), primary_key=True)
+    count: Mapped[int] = mapped_column(nullable=False, default=0)
+
+class IdempotencyKey(Base):
+    """
+    Client-supplied Idempotency-Key with the fingerprint of the request that
+    claimed it and, once finished, the response to replay for retries.
+    """
+    __tablename__ = "idempotency_keys"
+    scope: Mapped[str] = mapped_column(String(64), primary_key=True)   # which endpoint
+    key: Mapped[str] = mapped_column(String(255), primary_key=True)
+    fingerprint: Mapped[str] = mapped_column(String(64), nullable=False)
+    state: Mapped[str] = mapped_column(String(16), nullable=False)     # in_progress | completed
+    response_status: Mapped[int | None] = mapped_column(nullable=True)
+    response_body: Mapped[str | None] = mapped_column(Text, nullable=True)
+    locked_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False, default=_utcnow)
+    expires_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False, index=True)
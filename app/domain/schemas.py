@@ -1,4 +1,4 @@
-from pydantic import BaseModel, EmailStr
+from pydantic import BaseModel, EmailStr, Field, HttpUrl
 from typing import List, Optional
 from app.domain.enums import PriorAuthStatus
 
@@ -16,6 +16,10 @@ class PriorAuthCreateIn(BaseModel):
     provider_name: Optional[str] = None
     provider_npi: Optional[str] = None
 
+class PriorAuthStatusUpdateIn(BaseModel):
+    status: PriorAuthStatus
+    disposition: Optional[str] = None
+
 class PriorAuthOut(BaseModel):
     id: str
     status: PriorAuthStatus
@@ -63,4 +67,24 @@ class DocumentRefOut(BaseModel):
     filename: str
     content_type: str
     size_bytes: int
-    url: str
\ No newline at end of file
+    url: str
+    pa_request_id: Optional[str] = None
+    doc_type: Optional[str] = None
+
+class UploadSessionCreateIn(BaseModel):
+    filename: str
+    content_type: str = "application/octet-stream"
+    size_bytes: int
+    chunk_size: Optional[int] = None
+    sha256: Optional[str] = None       # hex digest of the whole file, checked on completion
+    pa_request_id: Optional[str] = None
+    doc_type: Optional[str] = None
+
+class AttachmentLinkIn(BaseModel):
+    document_id: str
+    doc_type: Optional[str] = None
+
+class WebhookCreateIn(BaseModel):
+    url: HttpUrl
+    secret: Optional[str] = Field(None, min_length=16, max_length=128)  # generated when omitted
+    description: str = Field("", max_length=255)
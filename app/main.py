@@ -1,13 +1,49 @@
+import logging
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
-from app.core.logging import configure_logging
+from fastapi.concurrency import run_in_threadpool
+from app.core.logging import configure_logging, RequestIDMiddleware
+from app.core.profiling import ProfilingMiddleware
+from app.core.rate_limit import RateLimitMiddleware
+from app.core.startup import warm_up
+from app.services import audit, doc_processing, eligibility
 from app.api.v1.router import api_router
 
-configure_logging()
+log = logging.getLogger(__name__)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Runs before the machine accepts traffic, so cold starts pay here
+    # instead of on the first user request.
+    app.state.warmup = await run_in_threadpool(warm_up, app)
+    try:
+        await run_in_threadpool(doc_processing.resume_pending)
+    except Exception:
+        log.exception("could not resume pending document processing")
+    yield
+    doc_processing.shutdown()
+    await eligibility.shutdown()
+    # Last, so events from requests finishing during shutdown are written too
+    await run_in_threadpool(audit.shutdown)
+
+def create_app() -> FastAPI:
+    configure_logging()
+
+    app = FastAPI(title="PA Copilot API", version="0.0.1", lifespan=lifespan)
+    # Inside the rate limiter: rejected requests never reached any data
+    app.add_middleware(audit.AuditMiddleware)
+    app.add_middleware(RateLimitMiddleware)
+    # Outside the limiter so queueing shows up in the profile; inside request IDs
+    app.add_middleware(ProfilingMiddleware)
+    # Outermost, so even rejected requests get an ID and an access log line
+    app.add_middleware(RequestIDMiddleware)
 
-app = FastAPI(title="PA Copilot API", version="0.0.1")
+    @app.get("/health")
+    def health():
+        return {"status": "ok"}
 
-@app.get("/health")
-def health():
-    return {"status": "ok"}
+    app.include_router(api_router, prefix="/v1")
+    return app
 
-app.include_router(api_router, prefix="/v1")
\ No newline at end of file
+app = create_app()
@@ -0,0 +1,136 @@
+from datetime import date, datetime, timezone
+from typing import Optional
+
+from sqlalchemy import delete, func, select
+from sqlalchemy.orm import Session
+
+from app.db import dialect_insert
+from app.domain.enums import PriorAuthStatus
+from app.domain.models import PriorAuthDailyRollup, PriorAuthRequest, Coverage
+
+GROUP_BY_FIELDS = ("day", "status", "payer", "code")
+
+
+def _day_of(created_at: Optional[datetime]) -> date:
+    if created_at is None:
+        return datetime.now(timezone.utc).date()
+    if created_at.tzinfo is None:
+        return created_at.date()
+    return created_at.astimezone(timezone.utc).date()
+
+
+def bump(
+    db: Session,
+    *,
+    day: date,
+    status: PriorAuthStatus,
+    payer: str,
+    code: str,
+    delta: int,
+) -> None:
+    """
+    Adds delta to one rollup bucket inside the caller's transaction.
+    """
+    stmt = dialect_insert(db, PriorAuthDailyRollup).values(
+        day=day, status=status, payer=payer, code=code, count=delta
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["day", "status", "payer", "code"],
+        set_={"count": PriorAuthDailyRollup.count + stmt.excluded.count},
+    )
+    db.execute(stmt)
+
+
+def record_created(db: Session, par: PriorAuthRequest, *, payer: str) -> None:
+    bump(db, day=_day_of(par.created_at), status=par.status, payer=payer, code=par.code, delta=1)
+
+
+def record_deleted(db: Session, par: PriorAuthRequest, *, payer: str) -> None:
+    bump(db, day=_day_of(par.created_at), status=par.status, payer=payer, code=par.code, delta=-1)
+
+
+def record_status_change(
+    db: Session,
+    par: PriorAuthRequest,
+    *,
+    payer: str,
+    old_status: PriorAuthStatus,
+    new_status: PriorAuthStatus,
+) -> None:
+    if old_status == new_status:
+        return
+    day = _day_of(par.created_at)
+    bump(db, day=day, status=old_status, payer=payer, code=par.code, delta=-1)
+    bump(db, day=day, status=new_status, payer=payer, code=par.code, delta=1)
+
+
+def query_aggregates(
+    db: Session,
+    *,
+    group_by: list[str],
+    since: Optional[date] = None,
+    until: Optional[date] = None,
+    status: Optional[list[PriorAuthStatus]] = None,
+    payer: Optional[str] = None,
+    code: Optional[str] = None,
+) -> list[dict]:
+    """
+    Sums rollup buckets; cost is proportional to the number of buckets,
+    not the number of requests.
+    """
+    cols = [getattr(PriorAuthDailyRollup, g) for g in group_by]
+    total = func.sum(PriorAuthDailyRollup.count).label("count")
+    stmt = select(*cols, total)
+    if since is not None:
+        stmt = stmt.where(PriorAuthDailyRollup.day >= since)
+    if until is not None:
+        stmt = stmt.where(PriorAuthDailyRollup.day < until)
+    if status:
+        stmt = stmt.where(PriorAuthDailyRollup.status.in_(status))
+    if payer:
+        stmt = stmt.where(PriorAuthDailyRollup.payer == payer)
+    if code:
+        stmt = stmt.where(PriorAuthDailyRollup.code == code)
+    if cols:
+        stmt = stmt.group_by(*cols).having(total > 0).order_by(*cols)
+
+    buckets = []
+    for row in db.execute(stmt):
+        bucket = {}
+        for g in group_by:
+            val = getattr(row, g)
+            if isinstance(val, PriorAuthStatus):
+                val = val.value
+            elif isinstance(val, date):
+                val = val.isoformat()
+            bucket[g] = val
+        bucket["count"] = int(row.count or 0)
+        buckets.append(bucket)
+    return buckets
+
+
+def _day_expr(db: Session):
+    if db.get_bind().dialect.name == "postgresql":
+        return func.date(func.timezone("UTC", PriorAuthRequest.created_at))
+    return func.date(PriorAuthRequest.created_at)
+
+
+def rebuild(db: Session) -> int:
+    """
+    Recomputes every bucket from prior_auth_requests in one transaction.
+    Returns the number of buckets written.
+    """
+    day = _day_expr(db)
+    source = (
+        select(day, PriorAuthRequest.status, Coverage.payer, PriorAuthRequest.code, func.count())
+        .join(Coverage, Coverage.id == PriorAuthRequest.coverage_id)
+        .group_by(day, PriorAuthRequest.status, Coverage.payer, PriorAuthRequest.code)
+    )
+    db.execute(delete(PriorAuthDailyRollup))
+    db.execute(
+        PriorAuthDailyRollup.__table__.insert().from_select(
+            ["day", "status", "payer", "code", "count"], source
+        )
+    )
+    db.commit()
+    return db.scalar(select(func.count()).select_from(PriorAuthDailyRollup)) or 0
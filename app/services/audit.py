@@ -0,0 +1,348 @@
+"""
+PHI access audit log.
+
+Requests and service hooks call record(); events go into a bounded in-memory
+ring buffer and a background thread writes them in multi-row INSERTs, so the
+request path never waits on the audit table. When the buffer is full,
+producers block (backpressure) instead of dropping events; if the writer
+can't keep up within audit_enqueue_timeout_seconds the producer writes the
+oldest batch itself. Callers on the event loop (middleware, async routes)
+never block: a full buffer hands their event to an executor thread to wait
+instead. shutdown() drains everything before returning.
+"""
+import asyncio
+import atexit
+import logging
+import threading
+import time
+import uuid
+from contextvars import ContextVar
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Optional
+
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.ids import uuid7
+from app.core.logging import request_id_var
+from app.core.security import decode_token
+from app.db import SessionLocal, get_engine
+from app.domain.models import AuditEvent
+
+log = logging.getLogger(__name__)
+
+
+@dataclass
+class _RequestContext:
+    actor: Optional[str]
+    roles: str
+    method: str
+    path: str
+    client_ip: Optional[str]
+    recorded: int = 0
+
+
+_context_var: ContextVar[Optional[_RequestContext]] = ContextVar("audit_context", default=None)
+
+
+def _session() -> Session:
+    get_engine()
+    return SessionLocal()
+
+
+class AuditBuffer:
+    """
+    Fixed-capacity ring buffer drained by one writer thread. Only the writer
+    (or a producer that gave up waiting) removes events, and only after they
+    are committed, so a failed write is retried rather than lost.
+    """
+
+    def __init__(self, capacity: int, batch_size: int, flush_interval: float, write=None):
+        self.capacity = capacity
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._write = write or _write_rows
+        self._slots: list[Optional[dict]] = [None] * capacity
+        self._head = 0          # oldest event
+        self._count = 0
+        self._cond = threading.Condition()
+        self._write_lock = threading.Lock()   # one batch in flight at a time
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = False
+
+    def __len__(self) -> int:
+        return self._count
+
+    def start(self) -> None:
+        with self._cond:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stopping = False
+            self._thread = threading.Thread(target=self._run, name="audit-writer", daemon=True)
+            self._thread.start()
+
+    def _append(self, event: dict) -> bool:
+        # Caller holds self._cond
+        if self._count >= self.capacity:
+            return False
+        self._slots[(self._head + self._count) % self.capacity] = event
+        self._count += 1
+        if self._count >= self.batch_size:
+            self._cond.notify_all()
+        return True
+
+    def offer(self, event: dict) -> bool:
+        """
+        Non-blocking put: False when the buffer is full.
+        """
+        self.start()
+        with self._cond:
+            return self._append(event)
+
+    def put(self, event: dict) -> None:
+        self.start()
+        deadline = time.monotonic() + settings.audit_enqueue_timeout_seconds
+        with self._cond:
+            while self._count >= self.capacity:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            if self._append(event):
+                return
+        # The writer is stuck (e.g. the database is down): write a batch here
+        # so the buffer makes room instead of losing the event
+        log.warning("audit buffer full; writing a batch in the request path")
+        self._flush_batch()
+        self.put(event)
+
+    def _peek(self) -> list[dict]:
+        with self._cond:
+            n = min(self._count, self.batch_size)
+            return [self._slots[(self._head + i) % self.capacity] for i in range(n)]
+
+    def _release(self, n: int) -> None:
+        with self._cond:
+            for i in range(n):
+                self._slots[(self._head + i) % self.capacity] = None
+            self._head = (self._head + n) % self.capacity
+            self._count -= n
+            self._cond.notify_all()
+
+    def _flush_batch(self) -> int:
+        with self._write_lock:
+            batch = self._peek()
+            if batch:
+                self._write(batch)
+                self._release(len(batch))
+            return len(batch)
+
+    def _run(self) -> None:
+        failures = 0
+        while True:
+            with self._cond:
+                if self._count < self.batch_size and not self._stopping:
+                    self._cond.wait(self.flush_interval)
+                if self._stopping and self._count == 0:
+                    return
+            try:
+                while self._flush_batch() == self.batch_size:
+                    pass
+                failures = 0
+            except Exception:
+                failures += 1
+                log.exception("audit batch write failed (attempt %d)", failures)
+                if self._stopping and failures >= settings.audit_shutdown_retries:
+                    log.error("giving up on %d unwritten audit events", self._count)
+                    return
+                time.sleep(min(self.flush_interval * 2 ** failures, 30.0))
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        Blocks until everything buffered so far is written.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            self._cond.notify_all()
+            while self._count:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._cond.wait(remaining if remaining is not None else 0.1)
+                self._cond.notify_all()
+        return True
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+            thread = self._thread
+        if thread is not None:
+            thread.join(timeout)
+        self._thread = None
+
+
+def _write_rows(rows: list[dict]) -> None:
+    with _session() as db:
+        db.execute(insert(AuditEvent), rows)
+        db.commit()
+
+
+buffer = AuditBuffer(
+    settings.audit_buffer_size, settings.audit_batch_size, settings.audit_flush_interval_seconds
+)
+
+
+def shutdown(timeout: Optional[float] = None) -> None:
+    """
+    Writes out every buffered event and stops the writer. Called from the app
+    lifespan and at interpreter exit.
+    """
+    buffer.stop(timeout if timeout is not None else settings.audit_shutdown_timeout_seconds)
+
+
+atexit.register(shutdown)
+
+
+# -----------------------
+# Hooks
+# -----------------------
+
+def _log_failed_put(future) -> None:
+    if not future.cancelled() and future.exception() is not None:
+        log.error("audit event lost: %s", future.exception())
+
+
+def _enqueue(event: dict) -> None:
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        # A worker thread: waiting here only holds up this request
+        buffer.put(event)
+        return
+    # On the event loop, waiting (or writing a batch) would stall every
+    # request on this worker; a full buffer is waited on by a thread instead
+    if not buffer.offer(event):
+        loop.run_in_executor(None, buffer.put, event).add_done_callback(_log_failed_put)
+
+
+def record(
+    action: str,
+    resource_type: str,
+    resource_id=None,
+    *,
+    patient_id: Optional[uuid.UUID] = None,
+    status_code: Optional[int] = None,
+) -> None:
+    """
+    Records one access event, stamped with the current request's actor,
+    request id and path when called while serving a request.
+    """
+    if not settings.audit_enabled:
+        return
+    ctx = _context_var.get()
+    if ctx is not None:
+        ctx.recorded += 1
+    _enqueue({
+        "id": uuid7(),
+        "occurred_at": datetime.now(timezone.utc),
+        "actor": ctx.actor if ctx else None,
+        "roles": ctx.roles if ctx else "",
+        "action": action,
+        "resource_type": resource_type,
+        "resource_id": str(resource_id)[:64] if resource_id is not None else None,
+        "patient_id": patient_id,
+        "request_id": request_id_var.get(),
+        "method": ctx.method if ctx else None,
+        "path": ctx.path[:255] if ctx else None,
+        "status_code": status_code,
+        "client_ip": ctx.client_ip if ctx else None,
+    })
+
+
+def record_many(action: str, resource_type: str, items) -> None:
+    """
+    items: (resource_id, patient_id) pairs, e.g. one per row of a list page.
+    """
+    for resource_id, patient_id in items:
+        record(action, resource_type, resource_id, patient_id=patient_id)
+
+
+# -----------------------
+# Middleware
+# -----------------------
+
+_ACTIONS = {"GET": "read", "HEAD": "read", "POST": "create", "PUT": "update", "PATCH": "update", "DELETE": "delete"}
+# API prefixes that expose PHI, mapped to the audited resource type
+_AUDITED = (
+    ("/v1/patients", "patient"),
+    ("/v1/coverages", "coverage"),
+    ("/v1/prior-auth", "prior_auth"),
+    ("/v1/attachments", "document"),
+    ("/v1/fhir", "fhir_bundle"),
+)
+
+
+def _classify(path: str) -> Optional[str]:
+    for prefix, resource_type in _AUDITED:
+        if path.startswith(prefix):
+            return resource_type
+    return None
+
+
+def _actor(headers) -> tuple[Optional[str], str]:
+    for k, v in headers:
+        if k == b"authorization":
+            scheme, _, token = v.decode("latin-1").partition(" ")
+            if scheme.lower() == "bearer" and token:
+                try:
+                    payload = decode_token(token)
+                except Exception:
+                    return None, ""
+                return payload.get("sub"), ",".join(payload.get("roles", []))
+    return None, ""
+
+
+class AuditMiddleware:
+    """
+    Sets the audit context for PHI routes and, when no service hook recorded
+    anything more specific (failed requests, searches that matched nothing),
+    records one request-level event with the response status.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not settings.audit_enabled:
+            return await self.app(scope, receive, send)
+        path = scope.get("path", "")
+        resource_type = _classify(path)
+        if resource_type is None:
+            return await self.app(scope, receive, send)
+
+        actor, roles = _actor(scope.get("headers", []))
+        client = scope.get("client")
+        ctx = _RequestContext(
+            actor=actor,
+            roles=roles,
+            method=scope["method"],
+            path=path,
+            client_ip=client[0] if client else None,
+        )
+        status_holder = {"status": 500}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status_holder["status"] = message["status"]
+            await send(message)
+
+        token = _context_var.set(ctx)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            if ctx.recorded == 0 or status_holder["status"] >= 400:
+                record(_ACTIONS.get(ctx.method, ctx.method.lower()), resource_type, status_code=status_holder["status"])
+            _context_var.reset(token)
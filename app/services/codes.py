@@ -0,0 +1,129 @@
+import csv
+from bisect import bisect_left
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+from typing import Optional
+
+from app.core.config import settings
+
+PROCEDURE_SYSTEMS = ("CPT", "HCPCS")
+DIAGNOSIS_SYSTEMS = ("ICD10",)
+
+_DEFAULT_CATALOG = Path(__file__).resolve().parent.parent / "data" / "code_catalog.csv"
+
+
+def normalize_diagnosis_code(code: str) -> str:
+    """
+    Canonical ICD-10 form used for storage and lookups: trimmed, upper-case,
+    with the dot after the 3-character category ("m545" -> "M54.5").
+    """
+    c = code.strip().upper()
+    if c and "." not in c and len(c) > 3:
+        c = f"{c[:3]}.{c[3:]}"
+    return c
+
+
+def _key(code: str) -> str:
+    # Index key ignores the ICD-10 dot so "M545" and "M54.5" both match
+    return code.strip().upper().replace(".", "")
+
+
+@dataclass(frozen=True)
+class CodeEntry:
+    system: str
+    code: str
+    description: str
+
+
+class CodeCatalog:
+    """
+    Read-only prefix index over the code catalog. Codes and description words
+    are kept in sorted arrays and searched with bisect; built once and shared.
+    """
+
+    def __init__(self, entries: list[CodeEntry]):
+        entries = sorted(entries, key=lambda e: (_key(e.code), e.system))
+        self._entries: tuple[CodeEntry, ...] = tuple(entries)
+        self._code_keys: tuple[str, ...] = tuple(_key(e.code) for e in entries)
+        words = sorted(
+            {(w, i) for i, e in enumerate(entries) for w in e.description.lower().split() if len(w) > 2}
+        )
+        self._word_keys: tuple[str, ...] = tuple(w for w, _ in words)
+        self._word_refs: tuple[int, ...] = tuple(i for _, i in words)
+        by_system: dict[str, set[str]] = {}
+        for e in entries:
+            by_system.setdefault(e.system, set()).add(_key(e.code))
+        self._by_system = {s: frozenset(k) for s, k in by_system.items()}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def contains(self, code: str, systems: tuple[str, ...]) -> bool:
+        k = _key(code)
+        return any(k in self._by_system.get(s, ()) for s in systems)
+
+    def _prefix_range(self, keys: tuple[str, ...], prefix: str):
+        i = bisect_left(keys, prefix)
+        while i < len(keys) and keys[i].startswith(prefix):
+            yield i
+            i += 1
+
+    def search(self, prefix: str, *, system: Optional[str] = None, limit: int = 20) -> list[CodeEntry]:
+        """
+        Code-prefix matches first, then description-word matches.
+        """
+        out: list[CodeEntry] = []
+        seen: set[int] = set()
+
+        def take(idx: int) -> bool:
+            e = self._entries[idx]
+            if idx not in seen and (system is None or e.system == system):
+                seen.add(idx)
+                out.append(e)
+            return len(out) >= limit
+
+        code_prefix = _key(prefix)
+        if code_prefix:
+            for i in self._prefix_range(self._code_keys, code_prefix):
+                if take(i):
+                    return out
+        word_prefix = prefix.strip().lower()
+        if len(word_prefix) >= 3:
+            for j in self._prefix_range(self._word_keys, word_prefix):
+                if take(self._word_refs[j]):
+                    return out
+        return out
+
+
+def load_catalog(path: Path) -> CodeCatalog:
+    with open(path, newline="", encoding="utf-8") as f:
+        entries = [
+            CodeEntry(system=row["system"].strip().upper(), code=row["code"].strip().upper(), description=row["description"].strip())
+            for row in csv.DictReader(f)
+            if row.get("code")
+        ]
+    return CodeCatalog(entries)
+
+
+@lru_cache(maxsize=1)
+def get_catalog() -> CodeCatalog:
+    return load_catalog(Path(settings.code_catalog_path) if settings.code_catalog_path else _DEFAULT_CATALOG)
+
+
+def validation_enabled() -> bool:
+    if settings.code_validation_enabled is None:
+        return bool(settings.code_catalog_path)
+    return settings.code_validation_enabled
+
+
+def unknown_codes(*, procedure: Optional[str] = None, diagnoses: tuple[str, ...] = ()) -> list[str]:
+    """
+    Codes not present in the catalog, for validation at submission time.
+    """
+    catalog = get_catalog()
+    missing = []
+    if procedure is not None and not catalog.contains(procedure, PROCEDURE_SYSTEMS):
+        missing.append(procedure)
+    missing.extend(d for d in diagnoses if not catalog.contains(d, DIAGNOSIS_SYSTEMS))
+    return missing
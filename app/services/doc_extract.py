@@ -0,0 +1,108 @@
+"""
+CPU-bound document inspection. Runs inside pool worker processes, so it
+only takes file paths and returns plain data; no settings or DB access.
+"""
+import re
+from typing import Optional
+
+_MAGIC: tuple[tuple[int, bytes, str], ...] = (
+    (0, b"%PDF-", "application/pdf"),
+    (0, b"\x89PNG\r\n\x1a\n", "image/png"),
+    (0, b"\xff\xd8\xff", "image/jpeg"),
+    (0, b"GIF87a", "image/gif"),
+    (0, b"GIF89a", "image/gif"),
+    (0, b"II*\x00", "image/tiff"),
+    (0, b"MM\x00*", "image/tiff"),
+    (0, b"PK\x03\x04", "application/zip"),
+    (128, b"DICM", "application/dicom"),
+)
+
+# "/Type /Page" but not "/Type /Pages"
+_PDF_PAGE = re.compile(rb"/Type\s*/Page(?![A-Za-z])")
+
+_CHUNK = 1024 * 1024
+
+
+def sniff_mime(head: bytes) -> str:
+    for offset, magic, mime in _MAGIC:
+        if head[offset:offset + len(magic)] == magic:
+            return mime
+    try:
+        head.decode("utf-8")
+    except UnicodeDecodeError as e:
+        # A multi-byte character cut off at the end of the sample is still text
+        if e.start < len(head) - 3:
+            return "application/octet-stream"
+    return "text/plain"
+
+
+def _pdf_page_count(path: str) -> int:
+    # Scan in chunks with a small overlap so a marker split across
+    # chunk boundaries is still seen exactly once.
+    count, tail = 0, b""
+    with open(path, "rb") as f:
+        while True:
+            chunk = f.read(_CHUNK)
+            if not chunk:
+                break
+            buf = tail + chunk
+            cut = max(len(buf) - 32, 0)
+            count += sum(1 for m in _PDF_PAGE.finditer(buf) if m.start() < cut)
+            tail = buf[cut:]
+    count += len(_PDF_PAGE.findall(tail))
+    return count
+
+
+def _pdf_text(path: str, max_chars: int) -> Optional[str]:
+    try:
+        from pypdf import PdfReader  # optional dependency
+    except ImportError:
+        return None
+    parts, size = [], 0
+    for page in PdfReader(path).pages:
+        text = page.extract_text() or ""
+        parts.append(text)
+        size += len(text)
+        if size >= max_chars:
+            break
+    return "\n".join(parts)[:max_chars]
+
+
+def _thumbnail(path: str, out_path: str, size: int) -> bool:
+    try:
+        from PIL import Image  # optional dependency
+    except ImportError:
+        return False
+    with Image.open(path) as im:
+        im.thumbnail((size, size))
+        im.convert("RGB").save(out_path, "PNG")
+    return True
+
+
+def process_file(path: str, thumbnail_path: str, *, max_text_chars: int, thumbnail_size: int) -> dict:
+    """
+    Returns detected_content_type, page_count, extracted_text and whether a
+    thumbnail was written to thumbnail_path.
+    """
+    with open(path, "rb") as f:
+        head = f.read(4096)
+    mime = sniff_mime(head)
+
+    page_count: Optional[int] = None
+    text: Optional[str] = None
+    thumbnail = False
+    if mime == "application/pdf":
+        page_count = _pdf_page_count(path)
+        text = _pdf_text(path, max_text_chars)
+    elif mime.startswith("image/"):
+        page_count = 1
+        thumbnail = _thumbnail(path, thumbnail_path, thumbnail_size)
+    elif mime == "text/plain":
+        with open(path, "r", encoding="utf-8", errors="replace") as f:
+            text = f.read(max_text_chars)
+    return {
+        "detected_content_type": mime,
+        "page_count": page_count,
+        "extracted_text": text,
+        "thumbnail": thumbnail,
+    }
@@ -0,0 +1,163 @@
+import logging
+import multiprocessing
+import threading
+import uuid
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Optional
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.adapters import storage_local
+from app.core.config import settings
+from app.db import SessionLocal, get_engine
+from app.domain.models import DocumentReference
+from app.services.doc_extract import process_file
+
+log = logging.getLogger(__name__)
+
+PENDING, PROCESSING, DONE, FAILED = "pending", "processing", "done", "failed"
+
+_lock = threading.Lock()
+_pool: Optional[ProcessPoolExecutor] = None
+_dispatch: Optional[ThreadPoolExecutor] = None
+# Caps queued + running jobs; replaced on shutdown since cancelled jobs never release
+_slots = threading.Semaphore(settings.doc_processing_max_pending)
+
+
+def _executors() -> tuple[ProcessPoolExecutor, ThreadPoolExecutor]:
+    global _pool, _dispatch
+    with _lock:
+        if _pool is None:
+            # spawn, not fork: the parent runs threads (logging, DB pool) that
+            # a forked child would inherit mid-lock
+            ctx = multiprocessing.get_context("spawn")
+            _pool = ProcessPoolExecutor(max_workers=settings.doc_processing_workers, mp_context=ctx)
+            # One dispatcher thread per worker process waits on results and writes them back
+            _dispatch = ThreadPoolExecutor(
+                max_workers=settings.doc_processing_workers, thread_name_prefix="doc-processing"
+            )
+        return _pool, _dispatch
+
+
+def _session() -> Session:
+    get_engine()
+    return SessionLocal()
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def run_job(doc_id: uuid.UUID, pool: Optional[ProcessPoolExecutor] = None) -> None:
+    """
+    Processes one document and records the outcome. The DB session is only
+    held while reading and writing status, not during extraction.
+    """
+    with _session() as db:
+        doc = db.get(DocumentReference, doc_id)
+        if doc is None:
+            return
+        doc.processing_status = PROCESSING
+        db.commit()
+        path = str(storage_local.path_for(doc.storage_key))
+        thumbnail_key = f"{doc.storage_key}.thumb.png"
+
+    kwargs = {
+        "max_text_chars": settings.doc_text_max_chars,
+        "thumbnail_size": settings.doc_thumbnail_size,
+    }
+    thumbnail_path = str(storage_local.path_for(thumbnail_key))
+    try:
+        if pool is None:
+            result = process_file(path, thumbnail_path, **kwargs)
+        else:
+            result = pool.submit(process_file, path, thumbnail_path, **kwargs).result(
+                timeout=settings.doc_processing_timeout_seconds
+            )
+        error = None
+    except Exception as e:
+        log.warning("document %s processing failed: %s", doc_id, e)
+        result, error = None, f"{type(e).__name__}: {e}"[:255]
+
+    with _session() as db:
+        doc = db.get(DocumentReference, doc_id)
+        if doc is None:
+            return
+        if result is None:
+            doc.processing_status = FAILED
+            doc.processing_error = error
+        else:
+            doc.processing_status = DONE
+            doc.processing_error = None
+            doc.detected_content_type = result["detected_content_type"]
+            doc.page_count = result["page_count"]
+            doc.extracted_text = result["extracted_text"]
+            doc.thumbnail_key = thumbnail_key if result["thumbnail"] else None
+        doc.processed_at = _now()
+        db.commit()
+
+
+def _run_and_release(doc_id: uuid.UUID, pool: ProcessPoolExecutor, slots: threading.Semaphore) -> None:
+    try:
+        run_job(doc_id, pool)
+    except Exception:
+        log.exception("document %s processing crashed", doc_id)
+    finally:
+        slots.release()
+
+
+def schedule(doc_id: uuid.UUID) -> bool:
+    """
+    Queues post-upload processing and returns immediately. When the queue
+    is full the document stays pending and is picked up by resume_pending().
+    """
+    mode = settings.doc_processing_mode
+    if mode == "off":
+        return False
+    if mode == "inline":
+        run_job(doc_id)
+        return True
+    slots = _slots
+    if not slots.acquire(blocking=False):
+        log.warning("document processing queue full; %s left pending", doc_id)
+        return False
+    pool, dispatch = _executors()
+    try:
+        dispatch.submit(_run_and_release, doc_id, pool, slots)
+    except RuntimeError:
+        # Executor shut down (app stopping); resume_pending() retries on next start
+        slots.release()
+        return False
+    return True
+
+
+def resume_pending() -> int:
+    """
+    Reschedules documents left pending or interrupted by a restart.
+    """
+    if settings.doc_processing_mode == "off":
+        return 0
+    with _session() as db:
+        ids = db.scalars(
+            select(DocumentReference.id)
+            .where(DocumentReference.processing_status.in_([PENDING, PROCESSING]))
+            .limit(settings.doc_processing_max_pending)
+        ).all()
+    return sum(1 for doc_id in ids if schedule(doc_id))
+
+
+def shutdown() -> None:
+    """
+    Stops accepting work and cancels queued jobs; interrupted documents are
+    rescheduled by resume_pending() on the next start.
+    """
+    global _pool, _dispatch, _slots
+    with _lock:
+        if _dispatch is not None:
+            _dispatch.shutdown(wait=False, cancel_futures=True)
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = _dispatch = None
+        _slots = threading.Semaphore(settings.doc_processing_max_pending)
@@ -0,0 +1,133 @@
+"""
+Coverage eligibility checks, in front of the configured EligibilityAdapter.
+
+Answers are cached per (coverage, date of service) for
+eligibility_cache_ttl_seconds, and concurrent checks for the same key share
+one upstream call, so a payer sees at most one request per key and window
+from each process. Failed checks are not cached.
+"""
+import asyncio
+import time
+from collections import Counter, OrderedDict
+from dataclasses import dataclass
+from datetime import date, datetime, timezone
+from typing import Callable, Optional
+
+from fastapi import HTTPException, status
+
+from app.adapters.eligibility import Eligibility, EligibilityAdapter, build_adapter
+from app.adapters.payer_gateway import CircuitOpenError, PayerError
+from app.core.config import settings
+from app.domain.models import Coverage
+
+
+@dataclass(frozen=True)
+class EligibilityCheck:
+    result: Eligibility
+    checked_at: datetime
+
+
+class EligibilityChecker:
+    """
+    TTL + LRU cache of (coverage id, date) -> EligibilityCheck, with
+    single-flight calls to the adapter. Lives on one event loop.
+    """
+
+    def __init__(
+        self,
+        adapter: EligibilityAdapter,
+        *,
+        ttl: float,
+        maxsize: int,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.adapter = adapter
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.stats: Counter = Counter()
+        self._clock = clock
+        self._items: OrderedDict[tuple, tuple[float, EligibilityCheck]] = OrderedDict()
+        self._flights: dict[tuple, asyncio.Task] = {}
+
+    def _get(self, key: tuple) -> Optional[EligibilityCheck]:
+        item = self._items.get(key)
+        if item is None:
+            return None
+        if item[0] <= self._clock():
+            del self._items[key]
+            return None
+        self._items.move_to_end(key)
+        return item[1]
+
+    def _put(self, key: tuple, check: EligibilityCheck) -> None:
+        self._items[key] = (self._clock() + self.ttl, check)
+        self._items.move_to_end(key)
+        while len(self._items) > self.maxsize:
+            self._items.popitem(last=False)
+
+    async def _fetch(self, key: tuple, coverage: Coverage, service_date: date) -> EligibilityCheck:
+        try:
+            result = await self.adapter.check(
+                payer=coverage.payer, member_id=coverage.member_id, plan=coverage.plan, service_date=service_date
+            )
+            check = EligibilityCheck(result=result, checked_at=datetime.now(timezone.utc))
+            self._put(key, check)
+            return check
+        finally:
+            self._flights.pop(key, None)
+
+    async def check(self, coverage: Coverage, service_date: date) -> tuple[EligibilityCheck, bool]:
+        """
+        Returns the check and whether it came from the cache.
+        """
+        key = (coverage.id, service_date)
+        cached = self._get(key)
+        if cached is not None:
+            self.stats["hit"] += 1
+            return cached, True
+        flight = self._flights.get(key)
+        if flight is None:
+            self.stats["miss"] += 1
+            flight = self._flights[key] = asyncio.ensure_future(self._fetch(key, coverage, service_date))
+        else:
+            self.stats["coalesced"] += 1
+        # Shielded: a caller that disconnects doesn't cancel the others' call
+        return await asyncio.shield(flight), False
+
+    def clear(self) -> None:
+        self._items.clear()
+
+    async def aclose(self) -> None:
+        await self.adapter.aclose()
+
+
+_checker: Optional[EligibilityChecker] = None
+
+
+def checker() -> EligibilityChecker:
+    return _checker or configure(build_adapter())
+
+
+def configure(adapter: EligibilityAdapter) -> EligibilityChecker:
+    """
+    Replaces the process-wide checker (and its cache); for tests and tools.
+    """
+    global _checker
+    _checker = EligibilityChecker(
+        adapter, ttl=settings.eligibility_cache_ttl_seconds, maxsize=settings.eligibility_cache_size
+    )
+    return _checker
+
+
+async def shutdown() -> None:
+    if _checker is not None:
+        await _checker.aclose()
+
+
+async def check_coverage(coverage: Coverage, service_date: date) -> tuple[EligibilityCheck, bool]:
+    try:
+        return await checker().check(coverage, service_date)
+    except CircuitOpenError as e:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=f"Eligibility unavailable: {e}")
+    except PayerError as e:
+        raise HTTPException(status_code=status.HTTP_502_BAD_GATEWAY, detail=f"Eligibility check failed: {e}")
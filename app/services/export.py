@@ -0,0 +1,172 @@
+import csv
+import io
+import json
+from datetime import datetime, timezone
+from typing import Iterable, Iterator, Optional
+
+from sqlalchemy import Select, func, select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.domain.enums import PriorAuthStatus
+from app.domain.models import PriorAuthRequest, PriorAuthDiagnosis, Patient, Coverage, Provider
+from app.services.pa import has_diagnosis
+
+EXPORT_COLUMNS = (
+    "id",
+    "status",
+    "disposition",
+    "code",
+    "diagnosis_codes",
+    "patient_id",
+    "patient_external_id",
+    "member_name",
+    "coverage_id",
+    "member_id",
+    "payer",
+    "plan",
+    "provider_npi",
+    "provider_name",
+    "created_at",
+)
+
+# Flush the output buffer once it grows past this many bytes
+_FLUSH_BYTES = 64 * 1024
+
+
+def _as_utc(dt: datetime) -> datetime:
+    if dt.tzinfo is None:
+        return dt.replace(tzinfo=timezone.utc)
+    return dt.astimezone(timezone.utc)
+
+
+def build_export_query(
+    *,
+    status: Optional[list[PriorAuthStatus]] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    payer: Optional[str] = None,
+    code: Optional[str] = None,
+    diagnosis: Optional[str] = None,
+) -> Select:
+    """
+    Flat column select joining patient and coverage, so each row is complete
+    without any follow-up lookups.
+    """
+    stmt = (
+        select(
+            PriorAuthRequest.id,
+            PriorAuthRequest.status,
+            PriorAuthRequest.disposition,
+            PriorAuthRequest.code,
+            PriorAuthRequest.patient_id,
+            Patient.external_id.label("patient_external_id"),
+            Patient.first_name,
+            Patient.last_name,
+            PriorAuthRequest.coverage_id,
+            Coverage.member_id,
+            Coverage.payer,
+            Coverage.plan,
+            PriorAuthRequest.provider_npi,
+            func.coalesce(Provider.name, PriorAuthRequest.provider_name).label("provider_name"),
+            PriorAuthRequest.created_at,
+        )
+        .join(Patient, Patient.id == PriorAuthRequest.patient_id)
+        .join(Coverage, Coverage.id == PriorAuthRequest.coverage_id)
+        .outerjoin(Provider, Provider.npi == PriorAuthRequest.provider_npi)
+    )
+    if status:
+        stmt = stmt.where(PriorAuthRequest.status.in_(status))
+    if since is not None:
+        stmt = stmt.where(PriorAuthRequest.created_at >= _as_utc(since))
+    if until is not None:
+        stmt = stmt.where(PriorAuthRequest.created_at < _as_utc(until))
+    if payer:
+        stmt = stmt.where(Coverage.payer == payer)
+    if code:
+        stmt = stmt.where(PriorAuthRequest.code == code)
+    if diagnosis:
+        stmt = stmt.where(has_diagnosis(diagnosis))
+    return stmt.order_by(PriorAuthRequest.created_at, PriorAuthRequest.id)
+
+
+def _diagnoses_for(db: Session, ids: list) -> dict:
+    codes: dict = {}
+    stmt = (
+        select(PriorAuthDiagnosis.pa_request_id, PriorAuthDiagnosis.code)
+        .where(PriorAuthDiagnosis.pa_request_id.in_(ids))
+        .order_by(PriorAuthDiagnosis.pa_request_id, PriorAuthDiagnosis.position)
+    )
+    for pa_id, code in db.execute(stmt):
+        codes.setdefault(pa_id, []).append(code)
+    return codes
+
+
+def iter_export_rows(db: Session, stmt: Select, *, batch_size: Optional[int] = None) -> Iterator[dict]:
+    """
+    Streams rows through a server-side cursor (yield_per implies stream_results),
+    so only one batch is held in memory at a time. Diagnosis codes are fetched
+    with one query per batch.
+    """
+    result = db.execute(stmt, execution_options={"yield_per": batch_size or settings.export_batch_size})
+    try:
+        for batch in result.partitions():
+            diagnoses = _diagnoses_for(db, [row.id for row in batch])
+            for row in batch:
+                status = row.status.value if isinstance(row.status, PriorAuthStatus) else row.status
+                name = " ".join(p for p in [row.first_name, row.last_name] if p) or None
+                yield {
+                    "id": str(row.id),
+                    "status": status,
+                    "disposition": row.disposition,
+                    "code": row.code,
+                    "diagnosis_codes": diagnoses.get(row.id, []),
+                    "patient_id": str(row.patient_id),
+                    "patient_external_id": row.patient_external_id,
+                    "member_name": name,
+                    "coverage_id": str(row.coverage_id),
+                    "member_id": row.member_id,
+                    "payer": row.payer,
+                    "plan": row.plan,
+                    "provider_npi": row.provider_npi,
+                    "provider_name": row.provider_name,
+                    "created_at": row.created_at.isoformat() if row.created_at else None,
+                }
+    finally:
+        result.close()
+
+
+def _buffered(lines: Iterable[str]) -> Iterator[bytes]:
+    # The first line goes out immediately to keep time-to-first-byte low;
+    # after that, output is coalesced into ~64KB chunks.
+    buf = io.StringIO()
+    first = True
+    for line in lines:
+        buf.write(line)
+        if first or buf.tell() >= _FLUSH_BYTES:
+            first = False
+            yield buf.getvalue().encode()
+            buf.seek(0)
+            buf.truncate()
+    if buf.tell():
+        yield buf.getvalue().encode()
+
+
+def iter_ndjson(rows: Iterable[dict]) -> Iterator[bytes]:
+    return _buffered(json.dumps(row, separators=(",", ":")) + "\n" for row in rows)
+
+
+def _csv_lines(rows: Iterable[dict]) -> Iterator[str]:
+    line = io.StringIO()
+    writer = csv.writer(line)
+    writer.writerow(EXPORT_COLUMNS)
+    yield line.getvalue()
+    for row in rows:
+        line.seek(0)
+        line.truncate()
+        writer.writerow(";".join(row[c]) if c == "diagnosis_codes" else row[c] for c in EXPORT_COLUMNS)
+        yield line.getvalue()
+
+
+def iter_csv(rows: Iterable[dict]) -> Iterator[bytes]:
+    return _buffered(_csv_lines(rows))
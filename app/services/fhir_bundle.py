@@ -0,0 +1,425 @@
+"""
+FHIR transaction Bundle ingestion (Patient, Coverage, Practitioner, Claim /
+ServiceRequest).
+
+BundleParser is fed the request body as it arrives and reduces each entry to
+the handful of fields we store as soon as that entry is complete, so memory
+is bounded by the largest single entry rather than the whole document tree.
+ingest() resolves references between entries (fullUrl or Type/id, falling
+back to existing rows) and writes everything in one transaction with
+set-based inserts.
+"""
+import codecs
+import json
+import re
+import uuid
+from typing import Any, Optional
+
+from fastapi import HTTPException, status
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db import dialect_insert
+from app.domain.models import Coverage, Patient
+from app.services import audit, pa
+
+NPI_SYSTEM = "http://hl7.org/fhir/sid/us-npi"
+_WS = re.compile(r"\s*")
+_decoder = json.JSONDecoder()
+
+
+def _bad_request(detail: str) -> HTTPException:
+    return HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=detail)
+
+
+def _unprocessable(detail: str) -> HTTPException:
+    return HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=detail)
+
+
+# -----------------------
+# Incremental parsing
+# -----------------------
+
+class BundleParser:
+    """
+    Push parser for a Bundle document: call feed() with each body chunk and
+    close() at the end. Only the top-level object is walked by hand; each
+    value (and each element of "entry") is decoded on its own once enough
+    bytes have arrived, then reduced and dropped.
+    """
+
+    def __init__(self) -> None:
+        self._utf8 = codecs.getincrementaldecoder("utf-8")()
+        self._buf = ""
+        self._pos = 0
+        self._state = "start"
+        self._key: Optional[str] = None
+        self._received = 0
+        self.header: dict[str, Any] = {}
+        self.records: list[dict] = []
+
+    def feed(self, chunk: bytes) -> None:
+        self._received += len(chunk)
+        if self._received > settings.fhir_bundle_max_bytes:
+            raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail="Bundle too large")
+        try:
+            self._buf += self._utf8.decode(chunk)
+        except UnicodeDecodeError:
+            raise _bad_request("Bundle is not valid UTF-8")
+        self._advance(final=False)
+        if len(self._buf) - self._pos > settings.fhir_bundle_max_entry_bytes:
+            raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail="Bundle entry too large")
+        # Drop what has been consumed so the buffer only holds the entry in progress
+        self._buf, self._pos = self._buf[self._pos:], 0
+
+    def close(self) -> list[dict]:
+        try:
+            self._buf += self._utf8.decode(b"", final=True)
+        except UnicodeDecodeError:
+            raise _bad_request("Bundle is not valid UTF-8")
+        self._advance(final=True)
+        if self._state != "done" or self._buf[self._pos:].strip():
+            raise _bad_request("Malformed Bundle JSON")
+        if self.header.get("resourceType") != "Bundle":
+            raise _unprocessable("Expected a FHIR Bundle")
+        if self.header.get("type") != "transaction":
+            raise _unprocessable("Only transaction Bundles are supported")
+        return self.records
+
+    def _skip_ws(self) -> Optional[str]:
+        self._pos = _WS.match(self._buf, self._pos).end()
+        return self._buf[self._pos] if self._pos < len(self._buf) else None
+
+    def _decode(self, final: bool) -> tuple[bool, Any]:
+        try:
+            value, end = _decoder.raw_decode(self._buf, self._pos)
+        except json.JSONDecodeError:
+            if final:
+                raise _bad_request("Malformed Bundle JSON")
+            return False, None
+        if end == len(self._buf) and not final:
+            # A number at the end of the buffer may still be growing
+            return False, None
+        self._pos = end
+        return True, value
+
+    def _advance(self, final: bool) -> None:
+        while True:
+            ch = self._skip_ws()
+            if ch is None:
+                return
+            state = self._state
+            if state == "start":
+                if ch != "{":
+                    raise _bad_request("Bundle must be a JSON object")
+                self._pos += 1
+                self._state = "key"
+            elif state == "key":
+                if ch == "}":
+                    self._pos += 1
+                    self._state = "done"
+                    return
+                ok, key = self._decode(final)
+                if not ok:
+                    return
+                if not isinstance(key, str):
+                    raise _bad_request("Malformed Bundle JSON")
+                self._key, self._state = key, "colon"
+            elif state == "colon":
+                if ch != ":":
+                    raise _bad_request("Malformed Bundle JSON")
+                self._pos += 1
+                self._state = "entries" if self._key == "entry" else "value"
+            elif state == "value":
+                ok, value = self._decode(final)
+                if not ok:
+                    return
+                self.header[self._key] = value
+                self._state = "next_key"
+            elif state == "next_key":
+                if ch == ",":
+                    self._pos += 1
+                    self._state = "key"
+                elif ch == "}":
+                    self._pos += 1
+                    self._state = "done"
+                    return
+                else:
+                    raise _bad_request("Malformed Bundle JSON")
+            elif state == "entries":
+                if ch != "[":
+                    raise _bad_request("Bundle.entry must be an array")
+                self._pos += 1
+                self._state = "entry"
+            elif state == "entry":
+                if ch == "]":
+                    if self.records:  # trailing comma
+                        raise _bad_request("Malformed Bundle JSON")
+                    self._pos += 1
+                    self._state = "next_key"
+                    continue
+                ok, entry = self._decode(final)
+                if not ok:
+                    return
+                if len(self.records) >= settings.fhir_bundle_max_entries:
+                    raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail="Too many Bundle entries")
+                self.records.append(reduce_entry(entry, len(self.records)))
+                self._state = "next_entry"
+            elif state == "next_entry":
+                if ch == ",":
+                    self._pos += 1
+                    self._state = "entry"
+                elif ch == "]":
+                    self._pos += 1
+                    self._state = "next_key"
+                else:
+                    raise _bad_request("Malformed Bundle JSON")
+            else:  # done
+                return
+
+
+# -----------------------
+# Entry reduction
+# -----------------------
+
+def _first(items) -> dict:
+    return items[0] if isinstance(items, list) and items and isinstance(items[0], dict) else {}
+
+def _code_of(concept: Optional[dict]) -> Optional[str]:
+    return _first((concept or {}).get("coding")).get("code")
+
+def _reference(ref: Optional[dict]) -> Optional[dict]:
+    """
+    A Reference as {"ref": "Type/id" | fullUrl} or {"identifier": value}.
+    """
+    if not isinstance(ref, dict):
+        return None
+    if ref.get("reference"):
+        return {"ref": ref["reference"]}
+    value = (ref.get("identifier") or {}).get("value")
+    return {"identifier": value} if value else None
+
+def _human_name(names) -> tuple[Optional[str], Optional[str]]:
+    name = _first(names)
+    given = name.get("given") or []
+    return (given[0] if given else None), name.get("family")
+
+def _require(record: dict, *fields: str) -> dict:
+    missing = [f for f in fields if not record.get(f)]
+    if missing:
+        raise _unprocessable(
+            f"Bundle entry {record['index']} ({record['type']}) is missing {', '.join(missing)}"
+        )
+    return record
+
+def reduce_entry(entry: Any, index: int) -> dict:
+    """
+    Keeps only what ingest() needs from one Bundle entry.
+    """
+    if not isinstance(entry, dict) or not isinstance(entry.get("resource"), dict):
+        raise _unprocessable(f"Bundle entry {index} has no resource")
+    method = ((entry.get("request") or {}).get("method") or "POST").upper()
+    if method not in ("POST", "PUT"):
+        raise _unprocessable(f"Bundle entry {index}: only POST/PUT entries are supported")
+    res = entry["resource"]
+    rtype = res.get("resourceType")
+    keys = [k for k in (entry.get("fullUrl"), f"{rtype}/{res['id']}" if res.get("id") else None) if k]
+    record: dict[str, Any] = {"index": index, "type": rtype, "keys": keys}
+
+    if rtype == "Patient":
+        first_name, last_name = _human_name(res.get("name"))
+        record.update(
+            external_id=_first(res.get("identifier")).get("value"),
+            first_name=first_name,
+            last_name=last_name,
+            birth_date=res.get("birthDate"),
+        )
+        return _require(record, "external_id", "first_name", "last_name", "birth_date")
+
+    if rtype == "Coverage":
+        plan = next(
+            (
+                c.get("value") or c.get("name")
+                for c in res.get("class") or []
+                if (c.get("type") or {}).get("text") == "plan" or _code_of(c.get("type")) == "plan"
+            ),
+            None,
+        )
+        member_id = res.get("subscriberId") or _first(res.get("identifier")).get("value")
+        record.update(
+            external_id=_first(res.get("identifier")).get("value") or member_id,
+            member_id=member_id,
+            plan=plan,
+            payer=_first(res.get("payor")).get("display"),
+            patient=_reference(res.get("beneficiary")),
+        )
+        return _require(record, "external_id", "member_id", "plan", "payer", "patient")
+
+    if rtype == "Practitioner":
+        ids = res.get("identifier") or []
+        npi = next((i.get("value") for i in ids if i.get("system") == NPI_SYSTEM), None)
+        first_name, last_name = _human_name(res.get("name"))
+        name = _first(res.get("name")).get("text") or " ".join(p for p in (first_name, last_name) if p)
+        record.update(npi=npi, name=name or None)
+        return record
+
+    if rtype == "Claim":
+        record.update(
+            code=_code_of(_first(res.get("item")).get("productOrService")),
+            diagnosis_codes=[
+                c for c in (_code_of(d.get("diagnosisCodeableConcept")) for d in res.get("diagnosis") or []) if c
+            ],
+            patient=_reference(res.get("patient")),
+            coverage=_reference(_first(res.get("insurance")).get("coverage")),
+            provider=_reference(res.get("provider")),
+        )
+        return _require(record, "code", "patient", "coverage")
+
+    if rtype == "ServiceRequest":
+        insurance = res.get("insurance") or []
+        record.update(
+            code=_code_of(res.get("code")),
+            diagnosis_codes=[c for c in (_code_of(r) for r in res.get("reasonCode") or []) if c],
+            patient=_reference(res.get("subject")),
+            coverage=_reference(insurance[0] if insurance else None),
+            provider=_reference(res.get("requester")),
+        )
+        return _require(record, "code", "patient", "coverage")
+
+    raise _unprocessable(f"Bundle entry {index}: unsupported resourceType {rtype!r}")
+
+
+# -----------------------
+# Ingestion
+# -----------------------
+
+def _upsert(db: Session, model, rows: dict[str, dict]) -> tuple[dict[str, uuid.UUID], set[str]]:
+    """
+    Inserts rows keyed by external_id, keeping rows that already exist.
+    Returns external_id -> id for all of them and the set that was new.
+    """
+    if not rows:
+        return {}, set()
+    stmt = dialect_insert(db, model).on_conflict_do_nothing(index_elements=["external_id"])
+    created = {r.external_id for r in db.execute(stmt.returning(model.external_id), list(rows.values()))}
+    ids = dict(db.execute(select(model.external_id, model.id).where(model.external_id.in_(list(rows)))).all())
+    return ids, created
+
+def ingest(db: Session, records: list[dict]) -> dict:
+    """
+    Writes the reduced entries in one transaction and returns a
+    transaction-response Bundle. Patients and coverages whose external id
+    already exists are reused (200) rather than duplicated (201), and so is
+    an open prior auth for the same patient, coverage and code. Any error
+    rolls the whole Bundle back.
+    """
+    by_key = {key: rec for rec in records for key in rec["keys"]}
+
+    def local(ref: Optional[dict], rtype: str) -> Optional[dict]:
+        target = by_key.get(ref.get("ref")) if ref else None
+        if target is not None and target["type"] != rtype:
+            raise _unprocessable(f"Reference {ref['ref']} is not a {rtype}")
+        return target
+
+    def external(ref: dict) -> str:
+        # Literal references outside the Bundle point at our id or business id
+        return ref.get("identifier") or ref["ref"].rsplit("/", 1)[-1]
+
+    try:
+        patients = [r for r in records if r["type"] == "Patient"]
+        patient_rows = {}
+        for r in patients:
+            patient_rows.setdefault(r["external_id"], {
+                "external_id": r["external_id"],
+                "first_name": r["first_name"],
+                "last_name": r["last_name"],
+                "birth_date": r["birth_date"],
+            })
+        patient_ids, new_patients = _upsert(db, Patient, patient_rows)
+
+        def patient_id(ref: dict) -> uuid.UUID:
+            target = local(ref, "Patient")
+            if target is not None:
+                return patient_ids[target["external_id"]]
+            return pa._resolve_patient_id(db, external(ref))
+
+        coverages = [r for r in records if r["type"] == "Coverage"]
+        coverage_rows = {}
+        for r in coverages:
+            coverage_rows.setdefault(r["external_id"], {
+                "external_id": r["external_id"],
+                "member_id": r["member_id"],
+                "plan": r["plan"],
+                "payer": r["payer"],
+                "patient_id": patient_id(r["patient"]),
+            })
+        coverage_ids, new_coverages = _upsert(db, Coverage, coverage_rows)
+        payers = {ext: row["payer"] for ext, row in coverage_rows.items()}
+
+        def coverage_of(ref: dict) -> tuple[uuid.UUID, str]:
+            target = local(ref, "Coverage")
+            if target is not None:
+                ext = target["external_id"]
+                return coverage_ids[ext], payers[ext]
+            row = pa._resolve_coverage(db, external(ref))
+            return row.id, row.payer
+
+        items = []
+        requests = [r for r in records if r["type"] in ("Claim", "ServiceRequest")]
+        for r in requests:
+            coverage_id, payer = coverage_of(r["coverage"])
+            provider = local(r["provider"], "Practitioner") or {}
+            npi = provider.get("npi")
+            if r["provider"] and not provider and "identifier" in r["provider"]:
+                npi = r["provider"]["identifier"]
+            items.append({
+                "patient_id": patient_id(r["patient"]),
+                "coverage_id": coverage_id,
+                "payer": payer,
+                "code": r["code"],
+                "diagnosis_codes": r["diagnosis_codes"],
+                "provider_npi": npi,
+                "provider_name": provider.get("name"),
+            })
+        created = pa.insert_pas(db, items)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+
+    audit.record_many("create", "patient", ((patient_ids[e], patient_ids[e]) for e in new_patients))
+    audit.record_many(
+        "create", "prior_auth", ((c["id"], i["patient_id"]) for c, i in zip(created, items) if not c["duplicate"])
+    )
+    pa_results = {r["index"]: c for r, c in zip(requests, created)}
+    entries = []
+    for r in records:
+        if r["type"] == "Patient":
+            pid = patient_ids[r["external_id"]]
+            new = r["external_id"] in new_patients
+            response = {"status": "201 Created" if new else "200 OK", "location": f"/v1/patients/{pid}"}
+            new_patients.discard(r["external_id"])  # a repeated entry resolves to the same row
+        elif r["type"] == "Coverage":
+            cid = coverage_ids[r["external_id"]]
+            new = r["external_id"] in new_coverages
+            response = {"status": "201 Created" if new else "200 OK", "location": f"/v1/coverages/{cid}"}
+            new_coverages.discard(r["external_id"])
+        elif r["type"] == "Practitioner":
+            response = {"status": "200 OK"}
+            if r["npi"]:
+                response["location"] = f"/v1/providers/{r['npi']}"
+        else:
+            result = pa_results[r["index"]]
+            # A request that is already open resolves to that request
+            response = {
+                "status": "200 OK" if result["duplicate"] else "201 Created",
+                "location": f"/v1/prior-auth/requests/{result['id']}",
+                "outcome": {
+                    "resourceType": "OperationOutcome",
+                    "issue": [{"severity": "information", "code": "informational",
+                               "diagnostics": result["status"].value}],
+                },
+            }
+        entries.append({"response": response})
+    return {"resourceType": "Bundle", "type": "transaction-response", "entry": entries}
@@ -1,16 +1,143 @@
+import uuid
+from typing import Iterable, Optional
+
+from fastapi import HTTPException
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 from app.adapters import storage_local
-from app.domain.models import DocumentReference
+from app.db import commit_keep_loaded
+from app.services import audit, doc_processing
+from app.domain.models import DocumentReference, PriorAuthRequest
 
-def store_document(db: Session, *, filename: str, content_type: str, file_stream) -> DocumentReference:
-    storage_key, size = storage_local.save_file(file_stream, content_type, filename)
-    doc = DocumentReference(
+def get_pa_or_404(db: Session, pa_request_id: str | uuid.UUID) -> PriorAuthRequest:
+    try:
+        key = pa_request_id if isinstance(pa_request_id, uuid.UUID) else uuid.UUID(str(pa_request_id))
+    except ValueError:
+        key = None
+    par = db.get(PriorAuthRequest, key) if key else None
+    if not par:
+        raise HTTPException(status_code=404, detail=f"Prior auth request not found: {pa_request_id}")
+    return par
+
+def new_document(
+    *,
+    filename: str,
+    content_type: str,
+    storage_key: str,
+    size: int,
+    par: Optional[PriorAuthRequest] = None,
+    doc_type: Optional[str] = None,
+) -> DocumentReference:
+    return DocumentReference(
         filename=filename,
         content_type=content_type or "application/octet-stream",
         size_bytes=size,
         storage_key=storage_key,
+        pa_request_id=par.id if par else None,
+        patient_id=par.patient_id if par else None,
+        doc_type=(doc_type or "").strip() or None,
+    )
+
+def store_document(
+    db: Session,
+    *,
+    filename: str,
+    content_type: str,
+    file_stream,
+    pa_request_id: Optional[str] = None,
+    doc_type: Optional[str] = None,
+) -> DocumentReference:
+    # Resolve the PA before writing anything to storage
+    par = get_pa_or_404(db, pa_request_id) if pa_request_id else None
+    storage_key, size = storage_local.save_file(file_stream, content_type, filename)
+    doc = new_document(
+        filename=filename,
+        content_type=content_type,
+        storage_key=storage_key,
+        size=size,
+        par=par,
+        doc_type=doc_type,
     )
     db.add(doc)
+    # Ids and defaults are generated client-side, so the response needs no refresh
+    commit_keep_loaded(db)
+    # Extraction runs off the request path; the response only waits for the write
+    doc_processing.schedule(doc.id)
+    audit.record("create", "document", doc.id, patient_id=doc.patient_id)
+    return doc
+
+def link_document(
+    db: Session,
+    *,
+    pa_request_id: str | uuid.UUID,
+    document_id: str,
+    doc_type: Optional[str] = None,
+) -> DocumentReference:
+    """
+    Attaches an already-uploaded document to a PA (and its patient). A
+    document belongs to at most one PA and one patient; relinking to another
+    PA, or to another patient's PA, is a 409.
+    """
+    par = get_pa_or_404(db, pa_request_id)
+    try:
+        doc = db.get(DocumentReference, uuid.UUID(document_id))
+    except ValueError:
+        doc = None
+    if not doc:
+        raise HTTPException(status_code=404, detail=f"Document not found: {document_id}")
+    if doc.pa_request_id is not None and doc.pa_request_id != par.id:
+        raise HTTPException(status_code=409, detail="Document is attached to another prior auth request")
+    if doc.patient_id is not None and doc.patient_id != par.patient_id:
+        # Never move a document (and its PHI) to another patient's record
+        raise HTTPException(status_code=409, detail="Document belongs to another patient")
+
+    doc.pa_request_id = par.id
+    doc.patient_id = par.patient_id
+    if doc_type is not None:
+        doc.doc_type = doc_type.strip() or None
     db.commit()
     db.refresh(doc)
-    return doc
\ No newline at end of file
+    audit.record("update", "document", doc.id, patient_id=doc.patient_id)
+    return doc
+
+def documents_for(db: Session, pa_ids: Iterable[uuid.UUID]) -> dict[uuid.UUID, list[DocumentReference]]:
+    """
+    Attachments for a page of PAs, grouped by PA id, in one query.
+    """
+    ids = list(set(pa_ids))
+    grouped: dict[uuid.UUID, list[DocumentReference]] = {i: [] for i in ids}
+    if not ids:
+        return grouped
+    stmt = (
+        select(DocumentReference)
+        .where(DocumentReference.pa_request_id.in_(ids))
+        .order_by(DocumentReference.pa_request_id, DocumentReference.created_at, DocumentReference.id)
+    )
+    for doc in db.scalars(stmt):
+        grouped[doc.pa_request_id].append(doc)
+    return grouped
+
+def missing_docs(required_docs: list[str], documents: list[DocumentReference] | list[str]) -> list[str]:
+    """
+    Required document types not yet covered by an attachment (case-insensitive).
+    Takes the attached documents or just their doc types.
+    """
+    have = {(d if isinstance(d, str) else d.doc_type or "").casefold() for d in documents}
+    have.discard("")
+    return [r for r in required_docs if r.casefold() not in have]
+
+def document_types_for(db: Session, pa_ids: Iterable[uuid.UUID]) -> dict[uuid.UUID, list[str]]:
+    """
+    Just the doc types attached to each PA, for missing-document checks that
+    don't need the documents themselves.
+    """
+    ids = list(set(pa_ids))
+    grouped: dict[uuid.UUID, list[str]] = {i: [] for i in ids}
+    if not ids:
+        return grouped
+    stmt = select(DocumentReference.pa_request_id, DocumentReference.doc_type).where(
+        DocumentReference.pa_request_id.in_(ids), DocumentReference.doc_type.is_not(None)
+    )
+    for pa_id, doc_type in db.execute(stmt):
+        grouped[pa_id].append(doc_type)
+    return grouped
@@ -0,0 +1,186 @@
+import hashlib
+import json
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Optional
+
+from fastapi import HTTPException, status
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from sqlalchemy import and_, delete, or_, update
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db import dialect_insert
+from app.domain.models import IdempotencyKey
+
+IN_PROGRESS = "in_progress"
+COMPLETED = "completed"
+
+_POLL_SECONDS = 0.05
+_MAX_KEY_LENGTH = 255
+
+_prune_lock = threading.Lock()
+_last_prune = 0.0
+
+
+def fingerprint_of(data: Any) -> str:
+    """
+    Stable hash of the request payload, so a reused key with a different
+    body can be told apart from a genuine retry.
+    """
+    raw = json.dumps(jsonable_encoder(data), sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+def fingerprint_stream(stream, *extra: str) -> str:
+    """
+    Hashes a seekable upload stream (plus any extra fields) and rewinds it.
+    """
+    h = hashlib.sha256()
+    for part in extra:
+        h.update(part.encode())
+        h.update(b"\0")
+    while True:
+        chunk = stream.read(1024 * 1024)
+        if not chunk:
+            break
+        h.update(chunk)
+    stream.seek(0)
+    return h.hexdigest()
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _maybe_prune(db: Session) -> None:
+    global _last_prune
+    with _prune_lock:
+        if time.monotonic() - _last_prune < settings.idempotency_prune_interval_seconds:
+            return
+        _last_prune = time.monotonic()
+    db.execute(delete(IdempotencyKey).where(IdempotencyKey.expires_at < _now()))
+    db.commit()
+
+
+def _try_claim(db: Session, *, scope: str, key: str, fingerprint: str) -> bool:
+    now = _now()
+    values = {
+        "scope": scope,
+        "key": key,
+        "fingerprint": fingerprint,
+        "state": IN_PROGRESS,
+        "response_status": None,
+        "response_body": None,
+        "locked_at": now,
+        "expires_at": now + timedelta(hours=settings.idempotency_ttl_hours),
+    }
+    stmt = dialect_insert(db, IdempotencyKey).values(**values)
+    # Expired keys and claims abandoned mid-request can be taken over
+    stale = now - timedelta(seconds=settings.idempotency_lock_timeout_seconds)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["scope", "key"],
+        set_={k: v for k, v in values.items() if k not in ("scope", "key")},
+        where=or_(
+            IdempotencyKey.expires_at < now,
+            and_(IdempotencyKey.state == IN_PROGRESS, IdempotencyKey.locked_at < stale),
+        ),
+    )
+    claimed = db.execute(stmt).rowcount == 1
+    db.commit()
+    return claimed
+
+
+def claim(db: Session, *, scope: str, key: str, fingerprint: str) -> Optional[IdempotencyKey]:
+    """
+    Claims the key for this request. Returns None when the caller should do
+    the work, or the completed record whose response should be replayed.
+    A duplicate that arrives while the first request is still running waits
+    for it rather than racing it.
+    """
+    if len(key) > _MAX_KEY_LENGTH:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Idempotency-Key is too long")
+
+    _maybe_prune(db)
+    deadline = time.monotonic() + settings.idempotency_wait_seconds
+    while True:
+        if _try_claim(db, scope=scope, key=key, fingerprint=fingerprint):
+            return None
+
+        rec = db.get(IdempotencyKey, (scope, key), populate_existing=True)
+        if rec is not None:
+            if rec.fingerprint != fingerprint:
+                raise HTTPException(
+                    status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                    detail="Idempotency-Key was already used with a different request",
+                )
+            if rec.state == COMPLETED:
+                return rec
+        if time.monotonic() >= deadline:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="A request with this Idempotency-Key is still in progress",
+            )
+        # End the read transaction so the next poll sees the other request's commit
+        db.rollback()
+        time.sleep(_POLL_SECONDS)
+
+
+def complete(db: Session, *, scope: str, key: str, status_code: int, body: Any) -> None:
+    db.execute(
+        update(IdempotencyKey)
+        .where(IdempotencyKey.scope == scope, IdempotencyKey.key == key)
+        .values(state=COMPLETED, response_status=status_code, response_body=json.dumps(body))
+    )
+    db.commit()
+
+
+def release(db: Session, *, scope: str, key: str) -> None:
+    """
+    Drops an unfinished claim so a retry can run the request again.
+    """
+    db.execute(
+        delete(IdempotencyKey).where(
+            IdempotencyKey.scope == scope,
+            IdempotencyKey.key == key,
+            IdempotencyKey.state == IN_PROGRESS,
+        )
+    )
+    db.commit()
+
+
+def run_idempotent(
+    db: Session,
+    *,
+    key: Optional[str],
+    scope: str,
+    fingerprint: Optional[str],
+    status_code: int,
+    handler: Callable[[], Any],
+):
+    """
+    Runs handler at most once per (scope, key). Without a key the handler's
+    result is returned untouched; with one, the serialized response is stored
+    and replayed verbatim for retries.
+    """
+    if not key:
+        return handler()
+
+    stored = claim(db, scope=scope, key=key, fingerprint=fingerprint)
+    if stored is not None:
+        return JSONResponse(
+            content=json.loads(stored.response_body or "null"),
+            status_code=stored.response_status or status_code,
+            headers={"Idempotent-Replayed": "true"},
+        )
+
+    try:
+        body = jsonable_encoder(handler())
+    except Exception:
+        db.rollback()
+        release(db, scope=scope, key=key)
+        raise
+    complete(db, scope=scope, key=key, status_code=status_code, body=body)
+    return JSONResponse(content=body, status_code=status_code)
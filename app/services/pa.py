@@ -1,17 +1,28 @@
 # app/services/pa.py
 import uuid
+from collections import Counter
+from datetime import datetime, timezone
 from typing import Optional
 
+from sqlalchemy import case, func, insert, select, true, tuple_, update
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import IntegrityError
 
 from fastapi import HTTPException, status
 
+from app.core.config import settings
+from app.core.ids import uuid7
+from app.db import commit_keep_loaded
 from app.services.requirements import check_requirements
+from app.services.codes import normalize_diagnosis_code, unknown_codes, validation_enabled
+from app.services import aggregates, audit, providers, records, webhooks
 from app.domain.models import (
     Patient,
     Coverage,
     PriorAuthRequest,
+    PriorAuthDiagnosis,
+    DocumentReference,
+    PayerSubmission,
     PriorAuthStatus,  # re-exported from app.domain.enums via models
 )
 
@@ -32,42 +43,140 @@ def _resolve_patient_id(db: Session, ident: str | uuid.UUID) -> uuid.UUID:
     """
     Accepts a UUID or Patient.external_id. Ensures the row exists either way.
     """
-    u = _maybe_uuid(ident)
-    if u:
-        row = db.get(Patient, u)  # validate existence for UUID path
-        if not row:
-            raise HTTPException(status_code=404, detail=f"Patient not found: {ident}")
-        return row.id
-
-    row = db.query(Patient).filter(Patient.external_id == str(ident)).first()
+    row = records.get_patient(db, ident)
     if not row:
         raise HTTPException(status_code=404, detail=f"Patient not found: {ident}")
     return row.id
 
-def _resolve_coverage_id(db: Session, ident: str | uuid.UUID) -> uuid.UUID:
+def _resolve_coverage(db: Session, ident: str | uuid.UUID) -> Coverage:
     """
     Accepts a UUID or Coverage.external_id (fallback to member_id).
     Ensures the row exists either way.
     """
-    u = _maybe_uuid(ident)
-    if u:
-        row = db.get(Coverage, u)  # validate existence for UUID path
-        if not row:
-            raise HTTPException(status_code=404, detail=f"Coverage not found: {ident}")
-        return row.id
-
-    row = db.query(Coverage).filter(Coverage.external_id == str(ident)).first()
-    if not row:
+    row = records.get_coverage(db, ident)
+    if not row and not _maybe_uuid(ident):
         row = db.query(Coverage).filter(Coverage.member_id == str(ident)).first()
     if not row:
         raise HTTPException(status_code=404, detail=f"Coverage not found: {ident}")
-    return row.id
+    return row
+
+def _resolve_coverage_id(db: Session, ident: str | uuid.UUID) -> uuid.UUID:
+    return _resolve_coverage(db, ident).id
+
+def _resolve_patient_and_coverage(
+    db: Session, patient_ident: str | uuid.UUID, coverage_ident: str | uuid.UUID
+) -> tuple[Patient, Coverage]:
+    """
+    Served from the record cache when both are there; otherwise both lookups
+    in one query, and the single-row resolvers only run on a miss, to report
+    which one is missing.
+    """
+    patient, coverage = records.peek_patient(db, patient_ident), records.peek_coverage(db, coverage_ident)
+    if patient is not None and coverage is not None:
+        return patient, coverage
+    pu, cu = _maybe_uuid(patient_ident), _maybe_uuid(coverage_ident)
+    patient_match = Patient.id == pu if pu else Patient.external_id == str(patient_ident)
+    if cu:
+        coverage_match, preference = Coverage.id == cu, Coverage.id
+    else:
+        ident = str(coverage_ident)
+        coverage_match = (Coverage.external_id == ident) | (Coverage.member_id == ident)
+        # external_id wins over a member_id match, as in _resolve_coverage
+        preference = case((Coverage.external_id == ident, 0), else_=1)
+    row = db.execute(
+        select(Patient, Coverage)
+        .join(Coverage, true())  # two independent single-row lookups
+        .where(patient_match, coverage_match)
+        .order_by(preference)
+        .limit(1)
+    ).first()
+    if row is None:
+        _resolve_patient_id(db, patient_ident)
+        _resolve_coverage(db, coverage_ident)
+        raise HTTPException(status_code=404, detail="Patient or coverage not found")
+    records.remember(row[0])
+    records.remember(row[1])
+    return row[0], row[1]
+
+def has_diagnosis(code: str):
+    """
+    Filter clause for requests carrying the given ICD-10 code; resolved
+    through the (code, pa_request_id) index.
+    """
+    return PriorAuthRequest.id.in_(
+        select(PriorAuthDiagnosis.pa_request_id).where(
+            PriorAuthDiagnosis.code == normalize_diagnosis_code(code)
+        )
+    )
+
+def _normalized_diagnoses(codes: list[str]) -> list[str]:
+    seen: list[str] = []
+    for raw in codes or []:
+        c = normalize_diagnosis_code(raw)
+        if c and c not in seen:
+            seen.append(c)
+    return seen
+
+def _validate_codes(code: str, diagnoses: list[str]) -> None:
+    if not validation_enabled():
+        return
+    missing = unknown_codes(procedure=code, diagnoses=tuple(diagnoses))
+    if missing:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"Unknown code(s): {', '.join(missing)}",
+        )
+
+def _provider_fields(
+    db: Session, provider_npi: Optional[str], provider_name: Optional[str]
+) -> tuple[Optional[str], Optional[str]]:
+    if provider_npi and provider_npi.strip():
+        # The name lives on the provider row; don't duplicate it per request
+        return providers.resolve_provider(db, provider_npi, provider_name).npi, None
+    return None, provider_name
 
 def _decide_initial_status(requires: bool) -> tuple[PriorAuthStatus, str]:
     if not requires:
         return PriorAuthStatus.not_required, "No prior authorization required"
     return PriorAuthStatus.pending, "Submitted for review"
 
+# Statuses covered by uq_prior_auth_requests_open
+OPEN_STATUSES = (PriorAuthStatus.requested, PriorAuthStatus.pending)
+
+def _open_requests(
+    db: Session, keys: set[tuple[uuid.UUID, uuid.UUID, str]]
+) -> dict[tuple[uuid.UUID, uuid.UUID, str], tuple[uuid.UUID, PriorAuthStatus]]:
+    """
+    Open requests by (patient_id, coverage_id, code), for any number of keys
+    in one query; an index range scan per key on uq_prior_auth_requests_open.
+    """
+    if not keys:
+        return {}
+    stmt = select(
+        PriorAuthRequest.patient_id, PriorAuthRequest.coverage_id, PriorAuthRequest.code,
+        PriorAuthRequest.id, PriorAuthRequest.status,
+    ).where(
+        tuple_(PriorAuthRequest.patient_id, PriorAuthRequest.coverage_id, PriorAuthRequest.code).in_(list(keys)),
+        PriorAuthRequest.status.in_(OPEN_STATUSES),
+    )
+    return {(r[0], r[1], r[2]): (r[3], r[4]) for r in db.execute(stmt)}
+
+def _is_open_conflict(e: IntegrityError) -> bool:
+    # Postgres names the index; SQLite lists its columns
+    message = str(e.orig)
+    return "uq_prior_auth_requests_open" in message or "prior_auth_requests.patient_id, prior_auth_requests.coverage_id" in message
+
+def _duplicate(existing_id: uuid.UUID, existing_status: PriorAuthStatus) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_409_CONFLICT,
+        detail={
+            "message": "An open prior auth already exists for this patient, coverage and code",
+            "existing_id": str(existing_id),
+            "status": existing_status.value,
+        },
+        headers={"Location": f"/v1/prior-auth/requests/{existing_id}"},
+    )
+
 # -----------------------
 # Main entrypoint
 # -----------------------
@@ -84,19 +193,32 @@ def create_pa(
 ) -> PriorAuthRequest:
     """
     Creates a PriorAuthRequest from either UUIDs or business identifiers.
-    Returns 404 for missing patient/coverage, and 422 for integrity issues.
+    Returns 404 for missing patient/coverage, 409 (with its id) when the same
+    patient, coverage and code already has an open request, and 422 for
+    unknown codes, invalid or unknown provider NPIs, and integrity issues.
     """
-    pid = _resolve_patient_id(db, patient_id)
-    cid = _resolve_coverage_id(db, coverage_id)
+    code = code.strip().upper()
+    diagnoses = _normalized_diagnoses(diagnosis_codes)
+    _validate_codes(code, diagnoses)
 
+    patient, coverage = _resolve_patient_and_coverage(db, patient_id, coverage_id)
     requires, required_docs = check_requirements(code)
     status_val, disposition = _decide_initial_status(requires)
+    key = (patient.id, coverage.id, code)
+    if status_val in OPEN_STATUSES:
+        existing = _open_requests(db, {key}).get(key)
+        if existing:
+            raise _duplicate(*existing)
+
+    provider_npi, provider_name = _provider_fields(db, provider_npi, provider_name)
 
+    # Relationships are set from the rows already loaded, so the response can
+    # be built without reading anything back after the commit
     par = PriorAuthRequest(
-        patient_id=pid,
-        coverage_id=cid,
+        patient=patient,
+        coverage=coverage,
         code=code,
-        diagnosis_codes=",".join(diagnosis_codes or []),
+        diagnoses=[PriorAuthDiagnosis(position=i, code=c) for i, c in enumerate(diagnoses)],
         status=status_val,
         disposition=disposition,
         provider_name=provider_name,
@@ -105,17 +227,161 @@ def create_pa(
 
     db.add(par)
     try:
-        db.commit()
+        db.flush()
+        aggregates.record_created(db, par, payer=coverage.payer)
+        if status_val == PriorAuthStatus.pending and settings.payer_submission_enabled:
+            # Queued here, sent by the payer worker; never a network call in the request
+            db.add(PayerSubmission(pa_request_id=par.id, payer=coverage.payer))
+        commit_keep_loaded(db)
     except IntegrityError as e:
         db.rollback()
+        # A concurrent submission got past the check first; the index decided
+        existing = _open_requests(db, {key}).get(key) if status_val in OPEN_STATUSES else None
+        if existing:
+            raise _duplicate(*existing)
         # Surface as a client error, not a 500
         raise HTTPException(
             status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
             detail=f"Could not create prior auth: {str(e.orig) if getattr(e, 'orig', None) else str(e)}",
         )
-    db.refresh(par)
+    audit.record("create", "prior_auth", par.id, patient_id=par.patient_id)
 
     # Convenience fields (not persisted)
     par._requires = requires
     par._required_docs = required_docs
     return par
+
+# -----------------------
+# Bulk creation
+# -----------------------
+
+def insert_pas(db: Session, items: list[dict]) -> list[dict]:
+    """
+    Set-based create_pa for callers that have already resolved patients and
+    coverages (each item: patient_id, coverage_id, payer, code,
+    diagnosis_codes, provider_npi, provider_name). Same validation and
+    initial status, but one multi-row INSERT per table and one rollup bump
+    per bucket. Runs in the caller's transaction and does not commit.
+
+    An item matching an open request (already stored, or earlier in `items`)
+    is not inserted; its result carries that request's id and
+    `duplicate: True`.
+    """
+    now = datetime.now(timezone.utc)
+    pa_rows: list[dict] = []
+    diagnosis_rows: list[dict] = []
+    submission_rows: list[dict] = []
+    buckets: Counter = Counter()
+    results: list[dict] = []
+    codes = [item["code"].strip().upper() for item in items]
+    # One lookup for the whole batch; a match only counts for open items
+    open_now = _open_requests(db, {(item["patient_id"], item["coverage_id"], code) for item, code in zip(items, codes)})
+    for item, code in zip(items, codes):
+        diagnoses = _normalized_diagnoses(item.get("diagnosis_codes") or [])
+        _validate_codes(code, diagnoses)
+        requires, required_docs = check_requirements(code)
+        status_val, disposition = _decide_initial_status(requires)
+        key = (item["patient_id"], item["coverage_id"], code)
+        if status_val in OPEN_STATUSES and key in open_now:
+            existing_id, existing_status = open_now[key]
+            results.append({
+                "id": existing_id, "status": existing_status, "requires": requires,
+                "required_docs": required_docs, "duplicate": True,
+            })
+            continue
+        provider_npi, provider_name = _provider_fields(db, item.get("provider_npi"), item.get("provider_name"))
+
+        pa_id = uuid7()
+        if status_val in OPEN_STATUSES:
+            open_now[key] = (pa_id, status_val)
+        pa_rows.append({
+            "id": pa_id,
+            "patient_id": item["patient_id"],
+            "coverage_id": item["coverage_id"],
+            "code": code,
+            "status": status_val,
+            "disposition": disposition,
+            "provider_npi": provider_npi,
+            "provider_name": provider_name,
+            "created_at": now,
+            "updated_at": now,
+        })
+        diagnosis_rows.extend({"pa_request_id": pa_id, "position": i, "code": c} for i, c in enumerate(diagnoses))
+        if status_val == PriorAuthStatus.pending and settings.payer_submission_enabled:
+            submission_rows.append({
+                "pa_request_id": pa_id, "payer": item["payer"], "state": "queued", "attempts": 0, "next_attempt_at": now,
+            })
+        buckets[(now.date(), status_val, item["payer"], code)] += 1
+        results.append({
+            "id": pa_id, "status": status_val, "requires": requires, "required_docs": required_docs, "duplicate": False,
+        })
+
+    try:
+        for model, rows in ((PriorAuthRequest, pa_rows), (PriorAuthDiagnosis, diagnosis_rows), (PayerSubmission, submission_rows)):
+            if rows:
+                db.execute(insert(model), rows)
+    except IntegrityError as e:
+        if not _is_open_conflict(e):
+            raise
+        # A concurrent submission of the same open request won; the caller
+        # rolls back, and a retry finds that request
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="A matching open prior auth was created concurrently; retry",
+        )
+    for (day, status_val, payer, code), n in buckets.items():
+        aggregates.bump(db, day=day, status=status_val, payer=payer, code=code, delta=n)
+    return results
+
+# -----------------------
+# Status changes
+# -----------------------
+
+def update_pa_status(
+    db: Session,
+    par: PriorAuthRequest,
+    *,
+    new_status: PriorAuthStatus,
+    disposition: Optional[str] = None,
+) -> PriorAuthRequest:
+    """
+    Moves a request to a new status and keeps the dashboard rollups and the
+    webhook outbox in step, all in one transaction. Reopening a request is a
+    409 when the same patient, coverage and code already has an open one.
+    """
+    old_status = par.status
+    key = (par.patient_id, par.coverage_id, par.code)
+    reopening = new_status in OPEN_STATUSES and old_status not in OPEN_STATUSES
+    if reopening:
+        existing = _open_requests(db, {key}).get(key)
+        if existing:
+            raise _duplicate(*existing)
+    par.status = new_status
+    if disposition is not None:
+        par.disposition = disposition
+    aggregates.record_status_change(
+        db, par, payer=par.coverage.payer, old_status=old_status, new_status=new_status
+    )
+    if new_status != old_status:
+        webhooks.pa_status_changed(db, par, old_status=old_status)
+    try:
+        db.commit()
+    except IntegrityError as e:
+        db.rollback()
+        existing = _open_requests(db, {key}).get(key) if reopening and _is_open_conflict(e) else None
+        if existing:
+            raise _duplicate(*existing)
+        raise
+    db.refresh(par)
+    audit.record("update", "prior_auth", par.id, patient_id=par.patient_id)
+    return par
+
+def delete_pa(db: Session, par: PriorAuthRequest) -> None:
+    aggregates.record_deleted(db, par, payer=par.coverage.payer)
+    # Attachments stay with the patient; only the PA link goes
+    db.execute(
+        update(DocumentReference).where(DocumentReference.pa_request_id == par.id).values(pa_request_id=None, updated_at=func.now())
+    )
+    db.delete(par)
+    db.commit()
+    audit.record("delete", "prior_auth", par.id, patient_id=par.patient_id)
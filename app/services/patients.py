@@ -0,0 +1,82 @@
+import base64
+import binascii
+import uuid
+from typing import Optional
+
+from fastapi import HTTPException, status
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app.domain.models import Coverage, Patient
+
+
+# -----------------------
+# Cursors
+# -----------------------
+
+def encode_cursor(patient_id: uuid.UUID) -> str:
+    return base64.urlsafe_b64encode(patient_id.bytes).rstrip(b"=").decode()
+
+
+def decode_cursor(cursor: str) -> uuid.UUID:
+    try:
+        return uuid.UUID(bytes=base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except (binascii.Error, ValueError):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+
+
+# -----------------------
+# Directory
+# -----------------------
+
+def list_patients(
+    db: Session,
+    *,
+    payer: Optional[str] = None,
+    plan: Optional[str] = None,
+    last_name_prefix: Optional[str] = None,
+    cursor: Optional[str] = None,
+    limit: int = 50,
+) -> tuple[list[Patient], Optional[str]]:
+    """
+    One page of patients, newest first. Keyset pagination on the (time
+    ordered) primary key, so every page is an index range scan no matter how
+    deep the client has paged. Returns the rows and the cursor for the next
+    page, or None on the last one.
+    """
+    stmt = select(Patient)
+    if payer or plan:
+        covered = select(Coverage.patient_id).where(Coverage.patient_id == Patient.id)
+        if payer:
+            covered = covered.where(Coverage.payer == payer)
+        if plan:
+            covered = covered.where(Coverage.plan == plan)
+        stmt = stmt.where(covered.exists())
+    if last_name_prefix:
+        escaped = last_name_prefix.lower().replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        stmt = stmt.where(func.lower(Patient.last_name).like(f"{escaped}%", escape="\\"))
+    if cursor:
+        stmt = stmt.where(Patient.id < decode_cursor(cursor))
+    # One extra row tells us whether there is a next page without a COUNT
+    rows = list(db.scalars(stmt.order_by(Patient.id.desc()).limit(limit + 1)))
+    if len(rows) > limit:
+        rows = rows[:limit]
+        return rows, encode_cursor(rows[-1].id)
+    return rows, None
+
+
+def coverages_by_patient(db: Session, patient_ids: list[uuid.UUID]) -> dict[uuid.UUID, list[Coverage]]:
+    """
+    Coverages for a whole page of patients in one query.
+    """
+    grouped: dict[uuid.UUID, list[Coverage]] = {pid: [] for pid in patient_ids}
+    if patient_ids:
+        stmt = (
+            select(Coverage)
+            .where(Coverage.patient_id.in_(patient_ids))
+            .order_by(Coverage.patient_id, Coverage.created_at, Coverage.id)
+        )
+        for c in db.scalars(stmt):
+            grouped[c.patient_id].append(c)
+    return grouped
+
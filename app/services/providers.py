@@ -0,0 +1,260 @@
+import csv
+import io
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import BinaryIO, Iterator, Optional
+
+from fastapi import HTTPException, status
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db import dialect_insert
+from app.domain.models import Provider
+
+# NPPES "npidata_pfile" column headers we read; everything else is ignored
+_NPPES_COLUMNS = {
+    "npi": "NPI",
+    "entity_type": "Entity Type Code",
+    "org_name": "Provider Organization Name (Legal Business Name)",
+    "last_name": "Provider Last Name (Legal Name)",
+    "first_name": "Provider First Name",
+    "credential": "Provider Credential Text",
+    "state": "Provider Business Practice Location Address State Name",
+    "taxonomy": "Healthcare Provider Taxonomy Code_1",
+    "deactivated": "NPI Deactivation Date",
+    "reactivated": "NPI Reactivation Date",
+}
+
+
+def is_valid_npi(npi: str) -> bool:
+    """
+    10 digits whose last digit is the Luhn check digit over "80840" + the
+    first nine (the ISO prefix for US health identifiers).
+    """
+    if len(npi) != 10 or not npi.isdigit():
+        return False
+    total = 24  # Luhn contribution of the 80840 prefix
+    for i, ch in enumerate(reversed(npi[:9])):
+        d = int(ch)
+        if i % 2 == 0:
+            d *= 2
+            if d > 9:
+                d -= 9
+        total += d
+    return (10 - total % 10) % 10 == int(npi[9])
+
+
+@dataclass(frozen=True)
+class ProviderInfo:
+    npi: str
+    name: str
+
+
+class ProviderCache:
+    """
+    Bounded LRU of NPI -> ProviderInfo, shared by every request in the process.
+    """
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._items: OrderedDict[str, ProviderInfo] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, npi: str) -> Optional[ProviderInfo]:
+        with self._lock:
+            info = self._items.get(npi)
+            if info is not None:
+                self._items.move_to_end(npi)
+            return info
+
+    def put(self, info: ProviderInfo) -> None:
+        with self._lock:
+            self._items[info.npi] = info
+            self._items.move_to_end(info.npi)
+            while len(self._items) > self.maxsize:
+                self._items.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._items.clear()
+
+
+cache = ProviderCache(settings.provider_cache_size)
+
+
+def _info(p: Provider) -> ProviderInfo:
+    return ProviderInfo(npi=p.npi, name=p.name)
+
+
+def lookup(db: Session, npi: Optional[str]) -> Optional[ProviderInfo]:
+    if not npi:
+        return None
+    info = cache.get(npi)
+    if info is None:
+        p = db.get(Provider, npi)
+        if p is None:
+            return None
+        info = _info(p)
+        cache.put(info)
+    return info
+
+
+def lookup_many(db: Session, npis) -> dict[str, ProviderInfo]:
+    """
+    Resolves a set of NPIs with at most one query for the cache misses.
+    """
+    found: dict[str, ProviderInfo] = {}
+    missing = []
+    for npi in {n for n in npis if n}:
+        info = cache.get(npi)
+        if info is None:
+            missing.append(npi)
+        else:
+            found[npi] = info
+    if missing:
+        for p in db.scalars(select(Provider).where(Provider.npi.in_(missing))):
+            info = _info(p)
+            cache.put(info)
+            found[p.npi] = info
+    return found
+
+
+def resolve_provider(db: Session, npi: str, name: Optional[str] = None) -> ProviderInfo:
+    """
+    Validates the NPI and returns the registered provider. An NPI missing
+    from the registry is registered from the submitted name (inside the
+    caller's transaction); without a name it is rejected.
+    """
+    npi = npi.strip()
+    if not is_valid_npi(npi):
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=f"Invalid NPI: {npi}")
+    info = lookup(db, npi)
+    if info is not None:
+        return info
+    if not (name and name.strip()):
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=f"Unknown provider NPI: {npi}")
+
+    name = name.strip()
+    stmt = dialect_insert(db, Provider).values(npi=npi, name=name, search_name=name.lower())
+    db.execute(stmt.on_conflict_do_nothing(index_elements=["npi"]))
+    # Not cached until a later lookup: the row only exists once the caller commits
+    return _info(db.get(Provider, npi))
+
+
+def search(db: Session, prefix: str, *, limit: int = 20) -> list[Provider]:
+    """
+    Autocomplete by NPI prefix (range scan on the primary key) or by the
+    start of the provider's last/organization name.
+    """
+    prefix = prefix.strip()
+    if prefix.isdigit():
+        stmt = (
+            select(Provider)
+            .where(Provider.npi >= prefix, Provider.npi <= prefix.ljust(10, "9"))
+            .order_by(Provider.npi)
+        )
+    else:
+        escaped = prefix.lower().replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        stmt = (
+            select(Provider)
+            .where(Provider.search_name.like(f"{escaped}%", escape="\\"))
+            .order_by(Provider.search_name, Provider.npi)
+        )
+    return list(db.scalars(stmt.limit(limit)))
+
+
+# -----------------------
+# NPPES bulk load
+# -----------------------
+
+def _parse_nppes(stream: BinaryIO) -> Iterator[Optional[dict]]:
+    """
+    Yields one provider dict per row (None for rows that are skipped),
+    decoding the file incrementally so memory stays flat for the full
+    multi-gigabyte dissemination file.
+    """
+    reader = csv.reader(io.TextIOWrapper(stream, encoding="utf-8", errors="replace", newline=""))
+    header = next(reader, None)
+    if header is None:
+        return
+    pos = {h: i for i, h in enumerate(header)}
+    if _NPPES_COLUMNS["npi"] not in pos:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Not an NPPES file: missing NPI column")
+    idx = {k: pos.get(col) for k, col in _NPPES_COLUMNS.items()}
+
+    for row in reader:
+        def col(key: str) -> str:
+            i = idx[key]
+            return row[i].strip() if i is not None and i < len(row) else ""
+
+        npi = col("npi")
+        if not is_valid_npi(npi) or (col("deactivated") and not col("reactivated")):
+            yield None
+            continue
+        entity_type = int(col("entity_type")) if col("entity_type").isdigit() else None
+        if entity_type == 2:
+            name = search_name = col("org_name")
+        else:
+            first, last = col("first_name"), col("last_name")
+            name = " ".join(p for p in [first, last] if p)
+            if col("credential"):
+                name = f"{name}, {col('credential')}"
+            search_name = " ".join(p for p in [last, first] if p)
+        if not name:
+            yield None
+            continue
+        yield {
+            "npi": npi,
+            "entity_type": entity_type,
+            "name": name[:255],
+            "search_name": search_name.lower()[:255],
+            "taxonomy_code": col("taxonomy")[:16] or None,
+            "state": col("state")[:2] or None,
+        }
+
+
+def _upsert(db: Session, rows: list[dict]) -> None:
+    stmt = dialect_insert(db, Provider).values(rows)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["npi"],
+        set_={c: stmt.excluded[c] for c in ("entity_type", "name", "search_name", "taxonomy_code", "state")},
+    )
+    db.execute(stmt)
+    db.commit()
+
+
+def load_nppes(db: Session, stream: BinaryIO, *, batch_size: Optional[int] = None) -> dict[str, int]:
+    """
+    Upserts providers from an NPPES CSV in batches, committing each batch.
+    Deactivated and malformed rows are skipped.
+    """
+    batch_size = batch_size or settings.provider_load_batch_size
+    batch: dict[str, dict] = {}
+    loaded = skipped = 0
+    for rec in _parse_nppes(stream):
+        if rec is None:
+            skipped += 1
+            continue
+        batch[rec["npi"]] = rec  # a repeated NPI within one statement would conflict with itself
+        if len(batch) >= batch_size:
+            _upsert(db, list(batch.values()))
+            loaded += len(batch)
+            batch.clear()
+    if batch:
+        _upsert(db, list(batch.values()))
+        loaded += len(batch)
+    cache.clear()
+    return {"loaded": loaded, "skipped": skipped}
+
+
+if __name__ == "__main__":
+    # python -m app.services.providers npidata_pfile.csv
+    import sys
+
+    from app.db import SessionLocal, get_engine
+
+    get_engine()
+    with open(sys.argv[1], "rb") as f, SessionLocal() as session:
+        print(load_nppes(session, f))
@@ -0,0 +1,460 @@
+"""
+Read-through cache for patient, coverage and PA records.
+
+Two tiers: a bounded in-process LRU, and optionally a shared store
+(record_cache_url: memory:// for a local stand-in, redis://... across
+machines). Records are cached as column snapshots under their UUID and
+business id (external_id) and re-attached to the caller's session without a
+query, so they behave like rows loaded by that session.
+
+Concurrent misses for one key are coalesced: one caller loads, the others
+wait for its result. Every committed ORM change to a cached record (all
+updates and deletes go through the ORM) invalidates its keys in both tiers.
+Other processes' local copies expire after record_cache_local_ttl_seconds.
+"""
+import json
+import logging
+import threading
+import time
+import uuid
+from collections import Counter, OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime
+from enum import Enum
+from typing import Callable, Optional, Protocol
+
+from sqlalchemy import event, inspect, select
+from sqlalchemy.orm import Session, make_transient_to_detached
+from sqlalchemy.orm.attributes import set_committed_value
+
+from app.core.config import settings
+from app.domain.models import Coverage, Patient, PriorAuthDiagnosis, PriorAuthRequest
+
+log = logging.getLogger(__name__)
+
+
+# -----------------------
+# Shared stores
+# -----------------------
+
+class SharedStore(Protocol):
+    def get(self, key: str) -> Optional[str]: ...
+    def set(self, key: str, value: str, ttl: float) -> None: ...
+    def delete(self, *keys: str) -> None: ...
+
+
+class LocalStore:
+    """
+    In-process stand-in for a shared cache server (development and tests);
+    two RecordCaches sharing one LocalStore behave like two machines.
+    """
+
+    def __init__(self):
+        self._items: dict[str, tuple[float, str]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            item = self._items.get(key)
+            if item is None or item[0] < time.monotonic():
+                self._items.pop(key, None)
+                return None
+            return item[1]
+
+    def set(self, key: str, value: str, ttl: float) -> None:
+        with self._lock:
+            self._items[key] = (time.monotonic() + ttl, value)
+
+    def delete(self, *keys: str) -> None:
+        with self._lock:
+            for key in keys:
+                self._items.pop(key, None)
+
+
+class RedisStore:
+    def __init__(self, url: str, prefix: str = "records:"):
+        try:
+            import redis
+        except ImportError as e:  # optional dependency
+            raise RuntimeError("record_cache_url uses redis:// but the 'redis' package is not installed") from e
+        self._redis = redis.Redis.from_url(url, socket_timeout=0.5)
+        self._prefix = prefix
+
+    def get(self, key: str) -> Optional[str]:
+        value = self._redis.get(self._prefix + key)
+        return value.decode() if value is not None else None
+
+    def set(self, key: str, value: str, ttl: float) -> None:
+        self._redis.set(self._prefix + key, value, px=int(ttl * 1000))
+
+    def delete(self, *keys: str) -> None:
+        if keys:
+            self._redis.delete(*(self._prefix + k for k in keys))
+
+
+def build_store(url: str) -> Optional[SharedStore]:
+    if not url:
+        return None
+    if url.startswith("memory://"):
+        return LocalStore()
+    if url.startswith(("redis://", "rediss://")):
+        return RedisStore(url)
+    raise ValueError(f"Unsupported record cache store: {url}")
+
+
+# -----------------------
+# Cache
+# -----------------------
+
+@dataclass
+class _Flight:
+    done: threading.Event = field(default_factory=threading.Event)
+    value: Optional[dict] = None
+    failed: bool = False
+
+
+class RecordCache:
+    """
+    LRU of key -> record snapshot (dict), in front of an optional shared
+    store, with single-flight loading.
+    """
+
+    def __init__(self, maxsize: int, local_ttl: float, shared_ttl: float, store: Optional[SharedStore] = None):
+        self.maxsize = maxsize
+        self.local_ttl = local_ttl
+        self.shared_ttl = shared_ttl
+        self.store = store
+        self.stats: Counter = Counter()
+        self._items: OrderedDict[str, tuple[float, dict]] = OrderedDict()
+        self._flights: dict[str, _Flight] = {}
+        self._lock = threading.Lock()
+        # Bumped by every invalidation; a load that overlapped one isn't stored
+        self._generation = 0
+
+    def _get_local(self, key: str) -> Optional[dict]:
+        with self._lock:
+            item = self._items.get(key)
+            if item is None:
+                return None
+            if item[0] < time.monotonic():
+                del self._items[key]
+                return None
+            self._items.move_to_end(key)
+            return item[1]
+
+    def _put_local(self, key: str, value: dict) -> None:
+        with self._lock:
+            self._items[key] = (time.monotonic() + self.local_ttl, value)
+            self._items.move_to_end(key)
+            while len(self._items) > self.maxsize:
+                self._items.popitem(last=False)
+
+    def _get_shared(self, key: str, decode: Callable[[str], dict]) -> Optional[dict]:
+        if self.store is None:
+            return None
+        try:
+            raw = self.store.get(key)
+        except Exception:
+            log.warning("record cache store unavailable; reading through", exc_info=True)
+            return None
+        return decode(raw) if raw is not None else None
+
+    def peek(self, key: str) -> Optional[dict]:
+        """
+        Local tier only; never loads.
+        """
+        value = self._get_local(key)
+        self.stats["hit" if value is not None else "peek_miss"] += 1
+        return value
+
+    def get(
+        self,
+        key: str,
+        load: Callable[[], Optional[dict]],
+        *,
+        encode: Callable[[dict], str],
+        decode: Callable[[str], dict],
+        aliases: Callable[[dict], list[str]] = lambda value: [],
+    ) -> Optional[dict]:
+        """
+        Returns the record for `key`, loading it on a miss. `aliases` names
+        the record's other keys, which are filled along with this one.
+        """
+        value = self._get_local(key)
+        if value is not None:
+            self.stats["hit"] += 1
+            return value
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+                generation = self._generation
+        if not leader:
+            self.stats["coalesced"] += 1
+            flight.done.wait()
+            return load() if flight.failed else flight.value
+
+        try:
+            value = self._get_shared(key, decode)
+            from_store = value is not None
+            if not from_store:
+                self.stats["load"] += 1
+                value = load()
+            if value is not None and generation == self._generation:
+                keys = [key, *aliases(value)]
+                for k in keys:
+                    self._put_local(k, value)
+                if not from_store:
+                    self._put_shared(keys, value, encode)
+            flight.value = value
+        except BaseException:
+            flight.failed = True
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
+        return value
+
+    def _put_shared(self, keys: list[str], value: dict, encode: Callable[[dict], str]) -> None:
+        if self.store is None:
+            return
+        try:
+            raw = encode(value)
+            for k in keys:
+                self.store.set(k, raw, self.shared_ttl)
+        except Exception:
+            log.warning("record cache store unavailable; not shared", exc_info=True)
+
+    def put(self, keys: list[str], value: dict, *, encode: Callable[[dict], str]) -> None:
+        for k in keys:
+            self._put_local(k, value)
+        self._put_shared(keys, value, encode)
+
+    def invalidate(self, *keys: str) -> None:
+        with self._lock:
+            self._generation += 1
+            for key in keys:
+                self._items.pop(key, None)
+        if self.store is not None and keys:
+            try:
+                self.store.delete(*keys)
+            except Exception:
+                log.error("could not invalidate %s in the record cache store", keys, exc_info=True)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._generation += 1
+            self._items.clear()
+
+
+cache = RecordCache(
+    settings.record_cache_size,
+    settings.record_cache_local_ttl_seconds,
+    settings.record_cache_ttl_seconds,
+    build_store(settings.record_cache_url),
+)
+
+
+# -----------------------
+# Snapshots
+# -----------------------
+
+def _snapshot(obj) -> dict:
+    return {c.key: getattr(obj, c.key) for c in obj.__table__.columns}
+
+
+def _encode(value: dict) -> str:
+    def default(v):
+        if isinstance(v, Enum):
+            return v.value
+        if isinstance(v, datetime):
+            return v.isoformat()
+        return str(v)  # UUID
+    return json.dumps(value, default=default)
+
+
+def _decoder(model):
+    converters = {}
+    for c in model.__table__.columns:
+        python_type = getattr(c.type, "enum_class", None)
+        if python_type is None:
+            try:
+                python_type = c.type.python_type
+            except NotImplementedError:
+                continue
+        if python_type is uuid.UUID:
+            converters[c.key] = uuid.UUID
+        elif python_type is datetime:
+            converters[c.key] = datetime.fromisoformat
+        elif isinstance(python_type, type) and issubclass(python_type, Enum):
+            converters[c.key] = python_type
+
+    def decode(raw: str) -> dict:
+        value = json.loads(raw)
+        for key, convert in converters.items():
+            if value.get(key) is not None:
+                value[key] = convert(value[key])
+        return value
+    return decode
+
+
+def _attach(db: Session, model, value: dict):
+    """
+    Adds a cached snapshot to the session as a persistent, unmodified object
+    (merge(load=False) trusts the given state and emits no SELECT). A copy the
+    session already holds wins, so pending changes are never overwritten.
+    """
+    mapper = inspect(model)
+    existing = db.identity_map.get(mapper.identity_key_from_primary_key([value[c.key] for c in mapper.primary_key]))
+    if existing is not None:
+        return existing
+    obj = model(**{c.key: value[c.key] for c in model.__table__.columns})
+    make_transient_to_detached(obj)
+    return db.merge(obj, load=False)
+
+
+def _maybe_uuid(ident) -> Optional[uuid.UUID]:
+    if isinstance(ident, uuid.UUID):
+        return ident
+    try:
+        return uuid.UUID(str(ident))
+    except ValueError:
+        return None
+
+
+# -----------------------
+# Patients and coverages
+# -----------------------
+
+_decoders = {model: _decoder(model) for model in (Patient, Coverage, PriorAuthRequest)}
+_prefixes = {Patient: "patient", Coverage: "coverage"}
+
+
+def _keys(model, value: dict) -> list[str]:
+    prefix = _prefixes[model]
+    return [f"{prefix}:id:{value['id']}", f"{prefix}:ext:{value['external_id']}"]
+
+
+def _get(db: Session, model, ident):
+    u = _maybe_uuid(ident)
+    if u is not None:
+        key, where = f"{_prefixes[model]}:id:{u}", model.id == u
+    else:
+        key, where = f"{_prefixes[model]}:ext:{ident}", model.external_id == str(ident)
+    if not settings.record_cache_enabled:
+        return db.scalars(select(model).where(where)).first()
+
+    def load() -> Optional[dict]:
+        row = db.scalars(select(model).where(where)).first()
+        return _snapshot(row) if row is not None else None
+
+    value = cache.get(
+        key, load, encode=_encode, decode=_decoders[model], aliases=lambda v: [k for k in _keys(model, v) if k != key]
+    )
+    return _attach(db, model, value) if value is not None else None
+
+
+def _peek(db: Session, model, ident):
+    if not settings.record_cache_enabled:
+        return None
+    u = _maybe_uuid(ident)
+    value = cache.peek(f"{_prefixes[model]}:{'id' if u else 'ext'}:{u or ident}")
+    return _attach(db, model, value) if value is not None else None
+
+
+def remember(obj) -> None:
+    """
+    Caches a record the caller just loaded itself.
+    """
+    if settings.record_cache_enabled:
+        model = type(obj)
+        value = _snapshot(obj)
+        cache.put(_keys(model, value), value, encode=_encode)
+
+
+def get_patient(db: Session, ident) -> Optional[Patient]:
+    """
+    By UUID or external_id.
+    """
+    return _get(db, Patient, ident)
+
+
+def get_coverage(db: Session, ident) -> Optional[Coverage]:
+    """
+    By UUID or external_id.
+    """
+    return _get(db, Coverage, ident)
+
+
+def peek_patient(db: Session, ident) -> Optional[Patient]:
+    return _peek(db, Patient, ident)
+
+
+def peek_coverage(db: Session, ident) -> Optional[Coverage]:
+    return _peek(db, Coverage, ident)
+
+
+# -----------------------
+# Prior auths
+# -----------------------
+
+def get_prior_auth(db: Session, pa_id: uuid.UUID) -> Optional[PriorAuthRequest]:
+    """
+    A PA with its diagnoses and patient, for read-only use: write paths load
+    the row themselves so they never act on a stale copy.
+    """
+    if not settings.record_cache_enabled:
+        return db.get(PriorAuthRequest, pa_id)
+
+    def load() -> Optional[dict]:
+        par = db.get(PriorAuthRequest, pa_id)
+        if par is None:
+            return None
+        return {**_snapshot(par), "diagnoses": par.diagnosis_codes}
+
+    value = cache.get(f"pa:id:{pa_id}", load, encode=_encode, decode=_decoders[PriorAuthRequest])
+    if value is None:
+        return None
+    par = _attach(db, PriorAuthRequest, value)
+    diagnoses = [
+        _attach(db, PriorAuthDiagnosis, {"pa_request_id": par.id, "position": i, "code": code})
+        for i, code in enumerate(value["diagnoses"])
+    ]
+    set_committed_value(par, "diagnoses", diagnoses)
+    set_committed_value(par, "patient", get_patient(db, par.patient_id))
+    return par
+
+
+# -----------------------
+# Invalidation
+# -----------------------
+
+def _stale_keys(obj) -> list[str]:
+    if isinstance(obj, (Patient, Coverage)):
+        return _keys(type(obj), {"id": obj.id, "external_id": obj.external_id})
+    if isinstance(obj, PriorAuthRequest):
+        return [f"pa:id:{obj.id}"]
+    if isinstance(obj, PriorAuthDiagnosis):
+        return [f"pa:id:{obj.pa_request_id}"]
+    return []
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_stale(session, flush_context):
+    stale = [k for obj in (*session.dirty, *session.deleted) for k in _stale_keys(obj)]
+    if stale:
+        session.info.setdefault("record_cache_stale", set()).update(stale)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_committed(session):
+    stale = session.info.pop("record_cache_stale", None)
+    if stale:
+        cache.invalidate(*stale)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_stale(session):
+    session.info.pop("record_cache_stale", None)
@@ -1,3 +1,5 @@
+from functools import lru_cache
+
 from app.core.config import settings
 
 _CODE_RULES = {
@@ -6,11 +8,18 @@ _CODE_RULES = {
     "97110": {"requires": False, "docs": []},  # Therapeutic exercises
 }
 
+@lru_cache(maxsize=1)
+def compiled_rules() -> dict[str, tuple[bool, tuple[str, ...]]]:
+    """
+    Frozen lookup table built once per process (eagerly during app warm-up).
+    """
+    return {code: (bool(r["requires"]), tuple(r["docs"])) for code, r in _CODE_RULES.items()}
+
 # Return whether prior auth is required and a list of required documents.
 def check_requirements(code: str) -> tuple[bool, list[str]]:
-    rule = _CODE_RULES.get(code)
+    rule = compiled_rules().get(code)
     if not rule:
         if settings.env == "test":
             return False, []   # friendlier default for tests
         return True, ["Clinical notes"]  # conservative default for prod
-    return rule["requires"], rule["docs"]
\ No newline at end of file
+    return rule[0], list(rule[1])
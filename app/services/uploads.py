@@ -0,0 +1,190 @@
+import hashlib
+import re
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from fastapi import HTTPException, status
+from sqlalchemy import delete, select
+from sqlalchemy.orm import Session
+
+from app.adapters import storage_local
+from app.core.config import settings
+from app.db import dialect_insert
+from app.domain.models import DocumentReference, UploadChunk, UploadSession
+from app.services import audit, doc_processing
+from app.services.files import get_pa_or_404, new_document
+
+_HEX_SHA256 = re.compile(r"^[0-9a-f]{64}$")
+
+_prune_lock = threading.Lock()
+_last_prune = 0.0
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _as_utc(dt: datetime) -> datetime:
+    # SQLite hands back naive datetimes
+    return dt if dt.tzinfo else dt.replace(tzinfo=timezone.utc)
+
+
+def _check_digest(value: Optional[str], what: str) -> Optional[str]:
+    if value is None:
+        return None
+    value = value.strip().lower()
+    if not _HEX_SHA256.match(value):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"{what} must be a hex SHA-256 digest")
+    return value
+
+
+def _maybe_prune(db: Session) -> None:
+    global _last_prune
+    with _prune_lock:
+        if time.monotonic() - _last_prune < settings.upload_prune_interval_seconds:
+            return
+        _last_prune = time.monotonic()
+    expired = db.scalars(
+        select(UploadSession).where(UploadSession.expires_at < _now(), UploadSession.document_id.is_(None))
+    ).all()
+    for s in expired:
+        storage_local.discard_chunks(s.id.hex)
+        db.delete(s)
+    db.commit()
+
+
+def create_session(
+    db: Session,
+    *,
+    filename: str,
+    content_type: str,
+    size_bytes: int,
+    chunk_size: Optional[int] = None,
+    sha256: Optional[str] = None,
+    pa_request_id: Optional[str] = None,
+    doc_type: Optional[str] = None,
+) -> UploadSession:
+    _maybe_prune(db)
+    chunk_size = chunk_size or settings.upload_default_chunk_size
+    if not 0 < size_bytes <= settings.upload_max_size:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="size_bytes out of range")
+    if not settings.upload_min_chunk_size <= chunk_size <= settings.upload_max_chunk_size:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"chunk_size must be between {settings.upload_min_chunk_size} and {settings.upload_max_chunk_size}",
+        )
+    par = get_pa_or_404(db, pa_request_id) if pa_request_id else None
+    session = UploadSession(
+        filename=filename,
+        content_type=content_type or "application/octet-stream",
+        size_bytes=size_bytes,
+        chunk_size=chunk_size,
+        sha256=_check_digest(sha256, "sha256"),
+        pa_request_id=par.id if par else None,
+        doc_type=doc_type,
+        expires_at=_now() + timedelta(hours=settings.upload_session_ttl_hours),
+    )
+    db.add(session)
+    db.commit()
+    db.refresh(session)
+    return session
+
+
+def get_session_or_404(db: Session, upload_id: str) -> UploadSession:
+    try:
+        session = db.get(UploadSession, uuid.UUID(upload_id))
+    except ValueError:
+        session = None
+    if session is None or (session.document_id is None and _as_utc(session.expires_at) < _now()):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Upload session not found")
+    return session
+
+
+def expected_chunk_size(session: UploadSession, index: int) -> int:
+    if index == session.chunk_count - 1:
+        return session.size_bytes - session.chunk_size * index
+    return session.chunk_size
+
+
+def put_chunk(db: Session, session: UploadSession, index: int, data: bytes, sha256: str) -> UploadChunk:
+    """
+    Stores one chunk after checking its size and digest. Chunks may arrive in
+    any order, and re-sending an index replaces the earlier copy.
+    """
+    if session.document_id is not None:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Upload already completed")
+    if not 0 <= index < session.chunk_count:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Chunk index out of range 0..{session.chunk_count - 1}")
+    expected = expected_chunk_size(session, index)
+    if len(data) != expected:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Chunk {index} must be {expected} bytes, got {len(data)}",
+        )
+    digest = hashlib.sha256(data).hexdigest()
+    if digest != _check_digest(sha256, "X-Chunk-SHA256"):
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=f"Chunk {index} checksum mismatch")
+
+    storage_local.save_chunk(session.id.hex, index, data)
+    stmt = dialect_insert(db, UploadChunk).values(session_id=session.id, index=index, size_bytes=len(data), sha256=digest)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["session_id", "index"],
+        set_={"size_bytes": stmt.excluded.size_bytes, "sha256": stmt.excluded.sha256},
+    )
+    db.execute(stmt)
+    db.commit()
+    return UploadChunk(session_id=session.id, index=index, size_bytes=len(data), sha256=digest)
+
+
+def received_indexes(db: Session, session: UploadSession) -> list[int]:
+    return list(db.scalars(select(UploadChunk.index).where(UploadChunk.session_id == session.id).order_by(UploadChunk.index)))
+
+
+def complete(db: Session, session: UploadSession) -> DocumentReference:
+    """
+    Assembles the chunks into one stored file, verifies the whole-file digest
+    when one was declared, and registers the document. Completing twice
+    returns the same document.
+    """
+    # Row lock serializes concurrent completes of the same session
+    db.refresh(session, with_for_update=True)
+    if session.document_id is not None:
+        return db.get(DocumentReference, session.document_id)
+
+    have = set(received_indexes(db, session))
+    missing = [i for i in range(session.chunk_count) if i not in have]
+    if missing:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail={"message": "Upload is missing chunks", "missing": missing},
+        )
+
+    storage_key, size, digest = storage_local.assemble_chunks(session.id.hex, session.chunk_count)
+    if size != session.size_bytes or (session.sha256 and digest != session.sha256):
+        storage_local.delete_file(storage_key)
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail="Assembled file checksum mismatch")
+
+    par = get_pa_or_404(db, session.pa_request_id) if session.pa_request_id else None
+    doc = new_document(
+        filename=session.filename,
+        content_type=session.content_type,
+        storage_key=storage_key,
+        size=size,
+        par=par,
+        doc_type=session.doc_type,
+    )
+    db.add(doc)
+    db.flush()
+    # Document and session link commit together, so a retried complete can't
+    # create a second document
+    session.document_id = doc.id
+    db.execute(delete(UploadChunk).where(UploadChunk.session_id == session.id))
+    db.commit()
+    storage_local.discard_chunks(session.id.hex)
+    doc_processing.schedule(doc.id)
+    db.refresh(doc)
+    audit.record("create", "document", doc.id, patient_id=doc.patient_id)
+    return doc
@@ -0,0 +1,115 @@
+"""
+Webhook subscriptions and the delivery outbox.
+
+Events are written to webhook_deliveries in the caller's transaction, so a
+status change and its notification commit (or roll back) together; the
+webhook worker delivers them afterwards. Deliveries are signed:
+
+    X-Webhook-Timestamp: <unix seconds>
+    X-Webhook-Signature: v1=<hex HMAC-SHA256(secret, "<timestamp>.<body>")>
+"""
+import hashlib
+import hmac
+import json
+import secrets
+import uuid
+from datetime import datetime, timezone
+from typing import Optional
+
+from fastapi import HTTPException, status
+from sqlalchemy import insert, select
+from sqlalchemy.orm import Session
+
+from app.core.ids import uuid7
+from app.db import commit_keep_loaded
+from app.domain.enums import PriorAuthStatus
+from app.domain.models import PriorAuthRequest, WebhookDelivery, WebhookSubscription
+
+PA_STATUS_CHANGED = "pa.status_changed"
+
+
+def sign(secret: str, timestamp: int, body: bytes) -> str:
+    mac = hmac.new(secret.encode(), f"{timestamp}.".encode() + body, hashlib.sha256)
+    return f"v1={mac.hexdigest()}"
+
+
+def verify(secret: str, timestamp: int, body: bytes, signature: str) -> bool:
+    return hmac.compare_digest(sign(secret, timestamp, body), signature)
+
+
+# -----------------------
+# Outbox
+# -----------------------
+
+def enqueue(db: Session, event_type: str, data: dict) -> int:
+    """
+    Adds one delivery per subscription to the session's transaction; the
+    caller commits. Returns the number of subscribers.
+    """
+    subscription_ids = db.scalars(select(WebhookSubscription.id)).all()
+    if not subscription_ids:
+        return 0
+    now = datetime.now(timezone.utc)
+    event_id = uuid7()
+    payload = json.dumps({"id": str(event_id), "type": event_type, "occurred_at": now.isoformat(), "data": data})
+    db.execute(insert(WebhookDelivery), [
+        {
+            "id": uuid7(), "event_id": event_id, "subscription_id": sid, "event_type": event_type,
+            "payload": payload, "state": "pending", "attempts": 0, "next_attempt_at": now, "created_at": now,
+        }
+        for sid in subscription_ids
+    ])
+    return len(subscription_ids)
+
+
+def pa_status_changed(db: Session, par: PriorAuthRequest, *, old_status: PriorAuthStatus) -> int:
+    # Identifiers only: subscribers fetch the PA if they need the PHI
+    return enqueue(db, PA_STATUS_CHANGED, {
+        "id": str(par.id),
+        "status": par.status.value,
+        "previous_status": old_status.value if old_status else None,
+        "disposition": par.disposition or "",
+        "code": par.code,
+        "patient_id": str(par.patient_id),
+        "coverage_id": str(par.coverage_id),
+    })
+
+
+# -----------------------
+# Subscriptions
+# -----------------------
+
+def create_subscription(db: Session, *, url: str, secret: Optional[str], description: str = "") -> WebhookSubscription:
+    sub = WebhookSubscription(url=url, secret=secret or secrets.token_urlsafe(32), description=description)
+    db.add(sub)
+    commit_keep_loaded(db)
+    return sub
+
+
+def delete_subscription(db: Session, subscription_id: uuid.UUID) -> None:
+    sub = db.get(WebhookSubscription, subscription_id)
+    if sub is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Webhook not found")
+    db.delete(sub)
+    db.commit()
+
+
+def dead_letters(db: Session, *, limit: int = 100) -> list[WebhookDelivery]:
+    stmt = (
+        select(WebhookDelivery)
+        .where(WebhookDelivery.state == "dead")
+        .order_by(WebhookDelivery.created_at.desc())
+        .limit(limit)
+    )
+    return list(db.scalars(stmt))
+
+
+def requeue(db: Session, delivery_id: uuid.UUID) -> WebhookDelivery:
+    d = db.get(WebhookDelivery, delivery_id)
+    if d is None or d.state != "dead":
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Dead-lettered delivery not found")
+    d.state = "pending"
+    d.attempts = 0
+    d.next_attempt_at = datetime.now(timezone.utc)
+    db.commit()
+    return d
@@ -0,0 +1 @@
+# Background processes that run outside the API (python -m app.workers.<name>)
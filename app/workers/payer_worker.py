@@ -0,0 +1,200 @@
+"""
+Drains payer_submissions: submits queued PAs to their payer, polls submitted
+ones for a decision, and applies decisions through the PA service.
+
+    python -m app.workers.payer_worker
+
+Several workers can run at once: due rows are claimed with
+FOR UPDATE SKIP LOCKED and leased for payer_lease_seconds.
+"""
+import asyncio
+import logging
+import signal
+import uuid
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.adapters.payer_gateway import (
+    CircuitOpenError,
+    Decision,
+    PayerError,
+    PayerGateway,
+    backoff_delay,
+    build_pas_bundle,
+)
+from app.core.config import settings
+from app.db import SessionLocal, get_engine
+from app.domain.enums import PriorAuthStatus
+from app.domain.models import PayerSubmission, PriorAuthRequest
+from app.services import providers
+from app.services.pa import update_pa_status
+
+log = logging.getLogger(__name__)
+
+OPEN_STATES = ("queued", "submitted")
+
+
+@dataclass(frozen=True)
+class Job:
+    pa_id: uuid.UUID
+    payer: str
+    state: str
+    tracking_id: Optional[str]
+    bundle: Optional[dict]
+
+
+def _session() -> Session:
+    get_engine()
+    return SessionLocal()
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _bundle_for(db: Session, par: PriorAuthRequest) -> dict:
+    p, c = par.patient, par.coverage
+    provider = providers.lookup(db, par.provider_npi)
+    return build_pas_bundle(
+        pa_id=str(par.id),
+        code=par.code,
+        diagnosis_codes=par.diagnosis_codes,
+        patient={"id": str(p.id), "external_id": p.external_id, "first_name": p.first_name,
+                 "last_name": p.last_name, "birth_date": p.birth_date},
+        coverage={"id": str(c.id), "member_id": c.member_id, "payer": c.payer, "plan": c.plan},
+        provider_npi=par.provider_npi,
+        provider_name=provider.name if provider else par.provider_name,
+    )
+
+
+def claim_due(limit: int) -> list[Job]:
+    """
+    Claims up to `limit` due submissions and leases them, so other workers
+    skip them while the payer calls are in flight.
+    """
+    now = _now()
+    with _session() as db:
+        rows = db.scalars(
+            select(PayerSubmission)
+            .where(PayerSubmission.state.in_(OPEN_STATES), PayerSubmission.next_attempt_at <= now)
+            .order_by(PayerSubmission.next_attempt_at)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        ).all()
+        jobs = []
+        for sub in rows:
+            bundle = None
+            if sub.state == "queued":
+                par = db.get(PriorAuthRequest, sub.pa_request_id)
+                bundle = _bundle_for(db, par)
+            jobs.append(Job(sub.pa_request_id, sub.payer, sub.state, sub.tracking_id, bundle))
+            sub.next_attempt_at = now + timedelta(seconds=settings.payer_lease_seconds)
+        db.commit()
+    return jobs
+
+
+def record_outcome(pa_id: uuid.UUID, *, decision: Optional[Decision] = None, error: Optional[PayerError] = None) -> None:
+    now = _now()
+    with _session() as db:
+        sub = db.get(PayerSubmission, pa_id)
+        if sub is None:
+            return
+        if error is not None:
+            if isinstance(error, CircuitOpenError):
+                # The payer is known to be down; don't burn an attempt
+                sub.next_attempt_at = now + timedelta(seconds=settings.payer_breaker_reset_seconds)
+            else:
+                sub.attempts += 1
+                sub.last_error = str(error)[:255]
+                if not error.retryable or sub.attempts >= settings.payer_max_attempts:
+                    sub.state = "failed"
+                    log.warning("payer submission for %s failed: %s", pa_id, sub.last_error)
+                else:
+                    sub.next_attempt_at = now + timedelta(seconds=backoff_delay(sub.attempts) + settings.payer_backoff_base_seconds)
+            db.commit()
+            return
+
+        sub.last_error = None
+        if sub.state == "queued":
+            sub.state = "submitted"
+            sub.tracking_id = decision.tracking_id
+            sub.submitted_at = now
+        if decision.status == "pending":
+            sub.next_attempt_at = now + timedelta(seconds=settings.payer_poll_interval_seconds)
+            db.commit()
+            return
+
+        sub.state = "decided"
+        sub.decided_at = now
+        par = db.get(PriorAuthRequest, pa_id)
+        if par is not None and par.status == PriorAuthStatus.pending:
+            # Commits the submission change together with the status and rollups
+            update_pa_status(db, par, new_status=PriorAuthStatus(decision.status), disposition=decision.disposition or None)
+        else:
+            # Already decided by hand; keep that
+            db.commit()
+
+
+async def _process(gateway: PayerGateway, job: Job) -> None:
+    try:
+        client = gateway.client_for(job.payer)
+        if job.state == "queued":
+            decision = await client.submit(job.bundle)
+        else:
+            decision = await client.poll(job.tracking_id)
+    except PayerError as e:
+        await asyncio.to_thread(record_outcome, job.pa_id, error=e)
+        return
+    except Exception as e:
+        log.exception("unexpected error talking to payer %s", job.payer)
+        await asyncio.to_thread(record_outcome, job.pa_id, error=PayerError(str(e), retryable=True))
+        return
+    await asyncio.to_thread(record_outcome, job.pa_id, decision=decision)
+
+
+async def run_once(gateway: PayerGateway) -> int:
+    """
+    One pass over due work; payer calls run concurrently, bounded per payer
+    by each client's in-flight limit.
+    """
+    jobs = await asyncio.to_thread(claim_due, settings.payer_worker_batch_size)
+    await asyncio.gather(*(_process(gateway, job) for job in jobs))
+    return len(jobs)
+
+
+async def run_forever(stop: asyncio.Event, gateway: Optional[PayerGateway] = None) -> None:
+    gateway = gateway or PayerGateway()
+    try:
+        while not stop.is_set():
+            if await run_once(gateway) == 0:
+                try:
+                    await asyncio.wait_for(stop.wait(), timeout=settings.payer_worker_idle_seconds)
+                except asyncio.TimeoutError:
+                    pass
+    finally:
+        await gateway.aclose()
+
+
+def main() -> None:
+    from app.core.logging import configure_logging
+
+    configure_logging()
+
+    async def _main():
+        stop = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(sig, stop.set)
+        log.info("payer worker started")
+        await run_forever(stop)
+        log.info("payer worker stopped")
+
+    asyncio.run(_main())
+
+
+if __name__ == "__main__":
+    main()
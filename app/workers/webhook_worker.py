@@ -0,0 +1,167 @@
+"""
+Drains webhook_deliveries: claims due events, batches them per subscription
+into one signed POST each, and records the outcome.
+
+    python -m app.workers.webhook_worker
+
+Several workers can run at once: due rows are claimed with
+FOR UPDATE SKIP LOCKED and leased for webhook_lease_seconds. Failed batches
+are retried with jittered exponential backoff; after webhook_max_attempts
+(or a non-retryable response) their events are dead-lettered.
+"""
+import asyncio
+import json
+import logging
+import random
+import signal
+import uuid
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session
+
+from app.adapters.webhook_sender import DeliveryError, WebhookSender
+from app.core.config import settings
+from app.db import SessionLocal, get_engine
+from app.domain.models import WebhookDelivery, WebhookSubscription
+
+log = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class Batch:
+    url: str
+    secret: str
+    ids: list[uuid.UUID]
+    attempts: int
+    events: list[dict]
+
+
+def _session() -> Session:
+    get_engine()
+    return SessionLocal()
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def backoff_delay(attempts: int) -> float:
+    # Equal jitter: at least half the exponential delay, so retries keep backing off
+    delay = min(settings.webhook_backoff_max_seconds, settings.webhook_backoff_base_seconds * 2 ** max(attempts - 1, 0))
+    return delay / 2 + random.uniform(0, delay / 2)
+
+
+def claim_due(limit: int) -> list[Batch]:
+    """
+    Claims up to `limit` due deliveries, leases them, and groups them into
+    per-subscription batches in event order.
+    """
+    now = _now()
+    with _session() as db:
+        rows = db.execute(
+            select(WebhookDelivery, WebhookSubscription.url, WebhookSubscription.secret)
+            .join(WebhookSubscription, WebhookSubscription.id == WebhookDelivery.subscription_id)
+            .where(WebhookDelivery.state == "pending", WebhookDelivery.next_attempt_at <= now)
+            .order_by(WebhookDelivery.next_attempt_at, WebhookDelivery.id)
+            .limit(limit)
+            .with_for_update(skip_locked=True, of=WebhookDelivery)
+        ).all()
+        grouped: dict[uuid.UUID, list] = {}
+        for d, url, secret in rows:
+            grouped.setdefault(d.subscription_id, []).append((d, url, secret))
+            d.next_attempt_at = now + timedelta(seconds=settings.webhook_lease_seconds)
+        batches = []
+        size = settings.webhook_max_events_per_request
+        for items in grouped.values():
+            items.sort(key=lambda item: item[0].id)
+            for i in range(0, len(items), size):
+                chunk = items[i:i + size]
+                _, url, secret = chunk[0]
+                batches.append(Batch(
+                    url=url,
+                    secret=secret,
+                    ids=[d.id for d, _, _ in chunk],
+                    attempts=max(d.attempts for d, _, _ in chunk),
+                    events=[json.loads(d.payload) for d, _, _ in chunk],
+                ))
+        db.commit()
+    return batches
+
+
+def record_outcome(batch: Batch, error: Optional[DeliveryError] = None) -> None:
+    now = _now()
+    with _session() as db:
+        stmt = update(WebhookDelivery).where(WebhookDelivery.id.in_(batch.ids), WebhookDelivery.state == "pending")
+        if error is None:
+            db.execute(stmt.values(state="delivered", delivered_at=now, last_error=None))
+        else:
+            attempts = batch.attempts + 1
+            dead = not error.retryable or attempts >= settings.webhook_max_attempts
+            values = {"attempts": WebhookDelivery.attempts + 1, "last_error": str(error)[:255]}
+            if dead:
+                values["state"] = "dead"
+                log.warning("dead-lettering %d webhook events for %s: %s", len(batch.ids), batch.url, error)
+            else:
+                values["next_attempt_at"] = now + timedelta(seconds=backoff_delay(attempts))
+            db.execute(stmt.values(**values))
+        db.commit()
+
+
+async def _deliver(sender: WebhookSender, batch: Batch) -> None:
+    try:
+        await sender.send(batch.url, batch.secret, batch.events)
+    except DeliveryError as e:
+        await asyncio.to_thread(record_outcome, batch, e)
+        return
+    except Exception as e:
+        log.exception("unexpected error delivering webhooks to %s", batch.url)
+        await asyncio.to_thread(record_outcome, batch, DeliveryError(str(e), retryable=True))
+        return
+    await asyncio.to_thread(record_outcome, batch)
+
+
+async def run_once(sender: WebhookSender) -> int:
+    """
+    One pass over due deliveries; batches go out concurrently, bounded per
+    endpoint by the sender. Returns the number of events attempted.
+    """
+    batches = await asyncio.to_thread(claim_due, settings.webhook_worker_batch_size)
+    await asyncio.gather(*(_deliver(sender, b) for b in batches))
+    return sum(len(b.ids) for b in batches)
+
+
+async def run_forever(stop: asyncio.Event, sender: Optional[WebhookSender] = None) -> None:
+    sender = sender or WebhookSender()
+    try:
+        while not stop.is_set():
+            if await run_once(sender) == 0:
+                try:
+                    await asyncio.wait_for(stop.wait(), timeout=settings.webhook_worker_idle_seconds)
+                except asyncio.TimeoutError:
+                    pass
+    finally:
+        await sender.aclose()
+
+
+def main() -> None:
+    from app.core.logging import configure_logging
+
+    configure_logging()
+
+    async def _main():
+        stop = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(sig, stop.set)
+        log.info("webhook worker started")
+        await run_forever(stop)
+        log.info("webhook worker stopped")
+
+    asyncio.run(_main())
+
+
+if __name__ == "__main__":
+    main()
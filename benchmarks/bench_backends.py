@@ -0,0 +1,159 @@
+"""
+Backend benchmark: throughput and latency of the main endpoints under
+concurrent load, to compare the single-box SQLite profile with Postgres.
+
+Runs the app in-process (httpx over ASGI; sync endpoints use the threadpool,
+so requests really do hit the database concurrently) in two phases:
+  - write: create patient -> coverage -> prior auth, `--concurrency` chains at once
+  - mixed: PA detail, PA list, patient directory with coverages, and 10%
+    status updates, against the rows from the write phase
+
+Usage:
+    python benchmarks/bench_backends.py [--n 300] [--concurrency 16]
+        [--database-url sqlite:///./bench_backends.db | postgresql://.../scratch]
+        [--sqlite-plain]     # untuned SQLite engine (no WAL, shared connections) for comparison
+
+The schema is created and dropped by the benchmark; point it at a
+disposable database.
+"""
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+import uuid
+from collections import Counter, defaultdict
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--n", type=int, default=300)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--database-url", default="sqlite:///./bench_backends.db")
+    parser.add_argument("--sqlite-plain", action="store_true")
+    opts = parser.parse_args()
+
+    # Before any app import: settings and storage are read at import time
+    os.environ["DATABASE_URL"] = opts.database_url
+    os.environ["FILE_STORAGE_DIR"] = tempfile.mkdtemp(prefix="bench-backends-")
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+    import httpx
+    from sqlalchemy import create_engine
+
+    from app.api.v1 import deps
+    from app.core.config import settings
+    from app.db import Base, SessionLocal, get_engine
+    from app.main import create_app
+
+    settings.audit_enabled = False
+    settings.rate_limit_enabled = False
+    settings.doc_processing_mode = "off"
+
+    sqlite = opts.database_url.startswith("sqlite")
+    if sqlite and opts.sqlite_plain:
+        engine = create_engine(opts.database_url, connect_args={"check_same_thread": False})
+        SessionLocal.configure(bind=engine)
+        label = "sqlite (plain)"
+    else:
+        engine = get_engine()
+        label = "sqlite (WAL profile)" if sqlite else engine.dialect.name
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+
+    app = create_app()
+    app.dependency_overrides[deps.get_current_user_roles] = lambda: ["admin"]
+
+    run_id = uuid.uuid4().hex[:6]
+    timings: dict[str, list[float]] = defaultdict(list)
+    codes: dict[str, Counter] = defaultdict(Counter)
+    created: list[dict] = []
+
+    async def call(client, name, method, url, **kw):
+        t0 = time.perf_counter()
+        r = await client.request(method, url, **kw)
+        timings[name].append((time.perf_counter() - t0) * 1000)
+        codes[name][r.status_code] += 1
+        return r
+
+    async def create_chain(client, i):
+        ext = f"P-{run_id}-{i}"
+        r = await call(client, "POST /patients", "POST", "/v1/patients", json={
+            "external_id": ext, "first_name": "Bench", "last_name": f"Mark{i:05d}", "birth_date": "1980-01-01",
+        })
+        if r.status_code != 201:
+            return
+        r = await call(client, "POST /coverages", "POST", "/v1/coverages", json={
+            "external_id": f"C-{ext}", "member_id": f"M{i}", "plan": "Gold PPO",
+            "payer": f"PAYER{i % 5}", "patient_id": ext,
+        })
+        if r.status_code != 201:
+            return
+        r = await call(client, "POST /prior-auth", "POST", "/v1/prior-auth/requests", json={
+            "patient_id": ext, "coverage_id": r.json()["id"], "code": "70551", "diagnosis_codes": ["G43.909"],
+        })
+        if r.status_code == 201:
+            created.append(r.json())
+
+    async def mixed(client, i):
+        pa = random.choice(created)
+        roll = i % 10
+        if roll == 0:
+            await call(client, "PATCH /prior-auth status", "PATCH", f"/v1/prior-auth/requests/{pa['id']}/status",
+                       json={"status": random.choice(["approved", "denied", "pending"])})
+        elif roll < 5:
+            await call(client, "GET /prior-auth/{id}", "GET", f"/v1/prior-auth/requests/{pa['id']}")
+        elif roll < 8:
+            await call(client, "GET /prior-auth", "GET", "/v1/prior-auth/requests",
+                       params={"limit": 20, "fields": "id,status,code,createdAt"})
+        else:
+            await call(client, "GET /patients", "GET", "/v1/patients",
+                       params={"payer": f"PAYER{i % 5}", "include": "coverages", "limit": 20})
+
+    async def phase(fn, n):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=120) as client:
+            todo = iter(range(n))
+
+            async def worker():
+                for i in todo:
+                    await fn(client, i)
+
+            t0 = time.perf_counter()
+            await asyncio.gather(*(worker() for _ in range(opts.concurrency)))
+            return time.perf_counter() - t0
+
+    print(f"backend: {label}   concurrency: {opts.concurrency}")
+    print(f"{'endpoint':<26}{'n':>6}{'median ms':>11}{'p95 ms':>9}  status")
+    for title, fn, n in (("write", create_chain, opts.n), ("mixed", mixed, opts.n * 4)):
+        timings.clear()
+        codes.clear()
+        if fn is mixed and not created:
+            print("mixed: skipped, nothing was created")
+            break
+        elapsed = asyncio.run(phase(fn, n))
+        total = sum(len(t) for t in timings.values())
+        print(f"-- {title}: {total} requests in {elapsed:.2f}s = {total / elapsed:.0f} req/s")
+        for name, ts in timings.items():
+            ts.sort()
+            print(
+                f"{name:<26}{len(ts):>6}{statistics.median(ts):>11.2f}"
+                f"{ts[max(int(len(ts) * 0.95) - 1, 0)]:>9.2f}  {dict(codes[name])}"
+            )
+
+    Base.metadata.drop_all(engine)
+    engine.dispose()
+    if sqlite:
+        path = opts.database_url.removeprefix("sqlite:///")
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(path + suffix):
+                os.remove(path + suffix)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Cold-start benchmark.
+
+Measures, each in a fresh interpreter:
+  - import time of app.main (with the slowest modules from -X importtime)
+  - create_app() + lifespan warm-up + first /health response
+
+Usage:
+    python benchmarks/bench_startup.py [--runs 5] [--top 15]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_FIRST_REQUEST = r"""
+import json, time
+t0 = time.perf_counter()
+from fastapi.testclient import TestClient
+from app.main import create_app
+t1 = time.perf_counter()
+app = create_app()
+with TestClient(app) as client:
+    t2 = time.perf_counter()
+    r = client.get("/health")
+    t3 = time.perf_counter()
+print(json.dumps({
+    "import_ms": (t1 - t0) * 1000,
+    "startup_ms": (t2 - t1) * 1000,
+    "first_request_ms": (t3 - t2) * 1000,
+    "status": r.status_code,
+    "warmup": app.state.warmup,
+}))
+"""
+
+
+def _run(args: list[str]) -> subprocess.CompletedProcess:
+    env = {**os.environ, "PYTHONDONTWRITEBYTECODE": "1"}
+    return subprocess.run([sys.executable, *args], cwd=ROOT, env=env, capture_output=True, text=True, check=True)
+
+
+def import_profile(top: int) -> tuple[float, list[tuple[int, str]]]:
+    """
+    Returns (total cumulative µs for app.main, slowest modules by cumulative µs).
+    """
+    proc = _run(["-X", "importtime", "-c", "import app.main"])
+    rows = []
+    total = 0.0
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        # "import time:   self |  cumulative | name" (name is indented by depth)
+        _, cum_us, name = line.split("|", 2)
+        cum = int(cum_us)
+        rows.append((cum, name.strip()))
+        if name.strip() == "app.main":
+            total = cum
+    rows.sort(reverse=True)
+    return total, rows[:top]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15)
+    opts = parser.parse_args()
+
+    total_us, slowest = import_profile(opts.top)
+    print(f"import app.main (importtime): {total_us / 1000:.1f} ms")
+    for cum, name in slowest:
+        print(f"  {cum / 1000:8.1f} ms  {name}")
+
+    samples = [json.loads(_run(["-c", _FIRST_REQUEST]).stdout.strip().splitlines()[-1]) for _ in range(opts.runs)]
+    for key in ("import_ms", "startup_ms", "first_request_ms"):
+        vals = [s[key] for s in samples]
+        print(f"{key:>18}: median {statistics.median(vals):8.1f}  min {min(vals):8.1f}  max {max(vals):8.1f}")
+    print("warm-up steps (last run):")
+    for step, info in samples[-1]["warmup"].items():
+        print(f"  {step:<18} {'ok ' if info['ok'] else 'ERR'} {info['ms']:8.1f} ms  {info['detail']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+"""
+Write-path benchmark: SQL statements (round trips) and latency per create.
+
+Runs the create endpoints in-process against a scratch database and counts
+every statement the engine sends, including BEGIN/COMMIT.
+
+Usage:
+    python benchmarks/bench_writes.py [--n 200] [--database-url sqlite:///./bench_writes.db]
+
+Point --database-url at a disposable Postgres database to see network
+round trips; the schema is created and dropped by the benchmark.
+"""
+import argparse
+import io
+import os
+import statistics
+import sys
+import tempfile
+import time
+import uuid
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--n", type=int, default=200)
+    parser.add_argument("--database-url", default="sqlite:///./bench_writes.db")
+    opts = parser.parse_args()
+
+    # Before any app import: storage reads its directory at import time
+    os.environ["FILE_STORAGE_DIR"] = tempfile.mkdtemp(prefix="bench-writes-")
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+    from fastapi.testclient import TestClient
+    from sqlalchemy import create_engine, event
+    from sqlalchemy.orm import sessionmaker
+
+    from app.api.v1 import deps
+    from app.core.config import settings
+    from app.db import Base, SessionLocal, get_db
+    from app.main import create_app
+
+    settings.audit_enabled = False
+    settings.rate_limit_enabled = False
+    settings.doc_processing_mode = "off"
+    settings.payer_submission_enabled = True
+
+    sqlite = opts.database_url.startswith("sqlite")
+    engine = create_engine(opts.database_url, connect_args={"check_same_thread": False} if sqlite else {})
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+    SessionLocal.configure(bind=engine)
+    Session = sessionmaker(bind=engine, autoflush=False, autocommit=False)
+
+    statements = 0
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _count(*_):
+        nonlocal statements
+        statements += 1
+
+    @event.listens_for(engine, "commit")
+    def _count_commit(_):
+        nonlocal statements
+        statements += 1
+
+    def override_get_db():
+        db = Session()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app = create_app()
+    app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[deps.get_current_user_roles] = lambda: ["admin"]
+    client = TestClient(app, raise_server_exceptions=False)
+
+    run_id = uuid.uuid4().hex[:6]
+    ids: dict[str, list[str]] = {"patient": [], "coverage": [], "pa": []}
+
+    def patient(i):
+        r = client.post("/v1/patients", json={
+            "external_id": f"P-{run_id}-{i}", "first_name": "Bench", "last_name": f"Mark{i}", "birth_date": "1980-01-01",
+        })
+        ids["patient"].append(r.json()["id"])
+        return r
+
+    def coverage(i):
+        r = client.post("/v1/coverages", json={
+            "external_id": f"C-{run_id}-{i}", "member_id": f"M{i}", "plan": "Gold PPO", "payer": "ACME",
+            "patient_id": ids["patient"][i],
+        })
+        ids["coverage"].append(r.json()["id"])
+        return r
+
+    def prior_auth(i):
+        r = client.post("/v1/prior-auth/requests", json={
+            "patient_id": ids["patient"][i], "coverage_id": ids["coverage"][i], "code": "70551",
+            "diagnosis_codes": ["G43.909"],
+        })
+        ids["pa"].append(r.json()["id"])
+        return r
+
+    def document(i):
+        return client.post(
+            "/v1/attachments",
+            files={"file": (f"note{i}.txt", io.BytesIO(b"bench"), "text/plain")},
+            data={"pa_request_id": ids["pa"][i], "doc_type": "Clinical notes"},
+        )
+
+    def user(i):
+        return client.post("/v1/auth/register", json={
+            "email": f"bench-{run_id}-{i}@example.com", "password": "x" * 8, "roles": "clinician",
+        })
+
+    def duplicate_patient(i):
+        return client.post("/v1/patients", json={
+            "external_id": f"P-{run_id}-{i}", "first_name": "Bench", "last_name": "Dup", "birth_date": "1980-01-01",
+        })
+
+    print(f"{'endpoint':<22}{'stmts/req':>10}{'median ms':>11}{'p95 ms':>9}  status")
+    for name, call, n in (
+        ("POST /patients", patient, opts.n),
+        ("POST /coverages", coverage, opts.n),
+        ("POST /prior-auth", prior_auth, opts.n),
+        ("POST /attachments", document, opts.n),
+        ("POST /auth/register", user, min(opts.n, 20)),  # bcrypt dominates latency
+        ("POST /patients (dup)", duplicate_patient, opts.n),
+    ):
+        timings = []
+        statements = 0
+        codes = set()
+        for i in range(n):
+            t0 = time.perf_counter()
+            codes.add(call(i).status_code)
+            timings.append((time.perf_counter() - t0) * 1000)
+        timings.sort()
+        print(
+            f"{name:<22}{statements / n:>10.1f}{statistics.median(timings):>11.2f}"
+            f"{timings[int(len(timings) * 0.95) - 1]:>9.2f}  {sorted(codes)}"
+        )
+
+    Base.metadata.drop_all(engine)
+    if sqlite:
+        path = opts.database_url.removeprefix("sqlite:///")
+        if os.path.exists(path):
+            os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
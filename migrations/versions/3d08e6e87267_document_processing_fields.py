@@ -0,0 +1,41 @@
+"""add document processing fields
+
+Revision ID: 3d08e6e87267
+Revises: bf5f0216a7de
+Create Date: 2026-10-19 20:21:37.884310
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3d08e6e87267'
+down_revision: Union[str, None] = 'bf5f0216a7de'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Existing documents start as pending and are picked up by resume_pending() on startup
+    op.add_column('document_references', sa.Column('processing_status', sa.String(length=16), server_default='pending', nullable=False))
+    op.add_column('document_references', sa.Column('processing_error', sa.String(length=255), nullable=True))
+    op.add_column('document_references', sa.Column('detected_content_type', sa.String(length=100), nullable=True))
+    op.add_column('document_references', sa.Column('page_count', sa.Integer(), nullable=True))
+    op.add_column('document_references', sa.Column('extracted_text', sa.Text(), nullable=True))
+    op.add_column('document_references', sa.Column('thumbnail_key', sa.String(length=80), nullable=True))
+    op.add_column('document_references', sa.Column('processed_at', sa.DateTime(timezone=True), nullable=True))
+    op.create_index(op.f('ix_document_references_processing_status'), 'document_references', ['processing_status'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_document_references_processing_status'), table_name='document_references')
+    op.drop_column('document_references', 'processed_at')
+    op.drop_column('document_references', 'thumbnail_key')
+    op.drop_column('document_references', 'extracted_text')
+    op.drop_column('document_references', 'page_count')
+    op.drop_column('document_references', 'detected_content_type')
+    op.drop_column('document_references', 'processing_error')
+    op.drop_column('document_references', 'processing_status')
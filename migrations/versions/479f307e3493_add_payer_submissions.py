@@ -0,0 +1,51 @@
+"""add payer_submissions queue
+
+Revision ID: 479f307e3493
+Revises: 890fc8eff47a
+Create Date: 2026-10-19 22:15:09.441872
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '479f307e3493'
+down_revision: Union[str, None] = '890fc8eff47a'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('payer_submissions',
+    sa.Column('pa_request_id', sa.UUID(), nullable=False),
+    sa.Column('payer', sa.String(length=100), nullable=False),
+    sa.Column('state', sa.String(length=16), nullable=False),
+    sa.Column('tracking_id', sa.String(length=128), nullable=True),
+    sa.Column('attempts', sa.Integer(), nullable=False),
+    sa.Column('next_attempt_at', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('last_error', sa.String(length=255), nullable=True),
+    sa.Column('submitted_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('decided_at', sa.DateTime(timezone=True), nullable=True),
+    sa.ForeignKeyConstraint(['pa_request_id'], ['prior_auth_requests.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('pa_request_id')
+    )
+    op.create_index('ix_payer_submissions_due', 'payer_submissions', ['next_attempt_at'], unique=False, postgresql_where=sa.text("state IN ('queued', 'submitted')"))
+
+    # Requests already waiting on a payer join the queue
+    op.execute(
+        """
+        INSERT INTO payer_submissions (pa_request_id, payer, state, attempts, next_attempt_at)
+        SELECT par.id, c.payer, 'queued', 0, now()
+        FROM prior_auth_requests par
+        JOIN coverages c ON c.id = par.coverage_id
+        WHERE par.status = 'pending'
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_payer_submissions_due', table_name='payer_submissions', postgresql_where=sa.text("state IN ('queued', 'submitted')"))
+    op.drop_table('payer_submissions')
@@ -0,0 +1,45 @@
+"""add audit_events
+
+Revision ID: 54896d04d2e8
+Revises: 479f307e3493
+Create Date: 2026-10-20 09:41:27.118305
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '54896d04d2e8'
+down_revision: Union[str, None] = '479f307e3493'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('audit_events',
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('occurred_at', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('actor', sa.String(length=255), nullable=True),
+    sa.Column('roles', sa.String(length=255), nullable=False),
+    sa.Column('action', sa.String(length=16), nullable=False),
+    sa.Column('resource_type', sa.String(length=32), nullable=False),
+    sa.Column('resource_id', sa.String(length=64), nullable=True),
+    sa.Column('patient_id', sa.UUID(), nullable=True),
+    sa.Column('request_id', sa.String(length=128), nullable=True),
+    sa.Column('method', sa.String(length=8), nullable=True),
+    sa.Column('path', sa.String(length=255), nullable=True),
+    sa.Column('status_code', sa.Integer(), nullable=True),
+    sa.Column('client_ip', sa.String(length=64), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_audit_events_occurred_at'), 'audit_events', ['occurred_at'], unique=False)
+    op.create_index('ix_audit_events_patient_id_occurred_at', 'audit_events', ['patient_id', 'occurred_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_audit_events_patient_id_occurred_at', table_name='audit_events')
+    op.drop_index(op.f('ix_audit_events_occurred_at'), table_name='audit_events')
+    op.drop_table('audit_events')
@@ -0,0 +1,30 @@
+"""add patient directory indexes
+
+Revision ID: 5e0f2a2beacc
+Revises: 54896d04d2e8
+Create Date: 2026-10-20 14:02:51.604217
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5e0f2a2beacc'
+down_revision: Union[str, None] = '54896d04d2e8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute("CREATE INDEX ix_patients_last_name_lower ON patients (lower(last_name) varchar_pattern_ops)")
+    op.create_index('ix_coverages_patient_id', 'coverages', ['patient_id'], unique=False)
+    op.create_index('ix_coverages_payer_plan_patient_id', 'coverages', ['payer', 'plan', 'patient_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_coverages_payer_plan_patient_id', table_name='coverages')
+    op.drop_index('ix_coverages_patient_id', table_name='coverages')
+    op.drop_index('ix_patients_last_name_lower', table_name='patients')
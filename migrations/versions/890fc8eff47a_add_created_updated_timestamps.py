@@ -0,0 +1,43 @@
+"""add created_at/updated_at timestamps
+
+Revision ID: 890fc8eff47a
+Revises: 9df92fa82dd8
+Create Date: 2026-10-19 21:34:50.127663
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '890fc8eff47a'
+down_revision: Union[str, None] = '9df92fa82dd8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+_TABLES = ('patients', 'coverages', 'document_references')
+
+
+def upgrade() -> None:
+    # Existing rows have no recorded creation time; they get the migration time.
+    for table in _TABLES:
+        op.add_column(table, sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False))
+        op.add_column(table, sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False))
+        op.create_index(op.f(f'ix_{table}_created_at'), table, ['created_at'], unique=False)
+        op.create_index(op.f(f'ix_{table}_updated_at'), table, ['updated_at'], unique=False)
+
+    op.add_column('prior_auth_requests', sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False))
+    op.execute("UPDATE prior_auth_requests SET updated_at = created_at")
+    op.create_index(op.f('ix_prior_auth_requests_updated_at'), 'prior_auth_requests', ['updated_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_prior_auth_requests_updated_at'), table_name='prior_auth_requests')
+    op.drop_column('prior_auth_requests', 'updated_at')
+    for table in reversed(_TABLES):
+        op.drop_index(op.f(f'ix_{table}_updated_at'), table_name=table)
+        op.drop_index(op.f(f'ix_{table}_created_at'), table_name=table)
+        op.drop_column(table, 'updated_at')
+        op.drop_column(table, 'created_at')
@@ -0,0 +1,32 @@
+"""add created_at to prior_auth_requests
+
+Revision ID: 93696ab2bdc3
+Revises: 657a3f314380
+Create Date: 2026-10-19 15:50:12.204311
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '93696ab2bdc3'
+down_revision: Union[str, None] = '657a3f314380'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Existing rows have no recorded creation time; they get the migration timestamp.
+    op.add_column(
+        'prior_auth_requests',
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    )
+    op.create_index(op.f('ix_prior_auth_requests_created_at'), 'prior_auth_requests', ['created_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_prior_auth_requests_created_at'), table_name='prior_auth_requests')
+    op.drop_column('prior_auth_requests', 'created_at')
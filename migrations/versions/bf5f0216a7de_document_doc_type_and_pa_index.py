@@ -0,0 +1,28 @@
+"""add document_references.doc_type and pa_request_id index
+
+Revision ID: bf5f0216a7de
+Revises: d32d38c5a76f
+Create Date: 2026-10-19 19:48:05.302117
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'bf5f0216a7de'
+down_revision: Union[str, None] = 'd32d38c5a76f'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('document_references', sa.Column('doc_type', sa.String(length=100), nullable=True))
+    op.create_index(op.f('ix_document_references_pa_request_id'), 'document_references', ['pa_request_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_document_references_pa_request_id'), table_name='document_references')
+    op.drop_column('document_references', 'doc_type')
@@ -0,0 +1,75 @@
+"""add providers registry keyed by NPI
+
+Revision ID: d32d38c5a76f
+Revises: d949f14e87e2
+Create Date: 2026-10-19 19:12:40.518204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd32d38c5a76f'
+down_revision: Union[str, None] = 'd949f14e87e2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('providers',
+    sa.Column('npi', sa.String(length=10), nullable=False),
+    sa.Column('entity_type', sa.Integer(), nullable=True),
+    sa.Column('name', sa.String(length=255), nullable=False),
+    sa.Column('search_name', sa.String(length=255), nullable=False),
+    sa.Column('taxonomy_code', sa.String(length=16), nullable=True),
+    sa.Column('state', sa.String(length=2), nullable=True),
+    sa.PrimaryKeyConstraint('npi')
+    )
+    op.create_index('ix_providers_search_name', 'providers', ['search_name'], unique=False, postgresql_ops={'search_name': 'varchar_pattern_ops'})
+
+    # Register every well-formed NPI already on a request, named from its
+    # most recent submission. Malformed values can't reference the registry,
+    # so they are dropped (the free-text name stays on the request).
+    op.execute(
+        """
+        INSERT INTO providers (npi, name, search_name)
+        SELECT DISTINCT ON (btrim(provider_npi))
+               btrim(provider_npi),
+               coalesce(nullif(btrim(provider_name), ''), btrim(provider_npi)),
+               lower(coalesce(nullif(btrim(provider_name), ''), btrim(provider_npi)))
+        FROM prior_auth_requests
+        WHERE btrim(provider_npi) ~ '^[0-9]{10}$'
+        ORDER BY btrim(provider_npi), created_at DESC
+        """
+    )
+    op.execute(
+        """
+        UPDATE prior_auth_requests
+        SET provider_npi = CASE WHEN btrim(provider_npi) ~ '^[0-9]{10}$' THEN btrim(provider_npi) END,
+            provider_name = CASE WHEN btrim(provider_npi) ~ '^[0-9]{10}$' THEN NULL ELSE provider_name END
+        WHERE provider_npi IS NOT NULL
+        """
+    )
+    op.alter_column('prior_auth_requests', 'provider_npi', existing_type=sa.String(length=20), type_=sa.String(length=10), existing_nullable=True)
+    op.create_index(op.f('ix_prior_auth_requests_provider_npi'), 'prior_auth_requests', ['provider_npi'], unique=False)
+    op.create_foreign_key('prior_auth_requests_provider_npi_fkey', 'prior_auth_requests', 'providers', ['provider_npi'], ['npi'])
+
+
+def downgrade() -> None:
+    op.drop_constraint('prior_auth_requests_provider_npi_fkey', 'prior_auth_requests', type_='foreignkey')
+    op.drop_index(op.f('ix_prior_auth_requests_provider_npi'), table_name='prior_auth_requests')
+    op.alter_column('prior_auth_requests', 'provider_npi', existing_type=sa.String(length=10), type_=sa.String(length=20), existing_nullable=True)
+    # Copy names back onto the requests that only referenced the registry
+    op.execute(
+        """
+        UPDATE prior_auth_requests par
+        SET provider_name = p.name
+        FROM providers p
+        WHERE p.npi = par.provider_npi AND par.provider_name IS NULL
+        """
+    )
+    op.drop_index('ix_providers_search_name', table_name='providers', postgresql_ops={'search_name': 'varchar_pattern_ops'})
+    op.drop_table('providers')
@@ -0,0 +1,44 @@
+"""add pa_daily_rollups
+
+Revision ID: d6034c238cf5
+Revises: 93696ab2bdc3
+Create Date: 2026-10-19 16:20:41.518230
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd6034c238cf5'
+down_revision: Union[str, None] = '93696ab2bdc3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('pa_daily_rollups',
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('status', postgresql.ENUM(name='priorauthstatus', create_type=False), nullable=False),
+    sa.Column('payer', sa.String(length=100), nullable=False),
+    sa.Column('code', sa.String(length=20), nullable=False),
+    sa.Column('count', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('day', 'status', 'payer', 'code')
+    )
+    # Seed from existing requests; afterwards the PA service keeps it current
+    op.execute(
+        """
+        INSERT INTO pa_daily_rollups (day, status, payer, code, count)
+        SELECT date(timezone('UTC', par.created_at)), par.status, c.payer, par.code, count(*)
+        FROM prior_auth_requests par
+        JOIN coverages c ON c.id = par.coverage_id
+        GROUP BY 1, 2, 3, 4
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('pa_daily_rollups')
@@ -0,0 +1,67 @@
+"""normalize diagnosis codes into prior_auth_diagnoses
+
+Revision ID: d949f14e87e2
+Revises: 5f96bdfeb525
+Create Date: 2026-10-19 18:04:27.660193
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd949f14e87e2'
+down_revision: Union[str, None] = '5f96bdfeb525'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('prior_auth_diagnoses',
+    sa.Column('pa_request_id', sa.UUID(), nullable=False),
+    sa.Column('position', sa.Integer(), nullable=False),
+    sa.Column('code', sa.String(length=16), nullable=False),
+    sa.ForeignKeyConstraint(['pa_request_id'], ['prior_auth_requests.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('pa_request_id', 'position')
+    )
+
+    # Split the comma-joined column, applying the same normalization as the
+    # service: trim, upper-case, and dot after the ICD-10 category ("M545" -> "M54.5").
+    op.execute(
+        """
+        INSERT INTO prior_auth_diagnoses (pa_request_id, position, code)
+        SELECT par.id,
+               t.ord - 1,
+               CASE WHEN strpos(t.c, '.') = 0 AND length(t.c) > 3
+                    THEN substr(t.c, 1, 3) || '.' || substr(t.c, 4)
+                    ELSE t.c END
+        FROM prior_auth_requests par,
+             LATERAL (
+                SELECT upper(btrim(raw)) AS c, ord
+                FROM unnest(string_to_array(par.diagnosis_codes, ',')) WITH ORDINALITY AS u(raw, ord)
+             ) t
+        WHERE t.c <> ''
+        """
+    )
+    op.create_index('ix_prior_auth_diagnoses_code_pa_request_id', 'prior_auth_diagnoses', ['code', 'pa_request_id'], unique=False)
+    op.drop_column('prior_auth_requests', 'diagnosis_codes')
+
+
+def downgrade() -> None:
+    op.add_column('prior_auth_requests', sa.Column('diagnosis_codes', sa.String(length=256), server_default='', nullable=False))
+    op.execute(
+        """
+        UPDATE prior_auth_requests par
+        SET diagnosis_codes = left(d.codes, 256)
+        FROM (
+            SELECT pa_request_id, string_agg(code, ',' ORDER BY position) AS codes
+            FROM prior_auth_diagnoses
+            GROUP BY pa_request_id
+        ) d
+        WHERE d.pa_request_id = par.id
+        """
+    )
+    op.drop_index('ix_prior_auth_diagnoses_code_pa_request_id', table_name='prior_auth_diagnoses')
+    op.drop_table('prior_auth_diagnoses')
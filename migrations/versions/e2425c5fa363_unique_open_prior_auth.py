@@ -0,0 +1,44 @@
+"""one open prior auth per patient, coverage and code
+
+Revision ID: e2425c5fa363
+Revises: 3dbb99bfd9ee
+Create Date: 2026-10-21 10:12:41.502913
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e2425c5fa363'
+down_revision: Union[str, None] = '3dbb99bfd9ee'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+OPEN = sa.text("status IN ('requested', 'pending')")
+
+
+def upgrade() -> None:
+    # Existing open duplicates need a clinical decision (which one to keep),
+    # so refuse to guess and name them instead
+    duplicates = op.get_bind().execute(sa.text(
+        "SELECT patient_id, coverage_id, code, count(*) FROM prior_auth_requests "
+        "WHERE status IN ('requested', 'pending') "
+        "GROUP BY patient_id, coverage_id, code HAVING count(*) > 1"
+    )).fetchall()
+    if duplicates:
+        listed = ", ".join(f"{p}/{c}/{code} x{n}" for p, c, code, n in duplicates[:20])
+        raise RuntimeError(
+            f"{len(duplicates)} (patient, coverage, code) groups have more than one open prior auth; "
+            f"close or deny the extras before upgrading: {listed}"
+        )
+    op.create_index(
+        'uq_prior_auth_requests_open', 'prior_auth_requests', ['patient_id', 'coverage_id', 'code'],
+        unique=True, postgresql_where=OPEN,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('uq_prior_auth_requests_open', table_name='prior_auth_requests', postgresql_where=OPEN)
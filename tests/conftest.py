@@ -9,9 +9,10 @@ from alembic import command
 from alembic.config import Config
 
 from app.main import app
-from app.db import Base, get_db
+from app.db import Base, RoutingSession, SessionLocal, get_db, sqlite_engine
 from app.core.config import settings
 from app.api.v1 import deps
+from app.services import audit
 
 # --- Choose DB for tests ---
 TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL", "sqlite:///./test.db")
@@ -19,10 +20,15 @@ IS_SQLITE = TEST_DATABASE_URL.startswith("sqlite")
 
 # --- Create engine/session for tests ---
 if IS_SQLITE:
-    engine = create_engine(TEST_DATABASE_URL, connect_args={"check_same_thread": False})
+    # The single-box profile: WAL, serialized writer, read-only readers
+    engine = sqlite_engine(TEST_DATABASE_URL)
 else:
     engine = create_engine(TEST_DATABASE_URL, pool_pre_ping=True)
-TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+TestingSessionLocal = sessionmaker(class_=RoutingSession, autocommit=False, autoflush=False, bind=engine)
+# Background jobs open their own sessions; point them at the test DB too
+SessionLocal.configure(bind=engine)
+# Run post-upload processing synchronously so tests can assert on its results
+settings.doc_processing_mode = "inline"
 
 def _fake_roles():
     return ["clinician", "admin"]
@@ -55,6 +61,7 @@ def _db_setup():
         # Fast path: create/drop schema via metadata
         Base.metadata.create_all(bind=engine)
         yield
+        audit.shutdown()
         Base.metadata.drop_all(bind=engine)
     else:
         # Neon (or any Postgres): run Alembic migrations to head
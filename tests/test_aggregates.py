@@ -0,0 +1,48 @@
+import uuid
+
+from app.domain.models import Patient, Coverage
+
+
+def _seed(db_session, payer):
+    p = Patient(id=uuid.uuid4(), external_id=f"P-{uuid.uuid4().hex[:8]}", first_name="Bo", last_name="Ng", birth_date="1988-08-08")
+    c = Coverage(id=uuid.uuid4(), external_id=f"C-{uuid.uuid4().hex[:8]}", member_id="M2", plan="Bronze", payer=payer, patient_id=p.id)
+    db_session.add_all([p, c])
+    db_session.commit()
+    return str(p.id), str(c.id)
+
+
+def _counts(client, payer):
+    r = client.get(f"/v1/prior-auth/aggregates?group_by=status,code&payer={payer}")
+    assert r.status_code == 200, r.text
+    return {(b["status"], b["code"]): b["count"] for b in r.json()["buckets"]}
+
+
+def test_aggregates_track_create_status_change_and_delete(client, db_session):
+    payer = f"PAYER-{uuid.uuid4().hex[:6]}"
+    first, second = _seed(db_session, payer), _seed(db_session, payer)
+    ids = []
+    # Two patients: a second open 70551 for the same one would be a duplicate
+    for (pid, cid), code in ((first, "70551"), (second, "70551"), (first, "97110")):
+        r = client.post("/v1/prior-auth/requests", json={"patient_id": pid, "coverage_id": cid, "code": code})
+        assert r.status_code == 201, r.text
+        ids.append(r.json()["id"])
+
+    assert _counts(client, payer) == {("pending", "70551"): 2, ("not_required", "97110"): 1}
+
+    r = client.patch(f"/v1/prior-auth/requests/{ids[0]}/status", json={"status": "approved"})
+    assert r.status_code == 200, r.text
+    assert r.json()["status"] == "approved"
+    r = client.delete(f"/v1/prior-auth/requests/{ids[2]}")
+    assert r.status_code == 200
+
+    expected = {("pending", "70551"): 1, ("approved", "70551"): 1}
+    assert _counts(client, payer) == expected
+
+    r = client.post("/v1/prior-auth/aggregates/rebuild")
+    assert r.status_code == 200
+    assert _counts(client, payer) == expected
+
+
+def test_aggregates_reject_unknown_dimension(client):
+    r = client.get("/v1/prior-auth/aggregates?group_by=provider")
+    assert r.status_code == 422
@@ -0,0 +1,78 @@
+import io
+import uuid
+from app.domain.models import Patient, Coverage
+
+
+def _seed(db_session):
+    p = Patient(id=uuid.uuid4(), external_id=f"P-{uuid.uuid4().hex[:8]}", first_name="A", last_name="B", birth_date="1980-01-01")
+    c = Coverage(id=uuid.uuid4(), external_id=f"C-{uuid.uuid4().hex[:8]}", member_id="M1", plan="Gold PPO", payer="ACME", patient_id=p.id)
+    db_session.add_all([p, c])
+    db_session.commit()
+    return str(p.id), str(c.id)
+
+
+def test_attach_at_upload_and_afterwards_updates_missing_docs(client, db_session):
+    pid, cid = _seed(db_session)
+    r = client.post("/v1/prior-auth/requests", json={"patient_id": pid, "coverage_id": cid, "code": "70551"})
+    assert r.status_code == 201, r.text
+    pa_id = r.json()["id"]
+    assert r.json()["missingDocs"] == ["Clinical notes", "Recent imaging"]
+
+    r = client.post(
+        "/v1/attachments",
+        files={"file": ("notes.txt", io.BytesIO(b"visit notes"), "text/plain")},
+        data={"pa_request_id": pa_id, "doc_type": "clinical notes"},
+    )
+    assert r.status_code == 201, r.text
+    assert r.json()["pa_request_id"] == pa_id
+
+    r = client.post("/v1/attachments", files={"file": ("mri.pdf", io.BytesIO(b"%PDF-1.4"), "application/pdf")})
+    doc_id = r.json()["id"]
+    r = client.post(f"/v1/prior-auth/requests/{pa_id}/attachments", json={"document_id": doc_id, "doc_type": "Recent imaging"})
+    assert r.status_code == 200, r.text
+    assert [a["filename"] for a in r.json()["attachments"]] == ["notes.txt", "mri.pdf"]
+    assert r.json()["missingDocs"] == []
+
+    r = client.get("/v1/prior-auth/requests?code=70551")
+    listed = next(i for i in r.json()["items"] if i["id"] == pa_id)
+    assert len(listed["attachments"]) == 2 and listed["missingDocs"] == []
+
+
+def test_upload_to_unknown_pa_is_404(client):
+    r = client.post(
+        "/v1/attachments",
+        files={"file": ("x.txt", io.BytesIO(b"x"), "text/plain")},
+        data={"pa_request_id": str(uuid.uuid4())},
+    )
+    assert r.status_code == 404
+
+
+def test_upload_is_processed_in_background(client):
+    pdf = b"%PDF-1.4\n1 0 obj << /Type /Pages /Count 2 >>\n2 0 obj << /Type /Page >>\n3 0 obj << /Type/Page >>\n%%EOF"
+    r = client.post("/v1/attachments", files={"file": ("scan.bin", io.BytesIO(pdf), "application/octet-stream")})
+    assert r.status_code == 201, r.text
+
+    r = client.get(f"/v1/attachments/{r.json()['id']}/status")
+    assert r.status_code == 200
+    body = r.json()
+    assert body["processing_status"] == "done"
+    assert body["detected_content_type"] == "application/pdf"
+    assert body["page_count"] == 2
+
+
+def test_document_cannot_move_to_another_patients_pa(client, db_session):
+    pa_ids = []
+    for _ in range(2):
+        pid, cid = _seed(db_session)
+        pa_ids.append(client.post("/v1/prior-auth/requests", json={"patient_id": pid, "coverage_id": cid, "code": "70551"}).json()["id"])
+    r = client.post(
+        "/v1/attachments",
+        files={"file": ("notes.txt", io.BytesIO(b"visit notes"), "text/plain")},
+        data={"pa_request_id": pa_ids[0]},
+    )
+    doc_id = r.json()["id"]
+    # Deleting the PA leaves the document with its patient, unlinked
+    assert client.delete(f"/v1/prior-auth/requests/{pa_ids[0]}").status_code in (200, 204)
+
+    r = client.post(f"/v1/prior-auth/requests/{pa_ids[1]}/attachments", json={"document_id": doc_id})
+    assert r.status_code == 409
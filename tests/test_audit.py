@@ -0,0 +1,81 @@
+import asyncio
+import threading
+import time
+import uuid
+
+from app.domain.models import AuditEvent, Patient
+from app.services import audit
+from app.services.audit import AuditBuffer
+
+
+def test_buffer_batches_applies_backpressure_and_drains_on_stop():
+    written: list[list[dict]] = []
+    gate = threading.Event()
+
+    def write(rows):
+        gate.wait()
+        written.append(list(rows))
+
+    buf = AuditBuffer(capacity=4, batch_size=2, flush_interval=0.01, write=write)
+    for i in range(4):
+        buf.put({"n": i})
+    assert len(buf) == 4
+
+    # Full: the producer blocks until the writer frees a batch
+    producer = threading.Thread(target=buf.put, args=({"n": 4},))
+    producer.start()
+    producer.join(0.1)
+    assert producer.is_alive()
+    gate.set()
+    producer.join(2)
+    assert not producer.is_alive()
+
+    buf.stop(timeout=2)
+    assert len(buf) == 0
+    assert [e["n"] for batch in written for e in batch] == [0, 1, 2, 3, 4]
+    assert all(len(batch) <= 2 for batch in written)
+
+
+def test_full_buffer_never_blocks_the_event_loop(monkeypatch):
+    written: list[dict] = []
+    gate = threading.Event()
+
+    def write(rows):
+        gate.wait()
+        written.extend(rows)
+
+    buf = AuditBuffer(capacity=1, batch_size=1, flush_interval=0.01, write=write)
+    monkeypatch.setattr(audit, "buffer", buf)
+    buf.put({"n": 0})   # the writer is now stuck on it
+
+    async def on_loop():
+        t0 = time.perf_counter()
+        audit.record("read", "patient", "p1")
+        elapsed = time.perf_counter() - t0
+        gate.set()   # before asyncio.run waits for the executor thread
+        return elapsed
+
+    assert asyncio.run(on_loop()) < 0.5
+    deadline = time.monotonic() + 5
+    while len(written) < 2 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    buf.stop(timeout=2)
+    assert [e.get("n", e.get("resource_id")) for e in written] == [0, "p1"]
+
+
+def test_phi_reads_are_audited(client, db_session):
+    from app.services import audit
+
+    p = Patient(id=uuid.uuid4(), external_id=f"P-{uuid.uuid4().hex[:8]}", first_name="Au", last_name="Dit", birth_date="1970-01-01")
+    db_session.add(p)
+    db_session.commit()
+
+    assert client.get(f"/v1/patients/{p.external_id}").status_code == 200
+    assert client.get(f"/v1/patients/{uuid.uuid4()}").status_code == 404
+    assert audit.buffer.flush(timeout=5)
+
+    events = db_session.query(AuditEvent).filter(AuditEvent.patient_id == p.id).all()
+    assert [(e.action, e.resource_type, e.path) for e in events] == [("read", "patient", f"/v1/patients/{p.external_id}")]
+    assert events[0].request_id
+    missed = db_session.query(AuditEvent).filter(AuditEvent.status_code == 404, AuditEvent.resource_type == "patient").count()
+    assert missed >= 1
@@ -0,0 +1,30 @@
+import uuid
+from app.core.config import settings
+from app.domain.models import Patient, Coverage
+
+
+def test_code_search_by_prefix_and_description(client):
+    r = client.get("/v1/codes/search?prefix=7055")
+    assert r.status_code == 200
+    codes = [i["code"] for i in r.json()["items"]]
+    assert "70551" in codes and "70553" in codes
+
+    r = client.get("/v1/codes/search?prefix=m545&system=ICD10")
+    assert [i["code"] for i in r.json()["items"]] == ["M54.5", "M54.50", "M54.59"]
+
+    r = client.get("/v1/codes/search?prefix=migr&limit=1")
+    assert len(r.json()["items"]) == 1
+
+
+def test_submission_rejects_unknown_codes(client, db_session, monkeypatch):
+    monkeypatch.setattr(settings, "code_validation_enabled", True)
+    p = Patient(id=uuid.uuid4(), external_id=f"P-{uuid.uuid4().hex[:8]}", first_name="A", last_name="B", birth_date="1980-01-01")
+    c = Coverage(id=uuid.uuid4(), external_id=f"C-{uuid.uuid4().hex[:8]}", member_id="M1", plan="Gold PPO", payer="ACME", patient_id=p.id)
+    db_session.add_all([p, c])
+    db_session.commit()
+
+    r = client.post("/v1/prior-auth/requests", json={
+        "patient_id": str(p.id), "coverage_id": str(c.id), "code": "99999X", "diagnosis_codes": ["R51", "Q99.99"],
+    })
+    assert r.status_code == 422
+    assert "99999X" in r.json()["detail"] and "Q99.99" in r.json()["detail"]
@@ -0,0 +1,57 @@
+import threading
+import uuid
+
+from sqlalchemy import func, select, text
+from sqlalchemy.orm import sessionmaker
+
+from app.db import Base, RoutingSession, reader_for, sqlite_engine
+from app.domain.models import Patient
+
+
+def _patient(**kw) -> Patient:
+    return Patient(external_id=f"P-{uuid.uuid4().hex[:12]}", first_name="Con", last_name="Current", birth_date="1980-01-01", **kw)
+
+
+def test_sqlite_profile_serializes_writers_without_blocking_readers(tmp_path):
+    writer = sqlite_engine(f"sqlite:///{tmp_path}/single-box.db")
+    Base.metadata.create_all(writer)
+    Session = sessionmaker(class_=RoutingSession, bind=writer, autoflush=False)
+    reader = reader_for(writer)
+    with reader.connect() as conn:
+        assert conn.execute(text("PRAGMA journal_mode")).scalar() == "wal"
+        assert conn.execute(text("PRAGMA query_only")).scalar() == 1
+
+    # An open write transaction doesn't stop reads (nor leak into them)
+    holder = Session()
+    holder.add(_patient())
+    holder.flush()
+    seen = []
+    t = threading.Thread(target=lambda: seen.append(Session().scalar(select(func.count(Patient.id)))))
+    t.start()
+    t.join(timeout=5)
+    assert seen == [0]
+    holder.commit()
+    holder.close()
+
+    # Concurrent writers queue for the writer instead of failing with "database is locked"
+    errors = []
+
+    def write_many():
+        try:
+            for _ in range(20):
+                with Session() as db:
+                    db.add(_patient())
+                    db.commit()
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=write_many) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert errors == []
+    with Session() as db:
+        assert db.scalar(select(func.count(Patient.id))) == 161
+    writer.dispose()
+    reader.dispose()
@@ -0,0 +1,70 @@
+import asyncio
+import uuid
+from datetime import date
+
+import httpx
+
+from app.adapters.eligibility import MockEligibilityAdapter, PayerEligibilityAdapter
+from app.adapters.mock_payer import MockPayerState, create_mock_payer
+from app.adapters.payer_gateway import PayerGateway
+from app.core.config import settings
+from app.domain.models import Coverage
+from app.services import eligibility
+from app.services.eligibility import EligibilityChecker
+
+
+def test_checks_are_coalesced_and_cached_per_coverage_and_date(monkeypatch):
+    monkeypatch.setattr(settings, "payer_default_url", "http://mock-payer/fhir")
+    state = MockPayerState()
+    adapter = PayerEligibilityAdapter(PayerGateway(transport=httpx.ASGITransport(app=create_mock_payer(state))))
+    now = [0.0]
+    checker = EligibilityChecker(adapter, ttl=60, maxsize=100, clock=lambda: now[0])
+    active = Coverage(id=uuid.uuid4(), member_id="M1", plan="Gold PPO", payer="ACME")
+    lapsed = Coverage(id=uuid.uuid4(), member_id="INACTIVE", plan="Gold PPO", payer="ACME")
+    dos = date(2026, 3, 2)
+
+    async def drive():
+        try:
+            first = await asyncio.gather(*(checker.check(active, dos) for _ in range(10)))
+            assert state.eligibility_checks == 1
+            assert all(check is first[0][0] and not cached for check, cached in first)
+            assert first[0][0].result.active and first[0][0].result.benefit_end == date(2026, 12, 31)
+
+            assert (await checker.check(active, dos))[1] is True
+            await checker.check(active, date(2026, 3, 3))   # another date is another key
+            lapsed_check, _ = await checker.check(lapsed, dos)
+            assert not lapsed_check.result.active
+            assert state.eligibility_checks == 3
+
+            now[0] = 61
+            assert (await checker.check(active, dos))[1] is False
+            assert state.eligibility_checks == 4
+        finally:
+            await checker.aclose()
+
+    asyncio.run(drive())
+    assert checker.stats == {"miss": 4, "coalesced": 9, "hit": 1}
+
+
+def test_eligibility_endpoint(client, monkeypatch):
+    monkeypatch.setattr(eligibility, "_checker", None)
+    adapter = MockEligibilityAdapter()
+    eligibility.configure(adapter)
+
+    ext = f"P-{uuid.uuid4().hex[:8]}"
+    client.post("/v1/patients", json={"external_id": ext, "first_name": "El", "last_name": "Igible", "birth_date": "1980-01-01"})
+    cov = client.post("/v1/coverages", json={
+        "external_id": f"C-{ext}", "member_id": "M1", "plan": "Gold PPO", "payer": "ACME", "patient_id": ext,
+    }).json()
+
+    r = client.get(f"/v1/coverages/{cov['id']}/eligibility", params={"date": "2026-05-01"})
+    assert r.status_code == 200
+    body = r.json()
+    assert body["active"] is True and body["cached"] is False
+    assert body["benefit_period"] == {"start": "2026-01-01", "end": "2026-12-31"}
+    again = client.get(f"/v1/coverages/C-{ext}/eligibility", params={"date": "2026-05-01"}).json()
+    assert again["cached"] is True and again["checked_at"] == body["checked_at"]
+    assert adapter.calls == 1
+
+    assert client.get(f"/v1/coverages/C-missing-{ext}/eligibility").status_code == 404
+    assert client.get(f"/v1/coverages/{cov['id']}/eligibility", params={"date": "soon"}).status_code == 422
@@ -0,0 +1,50 @@
+import csv
+import io
+import json
+import uuid
+
+from app.domain.models import Patient, Coverage
+
+
+def _seed(db_session, payer):
+    p = Patient(id=uuid.uuid4(), external_id=f"P-{uuid.uuid4().hex[:8]}", first_name="Ann", last_name="Lee", birth_date="1970-02-03")
+    c = Coverage(id=uuid.uuid4(), external_id=f"C-{uuid.uuid4().hex[:8]}", member_id="M1", plan="Silver", payer=payer, patient_id=p.id)
+    db_session.add_all([p, c])
+    db_session.commit()
+    return str(p.id), str(c.id)
+
+
+def test_export_ndjson_filters_by_payer_and_code(client, db_session):
+    payer = f"PAYER-{uuid.uuid4().hex[:6]}"
+    pid, cid = _seed(db_session, payer)
+    for code in ("70551", "97110"):
+        r = client.post("/v1/prior-auth/requests", json={
+            "patient_id": pid, "coverage_id": cid, "code": code, "diagnosis_codes": ["R51", "G43.909"],
+        })
+        assert r.status_code == 201, r.text
+
+    r = client.get(f"/v1/prior-auth/export?payer={payer}&code=70551")
+    assert r.status_code == 200
+    assert r.headers["content-type"].startswith("application/x-ndjson")
+    rows = [json.loads(line) for line in r.text.splitlines()]
+    assert len(rows) == 1
+    assert rows[0]["code"] == "70551"
+    assert rows[0]["payer"] == payer
+    assert rows[0]["member_name"] == "Ann Lee"
+    assert rows[0]["diagnosis_codes"] == ["R51", "G43.909"]
+
+
+def test_export_csv_has_header_and_rows(client, db_session):
+    payer = f"PAYER-{uuid.uuid4().hex[:6]}"
+    pid, cid = _seed(db_session, payer)
+    r = client.post("/v1/prior-auth/requests", json={"patient_id": pid, "coverage_id": cid, "code": "70553"})
+    assert r.status_code == 201, r.text
+
+    r = client.get(f"/v1/prior-auth/export?format=csv&payer={payer}&since=2000-01-01")
+    assert r.status_code == 200
+    rows = list(csv.DictReader(io.StringIO(r.text)))
+    assert len(rows) == 1
+    assert rows[0]["code"] == "70553"
+
+    r = client.get(f"/v1/prior-auth/export?format=csv&payer={payer}&until=2000-01-01")
+    assert list(csv.DictReader(io.StringIO(r.text))) == []
@@ -0,0 +1,107 @@
+import json
+import uuid
+
+import pytest
+from fastapi import HTTPException
+
+from app.services.fhir_bundle import BundleParser
+
+
+def _bundle(ext: str, *, code: str = "70551") -> dict:
+    return {
+        "resourceType": "Bundle",
+        "type": "transaction",
+        "entry": [
+            {
+                "fullUrl": "urn:uuid:claim-1",
+                "resource": {
+                    "resourceType": "Claim",
+                    "patient": {"reference": "urn:uuid:pat-1"},
+                    "insurance": [{"sequence": 1, "coverage": {"reference": "Coverage/cov-1"}}],
+                    "provider": {"reference": "urn:uuid:prac-1"},
+                    "diagnosis": [{"diagnosisCodeableConcept": {"coding": [{"code": "G43.909"}]}}],
+                    "item": [{"productOrService": {"coding": [{"code": code}]}}],
+                },
+                "request": {"method": "POST", "url": "Claim"},
+            },
+            {
+                "fullUrl": "urn:uuid:pat-1",
+                "resource": {
+                    "resourceType": "Patient",
+                    "identifier": [{"value": f"P-{ext}"}],
+                    "name": [{"family": "Doe", "given": ["Jane"]}],
+                    "birthDate": "1980-02-03",
+                },
+                "request": {"method": "POST", "url": "Patient"},
+            },
+            {
+                "resource": {
+                    "resourceType": "Coverage",
+                    "id": "cov-1",
+                    "identifier": [{"value": f"C-{ext}"}],
+                    "subscriberId": "M-1",
+                    "beneficiary": {"reference": "urn:uuid:pat-1"},
+                    "payor": [{"display": "ACME"}],
+                    "class": [{"type": {"text": "plan"}, "value": "Gold PPO"}],
+                },
+                "request": {"method": "POST", "url": "Coverage"},
+            },
+            {
+                "fullUrl": "urn:uuid:prac-1",
+                "resource": {
+                    "resourceType": "Practitioner",
+                    "identifier": [{"system": "http://hl7.org/fhir/sid/us-npi", "value": "1234567893"}],
+                    "name": [{"text": "Dr. Rivera"}],
+                },
+                "request": {"method": "POST", "url": "Practitioner"},
+            },
+        ],
+    }
+
+
+def test_parser_handles_arbitrary_chunk_boundaries():
+    raw = json.dumps(_bundle("x"), indent=1).replace("Doe", "Dö").encode()
+    for size in (1, 7, 4096):
+        parser = BundleParser()
+        for i in range(0, len(raw), size):
+            parser.feed(raw[i:i + size])
+        records = parser.close()
+        assert [r["type"] for r in records] == ["Claim", "Patient", "Coverage", "Practitioner"]
+        assert records[1]["last_name"] == "Dö"
+        assert records[0]["diagnosis_codes"] == ["G43.909"]
+
+    parser = BundleParser()
+    parser.feed(raw[:-1])
+    with pytest.raises(HTTPException) as e:
+        parser.close()
+    assert e.value.status_code == 400
+
+
+def test_post_bundle_creates_everything_in_one_transaction(client):
+    ext = uuid.uuid4().hex[:8]
+    r = client.post("/v1/fhir/Bundle", content=json.dumps(_bundle(ext)))
+    assert r.status_code == 200, r.text
+    statuses = [e["response"]["status"] for e in r.json()["entry"]]
+    assert statuses == ["201 Created", "201 Created", "201 Created", "200 OK"]
+
+    pa = client.get(r.json()["entry"][0]["response"]["location"]).json()
+    assert pa["member"]["dob"] == "1980-02-03"
+    assert pa["providerNpi"] == "1234567893"
+    assert pa["status"] == "pending"
+
+    # Same bundle again: patient, coverage and the still-open PA are reused
+    again = client.post("/v1/fhir/Bundle", content=json.dumps(_bundle(ext))).json()["entry"]
+    assert [e["response"]["status"] for e in again][:3] == ["200 OK", "200 OK", "200 OK"]
+    assert again[0]["response"]["location"] == r.json()["entry"][0]["response"]["location"]
+
+
+def test_post_bundle_rolls_back_on_error(client, db_session, monkeypatch):
+    from app.core.config import settings
+    from app.domain.models import Patient
+
+    monkeypatch.setattr(settings, "code_validation_enabled", True)
+
+    ext = uuid.uuid4().hex[:8]
+    r = client.post("/v1/fhir/Bundle", content=json.dumps(_bundle(ext, code="00000")))
+    assert r.status_code == 422
+    assert db_session.query(Patient).filter(Patient.external_id == f"P-{ext}").count() == 0
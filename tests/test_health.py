@@ -2,3 +2,15 @@ def test_health(client):
     r = client.get("/health")
     assert r.status_code == 200
     assert r.json() == {"status": "ok"}
+
+
+def test_lifespan_warm_up_reports_steps():
+    from fastapi.testclient import TestClient
+    from app.main import create_app
+
+    app = create_app()
+    with TestClient(app) as c:
+        assert c.get("/health").status_code == 200
+    # steps that don't depend on an external database must succeed
+    for step in ("mappers", "requirement_rules", "openapi", "storage"):
+        assert app.state.warmup[step]["ok"], app.state.warmup[step]
@@ -0,0 +1,48 @@
+import threading
+import time
+import uuid
+
+from app.domain.models import PriorAuthRequest
+from app.services import idempotency
+
+
+def _patient_payload():
+    return {"external_id": f"P-{uuid.uuid4().hex[:8]}", "first_name": "Cy", "last_name": "Ro", "birth_date": "1960-06-06"}
+
+
+def test_retry_with_same_key_replays_response(client, db_session):
+    key = uuid.uuid4().hex
+    p = client.post("/v1/patients", json=_patient_payload(), headers={"Idempotency-Key": key}).json()
+    cov = {"external_id": f"C-{uuid.uuid4().hex[:8]}", "member_id": "M9", "plan": "Gold", "payer": "ACME", "patient_id": p["id"]}
+    c = client.post("/v1/coverages", json=cov, headers={"Idempotency-Key": key}).json()
+
+    payload = {"patient_id": p["id"], "coverage_id": c["id"], "code": "70551"}
+    headers = {"Idempotency-Key": key}
+    first = client.post("/v1/prior-auth/requests", json=payload, headers=headers)
+    second = client.post("/v1/prior-auth/requests", json=payload, headers=headers)
+    assert first.status_code == second.status_code == 201
+    assert second.json() == first.json()
+    assert second.headers.get("Idempotent-Replayed") == "true"
+    assert db_session.query(PriorAuthRequest).filter(PriorAuthRequest.patient_id == uuid.UUID(p["id"])).count() == 1
+
+    other = client.post("/v1/prior-auth/requests", json={**payload, "code": "70553"}, headers=headers)
+    assert other.status_code == 422
+
+
+def test_duplicate_waits_for_in_flight_request(client, db_session):
+    key = uuid.uuid4().hex
+    payload = _patient_payload()
+    fp = idempotency.fingerprint_of(payload)
+    assert idempotency.claim(db_session, scope="patients.create", key=key, fingerprint=fp) is None
+
+    stored = {"id": "from-first-request"}
+    finisher = threading.Timer(
+        0.2, idempotency.complete, kwargs={"db": db_session, "scope": "patients.create", "key": key, "status_code": 201, "body": stored}
+    )
+    finisher.start()
+    started = time.monotonic()
+    r = client.post("/v1/patients", json=payload, headers={"Idempotency-Key": key})
+    finisher.join()
+    assert time.monotonic() - started >= 0.15
+    assert r.status_code == 201
+    assert r.json() == stored
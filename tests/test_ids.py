@@ -0,0 +1,10 @@
+import time
+from app.core.ids import uuid7
+
+
+def test_uuid7_is_versioned_and_time_ordered():
+    ids = [uuid7() for _ in range(5000)]
+    assert all(u.version == 7 and u.variant == "specified in RFC 4122" for u in ids)
+    assert ids == sorted(ids) and len(set(ids)) == len(ids)
+    ms = ids[0].int >> 80
+    assert abs(ms - time.time() * 1000) < 5000
@@ -0,0 +1,35 @@
+import json
+import logging
+
+from app.core.logging import JsonFormatter, RequestIdFilter, SamplingFilter, request_id_var
+
+
+def test_request_id_is_echoed_or_generated(client):
+    r = client.get("/health", headers={"X-Request-ID": "abc-123"})
+    assert r.headers["x-request-id"] == "abc-123"
+
+    r = client.get("/health", headers={"X-Request-ID": "bad id with spaces"})
+    generated = r.headers["x-request-id"]
+    assert generated != "bad id with spaces" and len(generated) == 32
+
+
+def test_json_record_carries_request_id_and_extras():
+    record = logging.LogRecord("app.test", logging.INFO, __file__, 1, "hello %s", ("world",), None)
+    record.duration_ms = 1.5
+    token = request_id_var.set("req-1")
+    try:
+        RequestIdFilter().filter(record)
+    finally:
+        request_id_var.reset(token)
+    out = json.loads(JsonFormatter().format(record))
+    assert out["msg"] == "hello world"
+    assert out["request_id"] == "req-1"
+    assert out["duration_ms"] == 1.5
+
+
+def test_sampling_only_drops_low_severity():
+    f = SamplingFilter(0.0, {"app.keep": 1.0})
+    mk = lambda name, level: logging.LogRecord(name, level, __file__, 1, "m", None, None)
+    assert f.filter(mk("app.x", logging.INFO)) is False
+    assert f.filter(mk("app.x", logging.WARNING)) is True
+    assert f.filter(mk("app.keep", logging.INFO)) is True
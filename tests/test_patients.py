@@ -0,0 +1,59 @@
+import uuid
+
+
+def test_create_conflicts_come_from_the_unique_index(client):
+    ext = f"P-{uuid.uuid4().hex[:8]}"
+    body = {"external_id": ext, "first_name": "Ada", "last_name": "Lee", "birth_date": "1970-03-04"}
+    r = client.post("/v1/patients", json=body)
+    assert r.status_code == 201, r.text
+    assert r.json()["name"] == "Ada Lee"
+    assert client.post("/v1/patients", json=body).status_code == 409
+
+    cov = {"external_id": f"C-{ext}", "member_id": "M1", "plan": "Gold PPO", "payer": "ACME", "patient_id": ext}
+    r = client.post("/v1/coverages", json=cov)
+    assert r.status_code == 201, r.text
+    assert r.json()["patient_id"] == client.get(f"/v1/patients/{ext}").json()["id"]
+    assert client.post("/v1/coverages", json=cov).status_code == 409
+    r = client.post("/v1/coverages", json={**cov, "external_id": f"C2-{ext}", "patient_id": "nobody"})
+    assert r.status_code == 404
+
+
+def test_directory_pages_filters_and_embeds_coverages(client):
+    tag = uuid.uuid4().hex[:8]
+    payer = f"PAYER-{tag}"
+    for i in range(5):
+        ext = f"P-{tag}-{i}"
+        r = client.post("/v1/patients", json={
+            "external_id": ext, "first_name": "Dir", "last_name": f"Zq{tag}{i}", "birth_date": "1980-01-01",
+        })
+        assert r.status_code == 201, r.text
+        if i % 2 == 0:
+            for plan in ("Gold PPO", "Silver HMO"):
+                r = client.post("/v1/coverages", json={
+                    "external_id": f"C-{ext}-{plan[:4]}", "member_id": f"M{i}", "plan": plan, "payer": payer,
+                    "patient_id": ext,
+                })
+                assert r.status_code == 201, r.text
+
+    seen, cursor = [], None
+    while True:
+        params = {"last_name": f"zQ{tag}", "limit": 2, **({"cursor": cursor} if cursor else {})}
+        page = client.get("/v1/patients", params=params).json()
+        assert len(page["items"]) <= 2
+        seen += [p["external_id"] for p in page["items"]]
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+    assert seen == [f"P-{tag}-{i}" for i in reversed(range(5))]
+
+    page = client.get("/v1/patients", params={"payer": payer, "plan": "Gold PPO", "include": "coverages"}).json()
+    assert [p["external_id"] for p in page["items"]] == [f"P-{tag}-4", f"P-{tag}-2", f"P-{tag}-0"]
+    assert [c["plan"] for c in page["items"][0]["coverages"]] == ["Gold PPO", "Silver HMO"]
+    assert page["next_cursor"] is None
+
+    r = client.get(f"/v1/patients/P-{tag}-2/coverages")
+    assert r.status_code == 200
+    assert {c["payer"] for c in r.json()["items"]} == {payer}
+    assert client.get(f"/v1/patients/P-{tag}-1/coverages").json() == {"items": []}
+    assert client.get("/v1/patients/nobody/coverages").status_code == 404
+    assert client.get("/v1/patients", params={"cursor": "not-a-cursor"}).status_code == 400
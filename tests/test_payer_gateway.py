@@ -0,0 +1,71 @@
+import asyncio
+import uuid
+
+import httpx
+
+from app.adapters.mock_payer import MockPayerState, create_mock_payer
+from app.adapters.payer_gateway import CircuitBreaker, PayerGateway
+from app.core.config import settings
+from app.domain.models import Patient, Coverage, PayerSubmission
+from app.workers import payer_worker
+
+
+def test_circuit_breaker_opens_and_half_opens():
+    now = [0.0]
+    b = CircuitBreaker(failure_threshold=2, reset_seconds=10, clock=lambda: now[0])
+    b.record_failure()
+    assert b.allow()
+    b.record_failure()
+    assert b.state == "open" and not b.allow()
+
+    now[0] = 11
+    assert b.allow() and not b.allow()   # one probe at a time
+    b.record_failure()
+    assert b.state == "open"
+
+    now[0] = 22
+    assert b.allow()
+    b.record_success()
+    assert b.state == "closed"
+
+
+def test_worker_submits_polls_and_applies_decision(client, db_session, monkeypatch):
+    monkeypatch.setattr(settings, "payer_default_url", "http://mock-payer/fhir")
+    monkeypatch.setattr(settings, "payer_poll_interval_seconds", 0)
+    monkeypatch.setattr(settings, "payer_backoff_base_seconds", 0.001)
+    monkeypatch.setattr(settings, "payer_worker_batch_size", 500)
+
+    payer = f"PAYER-{uuid.uuid4().hex[:6]}"
+    p = Patient(id=uuid.uuid4(), external_id=f"P-{uuid.uuid4().hex[:8]}", first_name="A", last_name="B", birth_date="1980-01-01")
+    c = Coverage(id=uuid.uuid4(), external_id=f"C-{uuid.uuid4().hex[:8]}", member_id="M1", plan="Gold PPO", payer=payer, patient_id=p.id)
+    db_session.add_all([p, c])
+    db_session.commit()
+    ids = {}
+    for code in ("70551", "70553"):
+        r = client.post("/v1/prior-auth/requests", json={"patient_id": str(p.id), "coverage_id": str(c.id), "code": code})
+        assert r.json()["status"] == "pending"
+        ids[code] = r.json()["id"]
+
+    # One submit reaches the payer but its response is lost. It isn't retried
+    # in the client; the worker re-sends it later and the payer matches it up
+    state = MockPayerState(lose_next=1)
+    gateway = PayerGateway(transport=httpx.ASGITransport(app=create_mock_payer(state)))
+
+    async def drive():
+        try:
+            for _ in range(3):   # submit -> re-send / poll -> poll
+                await payer_worker.run_once(gateway)
+                await asyncio.sleep(0.05)
+        finally:
+            await gateway.aclose()
+
+    asyncio.run(drive())
+    # One claim per PA at the payer (other tests' queued PAs are drained too)
+    assert len(state.claims) == len(state.identifiers)
+    assert set(map(str, ids.values())) <= set(state.identifiers)
+
+    assert client.get(f"/v1/prior-auth/requests/{ids['70551']}").json()["status"] == "approved"
+    denied = client.get(f"/v1/prior-auth/requests/{ids['70553']}").json()
+    assert denied["status"] == "denied" and denied["disposition"] == "Not medically necessary"
+    sub = db_session.get(PayerSubmission, uuid.UUID(ids["70551"]))
+    assert sub.state == "decided" and sub.tracking_id
@@ -24,3 +24,86 @@ def test_create_prior_auth(client, db_session):
     }
     r = client.post("/v1/prior-auth/requests", json=payload)
     assert r.status_code == 201, r.text
+
+
+def test_diagnosis_codes_are_normalized_and_filterable(client, db_session):
+    p = Patient(id=uuid.uuid4(), external_id=f"P-{uuid.uuid4().hex[:8]}", first_name="Jo", last_name="Ma", birth_date="1975-05-05")
+    c = Coverage(id=uuid.uuid4(), external_id=f"C-{uuid.uuid4().hex[:8]}", member_id="M7", plan="Gold PPO", payer="ACME", patient_id=p.id)
+    db_session.add_all([p, c])
+    db_session.commit()
+
+    diag = "S83512A"  # stored as S83.512A
+    r = client.post("/v1/prior-auth/requests", json={
+        "patient_id": str(p.id), "coverage_id": str(c.id), "code": "70551",
+        "diagnosis_codes": [" m54.5 ", diag.lower(), "M54.5"],
+    })
+    assert r.status_code == 201, r.text
+    normalized = f"{diag[:3]}.{diag[3:]}"
+    assert r.json()["diagnosisCodes"] == ["M54.5", normalized]
+
+    r = client.get(f"/v1/prior-auth/requests?diagnosis={diag}")
+    assert r.json()["total"] == 1
+    assert r.json()["items"][0]["diagnosisCodes"] == ["M54.5", normalized]
+
+    r = client.get(f"/v1/prior-auth/export?diagnosis={normalized}")
+    assert len(r.text.splitlines()) == 1
+
+
+def test_sparse_fields_and_includes(client, db_session):
+    p = Patient(id=uuid.uuid4(), external_id=f"P-{uuid.uuid4().hex[:8]}", first_name="Al", last_name="Ro", birth_date="1960-06-06")
+    c = Coverage(id=uuid.uuid4(), external_id=f"C-{uuid.uuid4().hex[:8]}", member_id="M9", plan="Silver HMO", payer="ACME", patient_id=p.id)
+    db_session.add_all([p, c])
+    db_session.commit()
+    r = client.post("/v1/prior-auth/requests", json={"patient_id": str(p.id), "coverage_id": str(c.id), "code": "70551"})
+    pa_id = r.json()["id"]
+    url = f"/v1/prior-auth/requests/{pa_id}"
+
+    r = client.get(url, params={"fields": "status,missingDocs"})
+    assert r.json() == {"id": pa_id, "status": "pending", "missingDocs": ["Clinical notes", "Recent imaging"]}
+
+    r = client.get(url, params={"fields": "code", "include": "patient,coverage"})
+    body = r.json()
+    assert set(body) == {"id", "code", "patient", "coverage"}
+    assert body["patient"]["name"] == "Al Ro" and body["coverage"]["plan"] == "Silver HMO"
+
+    compact = client.get(url, params={"profile": "compact"}).json()
+    assert "memberName" not in compact and compact["diagnosisCodes"] == []
+    assert "memberName" in client.get(url).json()  # legacy stays the default
+
+    r = client.get("/v1/prior-auth/requests", params={"code": "70551", "fields": "nope"})
+    assert r.status_code == 422
+
+
+def test_duplicate_open_request_is_rejected_with_its_id(client, db_session):
+    p = Patient(id=uuid.uuid4(), external_id=f"P-{uuid.uuid4().hex[:8]}", first_name="Du", last_name="Pe", birth_date="1970-07-07")
+    c = Coverage(id=uuid.uuid4(), external_id=f"C-{uuid.uuid4().hex[:8]}", member_id="M8", plan="Gold PPO", payer="ACME", patient_id=p.id)
+    db_session.add_all([p, c])
+    db_session.commit()
+    payload = {"patient_id": str(p.id), "coverage_id": c.external_id, "code": "70551"}
+
+    first = client.post("/v1/prior-auth/requests", json=payload).json()
+    r = client.post("/v1/prior-auth/requests", json={**payload, "code": " 70551 ", "patient_id": p.external_id})
+    assert r.status_code == 409
+    assert r.json()["detail"]["existing_id"] == first["id"]
+    assert r.headers["location"] == f"/v1/prior-auth/requests/{first['id']}"
+
+    # Once decided, the same procedure can be requested again
+    client.patch(f"/v1/prior-auth/requests/{first['id']}/status", json={"status": "denied"})
+    assert client.post("/v1/prior-auth/requests", json=payload).status_code == 201
+
+
+def test_reopening_is_rejected_while_another_request_is_open(client, db_session):
+    p = Patient(id=uuid.uuid4(), external_id=f"P-{uuid.uuid4().hex[:8]}", first_name="Re", last_name="Op", birth_date="1970-07-07")
+    c = Coverage(id=uuid.uuid4(), external_id=f"C-{uuid.uuid4().hex[:8]}", member_id="M8", plan="Gold PPO", payer="ACME", patient_id=p.id)
+    db_session.add_all([p, c])
+    db_session.commit()
+    payload = {"patient_id": str(p.id), "coverage_id": str(c.id), "code": "70551"}
+
+    first = client.post("/v1/prior-auth/requests", json=payload).json()
+    client.patch(f"/v1/prior-auth/requests/{first['id']}/status", json={"status": "denied"})
+    second = client.post("/v1/prior-auth/requests", json=payload).json()
+
+    r = client.patch(f"/v1/prior-auth/requests/{first['id']}/status", json={"status": "pending"})
+    assert r.status_code == 409
+    assert r.json()["detail"]["existing_id"] == second["id"]
+    assert client.get(f"/v1/prior-auth/requests/{first['id']}").json()["status"] == "denied"
@@ -0,0 +1,35 @@
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.core.config import settings
+from app.core.profiling import _before
+from app.core.security import create_access_token
+
+
+def _auth(*roles):
+    return {"Authorization": f"Bearer {create_access_token('ops@example.com', list(roles))}"}
+
+
+def test_profile_flag_is_admin_only_and_stores_profile(client, tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "profiling_dir", str(tmp_path))
+
+    r = client.get("/v1/prior-auth/requests")
+    assert "x-profile-id" not in r.headers
+    assert not event.contains(Engine, "before_cursor_execute", _before)
+
+    r = client.get("/v1/prior-auth/requests?__profile=1", headers=_auth("clinician"))
+    assert r.status_code == 403
+
+    r = client.get("/v1/prior-auth/requests", headers={**_auth("admin"), "X-Profile": "1"})
+    assert r.status_code == 200
+    profile_id = r.headers["x-profile-id"]
+    assert not event.contains(Engine, "before_cursor_execute", _before)
+
+    summary = client.get(f"/v1/profiles/{profile_id}").json()
+    assert summary["path"] == "/v1/prior-auth/requests" and summary["status"] == 200
+    assert summary["sql_count"] >= 1
+    assert any("prior_auth_requests" in q["statement"] for q in summary["sql"])
+
+    r = client.get(f"/v1/profiles/{profile_id}?format=folded")
+    assert r.status_code == 200
+    assert all(line.rsplit(" ", 1)[1].isdigit() for line in r.text.splitlines())
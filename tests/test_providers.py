@@ -0,0 +1,45 @@
+import io
+import uuid
+from app.domain.models import Patient, Coverage
+from app.services.providers import is_valid_npi
+
+NPPES_CSV = (
+    '"NPI","Entity Type Code","Provider Organization Name (Legal Business Name)",'
+    '"Provider Last Name (Legal Name)","Provider First Name","Provider Credential Text",'
+    '"Provider Business Practice Location Address State Name","Healthcare Provider Taxonomy Code_1",'
+    '"NPI Deactivation Date","NPI Reactivation Date"\n'
+    '"1234567893","1","","ZYLSTRA","QUINN","MD","CA","207Q00000X","",""\n'
+    '"1245319599","2","ZYLO IMAGING CENTER","","","","NY","261QR0200X","",""\n'
+    '"1234567890","1","","BADCHECK","AL","","TX","","",""\n'
+    '"1003000126","1","","GONE","PAT","","WA","","05/01/2020",""\n'
+)
+
+
+def test_npi_check_digit():
+    assert is_valid_npi("1234567893")
+    assert not is_valid_npi("1234567890")
+    assert not is_valid_npi("12345")
+
+
+def test_nppes_load_autocomplete_and_pa_resolution(client, db_session):
+    r = client.post("/v1/providers/import", files={"file": ("npidata.csv", io.BytesIO(NPPES_CSV.encode()), "text/csv")})
+    assert r.status_code == 200, r.text
+    assert r.json() == {"loaded": 2, "skipped": 2}
+
+    r = client.get("/v1/providers/search?prefix=zyl")
+    assert [p["npi"] for p in r.json()["items"]] == ["1245319599", "1234567893"]
+    r = client.get("/v1/providers/search?prefix=12345")
+    assert [p["name"] for p in r.json()["items"]] == ["QUINN ZYLSTRA, MD"]
+
+    p = Patient(id=uuid.uuid4(), external_id=f"P-{uuid.uuid4().hex[:8]}", first_name="A", last_name="B", birth_date="1980-01-01")
+    c = Coverage(id=uuid.uuid4(), external_id=f"C-{uuid.uuid4().hex[:8]}", member_id="M1", plan="Gold PPO", payer="ACME", patient_id=p.id)
+    db_session.add_all([p, c])
+    db_session.commit()
+    base = {"patient_id": str(p.id), "coverage_id": str(c.id), "code": "97110"}
+
+    r = client.post("/v1/prior-auth/requests", json={**base, "provider_npi": "1234567893", "provider_name": "ignored"})
+    assert r.status_code == 201, r.text
+    assert r.json()["provider"] == {"npi": "1234567893", "name": "QUINN ZYLSTRA, MD"}
+
+    r = client.post("/v1/prior-auth/requests", json={**base, "provider_npi": "1234567890"})
+    assert r.status_code == 422
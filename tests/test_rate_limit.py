@@ -0,0 +1,60 @@
+import asyncio
+import uuid
+
+from app.core.config import settings
+from app.core.rate_limit import RateLimitMiddleware, InMemoryStore, _client_identity
+
+
+def test_token_bucket_returns_429_with_retry_after(client, monkeypatch):
+    monkeypatch.setitem(settings.rate_limits, "auth", "2/60")
+    headers = {"Fly-Client-IP": f"10.0.{uuid.uuid4().int % 250}.{uuid.uuid4().int % 250}"}
+
+    codes = [client.post("/v1/auth/token", json={}, headers=headers).status_code for _ in range(3)]
+    assert codes[:2] == [400, 400]
+    assert codes[2] == 429
+
+    r = client.post("/v1/auth/token", json={}, headers=headers)
+    assert r.status_code == 429
+    assert int(r.headers["Retry-After"]) >= 1
+
+
+def test_concurrency_cap_sheds_with_503(monkeypatch):
+    monkeypatch.setitem(settings.concurrency_limits, "upload", 1)
+    monkeypatch.setattr(settings, "admission_queue_timeout_seconds", 0.05)
+
+    async def slow_app(scope, receive, send):
+        await asyncio.sleep(0.2)
+        await send({"type": "http.response.start", "status": 201, "headers": []})
+        await send({"type": "http.response.body", "body": b""})
+
+    mw = RateLimitMiddleware(slow_app, store=InMemoryStore())
+
+    async def call(ip):
+        sent = []
+
+        async def send(msg):
+            sent.append(msg)
+
+        scope = {"type": "http", "method": "POST", "path": "/v1/attachments", "headers": [], "client": (ip, 1)}
+        await mw(scope, None, send)
+        return sent[0]
+
+    async def main():
+        return await asyncio.gather(call("1.1.1.1"), call("2.2.2.2"))
+
+    first, second = asyncio.run(main())
+    assert first["status"] == 201
+    assert second["status"] == 503
+    assert (b"retry-after", b"1") in second["headers"]
+
+
+def test_anonymous_identity_ignores_client_supplied_forwarded_hops(monkeypatch):
+    def scope(xff):
+        return {"headers": [(b"x-forwarded-for", xff.encode())], "client": ("10.9.9.9", 1)}
+
+    # No trusted proxy: X-Forwarded-For is ignored entirely
+    assert _client_identity(scope("1.1.1.1")) == "ip:10.9.9.9"
+    # Behind one proxy: the hop it appended, whatever the client prepended
+    monkeypatch.setattr(settings, "rate_limit_proxy_hops", 1)
+    assert _client_identity(scope("1.1.1.1, 203.0.113.7")) == "ip:203.0.113.7"
+    assert _client_identity(scope("2.2.2.2, 203.0.113.7")) == "ip:203.0.113.7"
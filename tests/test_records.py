@@ -0,0 +1,82 @@
+import json
+import threading
+import time
+import uuid
+
+from app.services import records
+from app.services.records import LocalStore, RecordCache
+
+
+def _codec():
+    return {"encode": json.dumps, "decode": json.loads}
+
+
+def test_concurrent_misses_load_once():
+    cache = RecordCache(maxsize=10, local_ttl=60, shared_ttl=60)
+    calls = []
+
+    def load():
+        calls.append(1)
+        time.sleep(0.1)
+        return {"id": "p1"}
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get("patient:id:p1", load, **_codec()))) for _ in range(10)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(calls) == 1
+    assert results == [{"id": "p1"}] * 10
+
+
+def test_shared_store_fills_other_processes_and_invalidation_reaches_it():
+    store = LocalStore()
+    a = RecordCache(maxsize=10, local_ttl=60, shared_ttl=60, store=store)
+    b = RecordCache(maxsize=10, local_ttl=60, shared_ttl=60, store=store)
+    loads = []
+
+    def load():
+        loads.append(1)
+        return {"id": "c1", "plan": "Gold PPO"}
+
+    aliases = lambda v: ["coverage:ext:C-1"]
+    assert a.get("coverage:id:c1", load, aliases=aliases, **_codec())["plan"] == "Gold PPO"
+    # The other process is served from the store, under either key
+    assert b.get("coverage:ext:C-1", load, **_codec())["plan"] == "Gold PPO"
+    assert len(loads) == 1
+
+    a.invalidate("coverage:id:c1", "coverage:ext:C-1")
+    assert store.get("coverage:id:c1") is None
+    b.clear()  # its local copy would otherwise live for local_ttl
+    assert b.get("coverage:id:c1", load, **_codec())
+    assert len(loads) == 2
+
+
+def test_lookups_are_cached_and_writes_invalidate(client):
+    ext = f"P-{uuid.uuid4().hex[:8]}"
+    client.post("/v1/patients", json={"external_id": ext, "first_name": "Ca", "last_name": "Che", "birth_date": "1980-01-01"})
+    cov = client.post("/v1/coverages", json={
+        "external_id": f"C-{ext}", "member_id": "M1", "plan": "Gold PPO", "payer": "ACME", "patient_id": ext,
+    }).json()
+    pa = client.post("/v1/prior-auth/requests", json={
+        "patient_id": ext, "coverage_id": cov["id"], "code": "70551", "diagnosis_codes": ["G43.909"],
+    }).json()
+
+    loads = records.cache.stats["load"]
+    patient = client.get(f"/v1/patients/{ext}").json()
+    assert client.get(f"/v1/patients/{patient['id']}").json() == patient
+    assert client.get(f"/v1/coverages/C-{ext}").json()["id"] == cov["id"]
+    first = client.get(f"/v1/prior-auth/requests/{pa['id']}").json()
+    assert first["diagnosisCodes"] == ["G43.909"] and first["memberName"] == "Ca Che"
+    # Patient and coverage were cached by the PA create; only the PA itself loads
+    assert records.cache.stats["load"] - loads == 1
+
+    r = client.patch(f"/v1/prior-auth/requests/{pa['id']}/status", json={"status": "denied", "disposition": "not covered"})
+    assert r.status_code == 200
+    again = client.get(f"/v1/prior-auth/requests/{pa['id']}").json()
+    assert (again["status"], again["disposition"]) == ("denied", "not covered")
+    assert again["diagnosisCodes"] == ["G43.909"]
+
+    assert client.delete(f"/v1/prior-auth/requests/{pa['id']}").status_code in (200, 204)
+    assert client.get(f"/v1/prior-auth/requests/{pa['id']}").status_code == 404
@@ -0,0 +1,41 @@
+import hashlib
+import os
+
+
+def _sha(b: bytes) -> str:
+    return hashlib.sha256(b).hexdigest()
+
+
+def test_chunked_upload_out_of_order_and_resume(client):
+    chunk = 64 * 1024
+    data = os.urandom(chunk * 2 + 1000)
+    parts = [data[i:i + chunk] for i in range(0, len(data), chunk)]
+
+    r = client.post("/v1/attachments/uploads", json={
+        "filename": "export.bin", "size_bytes": len(data), "chunk_size": chunk, "sha256": _sha(data),
+    })
+    assert r.status_code == 201, r.text
+    up = r.json()
+    assert up["chunk_count"] == 3
+    url = f"/v1/attachments/uploads/{up['id']}"
+
+    for i in (2, 0):
+        r = client.put(f"{url}/chunks/{i}", content=parts[i], headers={"X-Chunk-SHA256": _sha(parts[i])})
+        assert r.status_code == 200, r.text
+
+    # Corrupted chunk is rejected; completing early reports what's missing
+    r = client.put(f"{url}/chunks/1", content=parts[0], headers={"X-Chunk-SHA256": _sha(parts[1])})
+    assert r.status_code in (400, 422)
+    r = client.post(f"{url}/complete")
+    assert r.status_code == 409
+    assert client.get(url).json()["missing"] == [1]
+
+    r = client.put(f"{url}/chunks/1", content=parts[1], headers={"X-Chunk-SHA256": _sha(parts[1])})
+    assert r.status_code == 200
+    r = client.post(f"{url}/complete")
+    assert r.status_code == 201, r.text
+    doc = r.json()
+    assert doc["size_bytes"] == len(data)
+    assert client.post(f"{url}/complete").json()["id"] == doc["id"]
+
+    assert client.get(doc["url"]).content == data
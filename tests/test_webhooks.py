@@ -0,0 +1,94 @@
+import asyncio
+import json
+import threading
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from app.adapters.webhook_sender import WebhookSender
+from app.core.config import settings
+from app.services.webhooks import verify
+from app.workers import webhook_worker
+
+
+@pytest.fixture
+def receiver():
+    """
+    Local HTTP endpoint; answers each POST with the next status queued for
+    its path (default 204) and keeps what it received.
+    """
+    received, statuses = [], {}
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            body = self.rfile.read(int(self.headers["Content-Length"]))
+            received.append((self.path, dict(self.headers), body))
+            queued = statuses.get(self.path)
+            self.send_response(queued.pop(0) if queued else 204)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_port}", received, statuses
+    server.shutdown()
+    server.server_close()
+
+
+def _drain():
+    async def go():
+        sender = WebhookSender()
+        try:
+            return await webhook_worker.run_once(sender)
+        finally:
+            await sender.aclose()
+    return asyncio.run(go())
+
+
+def test_status_changes_are_delivered_signed_batched_and_dead_lettered(client, receiver, monkeypatch):
+    base_url, received, statuses = receiver
+    monkeypatch.setattr(settings, "webhook_backoff_base_seconds", 0)
+    monkeypatch.setattr(settings, "webhook_max_attempts", 3)
+
+    secret = "s" * 32
+    sub = client.post("/v1/webhooks", json={"url": f"{base_url}/hooks", "secret": secret}).json()
+    gone = client.post("/v1/webhooks", json={"url": f"{base_url}/gone"}).json()
+    assert len(gone["secret"]) >= 16
+
+    ext = f"P-{uuid.uuid4().hex[:8]}"
+    client.post("/v1/patients", json={"external_id": ext, "first_name": "W", "last_name": "H", "birth_date": "1980-01-01"})
+    cov = client.post("/v1/coverages", json={
+        "external_id": f"C-{ext}", "member_id": "M1", "plan": "Gold PPO", "payer": "ACME", "patient_id": ext,
+    }).json()
+    pa = client.post("/v1/prior-auth/requests", json={"patient_id": ext, "coverage_id": cov["id"], "code": "70551"}).json()
+    for new_status in ("approved", "denied"):
+        r = client.patch(f"/v1/prior-auth/requests/{pa['id']}/status", json={"status": new_status})
+        assert r.status_code == 200, r.text
+
+    # First attempt: /hooks fails with a 503 (retried), /gone says 410 (dead)
+    statuses.update({"/hooks": [503], "/gone": [410, 410]})
+    assert _drain() == 4
+    assert len(received) == 2
+    assert _drain() == 2
+    hooks = [(h, b) for path, h, b in received if path == "/hooks"]
+    assert len(hooks) == 2
+    headers, body = hooks[-1]
+    assert verify(secret, int(headers["X-Webhook-Timestamp"]), body, headers["X-Webhook-Signature"])
+    events = json.loads(body)["events"]
+    assert [e["data"]["status"] for e in events] == ["approved", "denied"]
+    assert events[1]["data"]["previous_status"] == "approved"
+    assert {e["type"] for e in events} == {"pa.status_changed"}
+    assert _drain() == 0
+
+    dead = client.get("/v1/webhooks/dead-letters").json()["items"]
+    ours = [d for d in dead if d["subscription_id"] == gone["id"]]
+    assert len(ours) == 2 and ours[0]["last_error"] == "HTTP 410"
+    assert client.post(f"/v1/webhooks/dead-letters/{ours[0]['id']}/retry").status_code == 200
+    assert _drain() == 1
+
+    for s in (sub, gone):
+        assert client.delete(f"/v1/webhooks/{s['id']}").status_code == 204